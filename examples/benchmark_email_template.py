@@ -0,0 +1,121 @@
+# Benchmark of rendering result emails with the compiled templates vs. the previous str.format based rendering.
+# Run with `python -m examples.benchmark_email_template`.
+import timeit
+
+from examples.utils.email_template import (
+    _content_begin,
+    _full_template,
+    full_template,
+    main_content_template,
+    table_row_template,
+    table_template,
+)
+
+NUM_EMAILS = 10_000
+
+
+def _format_full_template(title: str, content: str, pre_header: str) -> str:
+    return _full_template.format(title=title, content=content, pre_header=pre_header)
+
+
+def _format_main_content_template(content: str, heading: str) -> str:
+    heading_html = """
+            <div style="font-size: 18px; font-weight: bold; margin-bottom: 10px;">{heading}</div>
+        """.format(heading=heading)
+    return _content_begin + """
+            <tr>
+              <td style="padding: 20px;">
+                {heading_html}
+                {content}
+              </td>
+            </tr>
+          </table>
+    """.format(heading_html=heading_html, content=content)
+
+
+def _format_table_template(heading: str, rows_html: str, extra_content_html: str):
+    if len(str(extra_content_html)) > 5:
+        extra_content_html = f"""
+        <div style="height:1px; background-color:lightgray; margin-top:20px; margin-bottom:25px;"></div>
+            {extra_content_html}
+        """
+    return (
+        _content_begin
+        + """
+        <tr>
+          <td style="padding: 20px;">
+            <div style="font-size: 18px; font-weight: bold; margin-bottom: 10px;">{heading}</div>
+
+            <!-- Two-column table for order information -->
+            <table width="100%" cellspacing="0" cellpadding="10">
+              <!-- <tr>
+                <th align="left" style="border-bottom: 1px solid #ccc;"><strong>Field</strong></th>
+                <th align="left" style="border-bottom: 1px solid #ccc;"><strong>Value</strong></th>
+              </tr> -->
+              {rows_html}
+            </table>
+            {extra_content_html}
+          </td>
+        </tr>
+      </table>
+""".format(
+            heading=heading,
+            rows_html=rows_html,
+            extra_content_html=extra_content_html,
+        )
+    )
+
+
+_ROWS_HTML = "\n".join(
+    table_row_template.format(label=f"Label {i}", value=f"Value {i}") for i in range(8)
+)
+_TODOS = "<p><b>To Dos</b></p><p><ul><li>Send the VRBO details</li></ul></p>"
+_CALL_BODY = "<p>Had a chat with Lucas Meyer about ...</p>" * 20
+
+
+def render_before() -> str:
+    contact_table = _format_table_template("Contact Info", _ROWS_HTML, "")
+    task_table = _format_table_template("Follow up Tasks", _ROWS_HTML, _TODOS)
+    further_details = _format_main_content_template(_CALL_BODY, "Further Details")
+    extra_info = _format_main_content_template("Note: exists", "Sync Status")
+    content = """
+            {contact_table}
+            {task_table}
+            {further_details}
+            {extra_info}
+            """.format(
+        contact_table=contact_table,
+        task_table=task_table,
+        further_details=further_details,
+        extra_info=extra_info,
+    )
+    return _format_full_template("HubSpot Data Entry Confirmation", content, "Note")
+
+
+def render_after() -> str:
+    # Same as send_hubspot_result: the sections are joined once, together with the outer template.
+    separator = "\n            "
+    return full_template(
+        title="HubSpot Data Entry Confirmation",
+        pre_header="Note",
+        content=[
+            separator,
+            table_template("Contact Info", _ROWS_HTML, ""),
+            separator,
+            table_template("Follow up Tasks", _ROWS_HTML, _TODOS),
+            separator,
+            main_content_template(_CALL_BODY, heading="Further Details"),
+            separator,
+            main_content_template("Note: exists", heading="Sync Status"),
+            separator,
+        ],
+    )
+
+
+if __name__ == "__main__":
+    assert render_before() == render_after(), "compiled templates changed the output"
+    before = timeit.timeit(render_before, number=NUM_EMAILS)
+    after = timeit.timeit(render_after, number=NUM_EMAILS)
+    print(f"rendering {NUM_EMAILS} result emails:")
+    print(f"  str.format: {before * 1000:.0f}ms")
+    print(f"  compiled:   {after * 1000:.0f}ms ({before / after:.1f}x)")
@@ -0,0 +1,111 @@
+# Micro-benchmark for hydrating a HubspotObject from a (large) HubSpot contact response.
+# Run with `python -m examples.benchmark_hubspot_object`.
+import json
+import timeit
+import tracemalloc
+
+from app.form_library import get_form
+from app.hubspot_models import ObjectType
+from common.form import FormName
+from examples.utils.hubspot_object import HubspotObject, unknown_field_counts
+
+NUM_PROPERTIES = 500
+NUM_RUNS = 1000
+
+
+def _contact_response_props(num_properties: int) -> dict:
+    # Real responses carry the form fields plus hundreds of HubSpot-managed ones (hs_analytics_*, hs_email_* ...).
+    props = {
+        field.name: f"value of {field.name}"
+        for field in get_form(FormName.HUBSPOT_CONTACT).fields
+    }
+    for i in range(num_properties - len(props)):
+        props[f"hs_generated_property_{i}"] = str(i)
+    return props
+
+
+def _traced_memory(decode) -> tuple:
+    # (kept, peak) bytes allocated while decoding, kept is what the result still holds on to afterwards.
+    tracemalloc.start()
+    try:
+        result = decode()  # noqa: F841 - measured while alive
+        return tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+
+def _linear_scan_hydration(form, response_props: dict) -> dict:
+    # What from_api_response_props did before the field index: a scan of form.fields per response property.
+    data = {}
+    for field_name, value in response_props.items():
+        for field in form.fields:
+            if field.name == field_name:
+                data[field_name] = value
+                break
+    return data
+
+
+if __name__ == "__main__":
+    contact_form = get_form(FormName.HUBSPOT_CONTACT)
+    response_props = _contact_response_props(NUM_PROPERTIES)
+
+    before = timeit.timeit(
+        lambda: _linear_scan_hydration(contact_form, response_props), number=NUM_RUNS
+    )
+    after = timeit.timeit(
+        lambda: HubspotObject.from_api_response_props(
+            "123", ObjectType.CONTACT, contact_form, response_props
+        ),
+        number=NUM_RUNS,
+    )
+    print(f"hydrating a {NUM_PROPERTIES}-property contact, {NUM_RUNS} runs:")
+    print(
+        f"  linear scan:   {before * 1000:.1f}ms ({before / NUM_RUNS * 1e6:.1f}us per object)"
+    )
+    print(
+        f"  indexed:       {after * 1000:.1f}ms ({after / NUM_RUNS * 1e6:.1f}us per object)"
+    )
+    print(f"  unknown properties seen: {len(unknown_field_counts())}")
+
+    raw_response = json.dumps(
+        {"id": "51", "properties": response_props, "archived": False}
+    ).encode()
+    full_decode = timeit.timeit(
+        lambda: HubspotObject.from_api_response_props(
+            "123",
+            ObjectType.CONTACT,
+            contact_form,
+            json.loads(raw_response)["properties"],
+        ),
+        number=NUM_RUNS,
+    )
+    projected_decode = timeit.timeit(
+        lambda: HubspotObject.from_api_response_bytes(
+            "123", ObjectType.CONTACT, contact_form, raw_response
+        ),
+        number=NUM_RUNS,
+    )
+    print(f"decoding + hydrating the raw {len(raw_response)} byte response:")
+    print(f"  full decode: {full_decode * 1000:.1f}ms")
+    print(f"  projected:   {projected_decode * 1000:.1f}ms")
+
+    for name, decode in [
+        ("json.loads", lambda: json.loads(raw_response)),
+        (
+            "full decode",
+            lambda: HubspotObject.from_api_response_props(
+                "123",
+                ObjectType.CONTACT,
+                contact_form,
+                json.loads(raw_response)["properties"],
+            ),
+        ),
+        (
+            "projected",
+            lambda: HubspotObject.from_api_response_bytes(
+                "123", ObjectType.CONTACT, contact_form, raw_response
+            ),
+        ),
+    ]:
+        kept, peak = _traced_memory(decode)
+        print(f"  {name + ':':<12} {kept / 1024:.1f}KB kept, {peak / 1024:.1f}KB peak")
@@ -0,0 +1,78 @@
+# Cold-start import time of the worker entrypoints, measured with `python -X importtime` in a fresh interpreter.
+# Exits non-zero when a module goes over its budget, so it can run as a CI step:
+#   python -m examples.benchmark_import_time
+#   python -m examples.benchmark_import_time --module examples.hubspot_update_email --budget-ms 150 --runs 5
+# Lists the heaviest imports underneath, which is where to look when the budget breaks.
+import argparse
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Budget for the cumulative import time of examples.gpt_to_hubspot, with the HubSpot SDK, the OpenAI client and
+# the database models no longer loaded at import. Tighten it when the measurement settles lower.
+DEFAULT_BUDGET_MS = 300
+DEFAULT_MODULE = "examples.gpt_to_hubspot"
+
+# import time:  self [us] | cumulative | imported package
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_import_time(module: str) -> Tuple[int, List[Tuple[int, str]]]:
+    """Returns the cumulative import time of `module` in microseconds, and (cumulative_us, name) of all imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"cannot import {module}:\n{result.stderr}")
+
+    imports = []
+    total_us = None
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        cumulative_us, name = int(match.group(2)), match.group(4)
+        imports.append((cumulative_us, name))
+        if name == module:
+            total_us = cumulative_us
+    if total_us is None:
+        raise RuntimeError(f"{module} missing from -X importtime output")
+    return total_us, imports
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Cold-start import time budget")
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    # The best of a few runs, a single one is too noisy on a shared CI box.
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [measure_import_time(args.module) for _ in range(args.runs)]
+    total_us, imports = min(runs, key=lambda run: run[0])
+
+    heaviest: Dict[str, int] = {}
+    for cumulative_us, name in imports:
+        heaviest[name] = max(cumulative_us, heaviest.get(name, 0))
+    print(f"heaviest imports of {args.module}:")
+    for name, cumulative_us in sorted(heaviest.items(), key=lambda kv: -kv[1])[
+        : args.top
+    ]:
+        print(f"  {cumulative_us / 1000:8.1f}ms  {name}")
+
+    total_ms = total_us / 1000
+    print(f"import {args.module}: {total_ms:.1f}ms (budget {args.budget_ms:.0f}ms)")
+    if total_ms > args.budget_ms:
+        print(
+            f"FAIL: import time regressed past the budget by {total_ms - args.budget_ms:.1f}ms"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
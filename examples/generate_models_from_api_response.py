@@ -1,5 +1,33 @@
 # FOR CODE GEN
-test_hs_client = HubspotClient(test_pipeline.oauth_data_id)
+# Fetches each portal's properties once (or reads a saved fixture of the properties API response offline)
+# and writes an importable module with the FormDefinitions, so workers load a prebuilt form per portal
+# (see examples/utils/prebuilt_forms.py) instead of building FieldDefinitions from API responses.
+#
+#   python -m examples.generate_models_from_api_response --hub-id 123 --access-token ...
+#   python -m examples.generate_models_from_api_response --hub-id 123 --fixture-dir fixtures/123
+# where fixtures/123/contact.json is a saved response of GET /crm/v3/properties/contact.
+import argparse
+import hashlib
+import os
+from typing import Dict, List, Tuple
+
+from hubspot import HubSpot
+from hubspot.crm.properties import ModelProperty
+
+from app.hubspot_models import ALLOWED_FIELDS, FieldDefinition
+from common.form import FormDefinition, FormName
+from examples.utils.prebuilt_forms import (
+    DEFAULT_PREBUILT_FORMS_PACKAGE,
+    FORM_NAMES_BY_OBJECT_TYPE,
+    prebuilt_forms_module_name,
+)
+from examples.utils.property_schema_cache import (
+    PropertySchemaCache,
+    properties_from_response_body,
+)
+
+# Bump when the generated module layout changes, so all portals get regenerated.
+CODEGEN_VERSION = 1
 
 
 def _gen_field_from_properties_api_response(response: ModelProperty) -> FieldDefinition:
@@ -25,6 +53,111 @@ def _gen_form_from_properties_api_response(
     return FormDefinition(form_name, fields)
 
 
-props = test_hs_client.list_custom_properties(object_type="contact")
-contact_def = _gen_form_from_properties_api_response(props.results)
-print(f"contact_def to_python_definition: {contact_def.to_python_definition()}")
+def _gen_module_source(
+    hub_id: str, forms: Dict[str, FormDefinition]
+) -> Tuple[str, str]:
+    definitions = "\n\n".join(
+        f"FORMS[FormName.{form.name.name}] = {form.to_python_definition()}"
+        for _, form in sorted(forms.items())
+    )
+    body = f"""
+from app.hubspot_models import FieldDefinition, Option
+from common.form import FormDefinition, FormName
+
+FORMS = {{}}
+
+{definitions}
+"""
+    # The hash only covers what's generated, so re-running on an unchanged schema is a no-op.
+    content_hash = hashlib.sha256(f"{CODEGEN_VERSION}:{body}".encode()).hexdigest()
+    source = f"""# Generated by examples/generate_models_from_api_response.py - DO NOT EDIT.
+HUB_ID = "{hub_id}"
+CODEGEN_VERSION = {CODEGEN_VERSION}
+CONTENT_HASH = "{content_hash}"
+{body}"""
+    return source, content_hash
+
+
+def _existing_content_hash(path: str) -> str:
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith("CONTENT_HASH = "):
+                    return line.split('"')[1]
+    except OSError:
+        pass
+    return ""
+
+
+def generate_prebuilt_forms(
+    hub_id: str, forms: Dict[str, FormDefinition], out_dir: str
+) -> bool:
+    """Writes the module for the portal, returns False when it was already up-to-date."""
+    source, new_hash = _gen_module_source(hub_id, forms)
+    path = os.path.join(out_dir, f"{prebuilt_forms_module_name(hub_id)}.py")
+    if _existing_content_hash(path) == new_hash:
+        print(f"{path} is up-to-date ({new_hash[:12]})")
+        return False
+
+    os.makedirs(out_dir, exist_ok=True)
+    init_path = os.path.join(out_dir, "__init__.py")
+    if not os.path.exists(init_path):
+        open(init_path, "w").close()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(source)
+    os.replace(tmp_path, path)
+    print(f"wrote {path} ({new_hash[:12]})")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generates the prebuilt FormDefinitions module of a portal"
+    )
+    parser.add_argument("--hub-id", required=True)
+    parser.add_argument(
+        "--object-type",
+        nargs="+",
+        default=list(FORM_NAMES_BY_OBJECT_TYPE),
+        choices=list(FORM_NAMES_BY_OBJECT_TYPE),
+    )
+    parser.add_argument(
+        "--fixture-dir",
+        help="Offline mode: directory with a <object_type>.json properties API response per object type",
+    )
+    parser.add_argument(
+        "--access-token", default=os.environ.get("HUBSPOT_ACCESS_TOKEN")
+    )
+    parser.add_argument(
+        "--schema-cache-dir",
+        help="Reuse (and fill) the PropertySchemaCache disk layer when fetching online",
+    )
+    parser.add_argument(
+        "--out-dir", default=DEFAULT_PREBUILT_FORMS_PACKAGE.replace(".", os.sep)
+    )
+    args = parser.parse_args()
+
+    if args.fixture_dir is None and args.access_token is None:
+        parser.error(
+            "either --fixture-dir or --access-token (HUBSPOT_ACCESS_TOKEN) is needed"
+        )
+
+    schema_cache = PropertySchemaCache(cache_dir=args.schema_cache_dir)
+    api_client = HubSpot(access_token=args.access_token)
+    forms = {}
+    for object_type in args.object_type:
+        if args.fixture_dir is not None:
+            with open(os.path.join(args.fixture_dir, f"{object_type}.json"), "rb") as f:
+                props = properties_from_response_body(f.read())
+        else:
+            props = schema_cache.get(api_client, args.hub_id, object_type)
+        forms[object_type] = _gen_form_from_properties_api_response(
+            FORM_NAMES_BY_OBJECT_TYPE[object_type], props.results
+        )
+
+    generate_prebuilt_forms(args.hub_id, forms, args.out_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,36 @@
 # To get an idea, this is something https://hints.so/ and similar sites do.
 
+from __future__ import annotations
+
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from http import HTTPStatus
-from typing import Any, Dict, List, Optional
-
-from hubspot.crm.properties import ModelProperty
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-from app.form_library import get_form
-from app.hubspot_client import HubspotClient
 from app.hubspot_models import (
-    ALLOWED_FIELDS,
     AssociationType,
-    FieldDefinition,
     FieldNames,
+    HubspotDataEntry,
     HubspotObject,
     ObjectType,
 )
-from common.config import POSTGRES_LOGIN_URL_FROM_ENV
 from common.form import FormData, FormDefinition, FormName
-from gpt_form_filler.openai_client import OpenAiClient
+from examples.utils.multi_form_extraction import fill_in_forms
+from examples.utils.prebuilt_forms import get_form
+from examples.utils.stage_graph import Stage, run_stage_graph
+from examples.utils.tracing import span, trace_hubspot_client, traced
+
+# Keep module load cheap: a worker importing this only to render an email, or returning state="short" early,
+# shouldn't pay for the HubSpot SDK, the OpenAI client and the database models. Those are imported where used
+# (and the __main__ fixture below), type-only imports are for the annotations.
+if TYPE_CHECKING:
+    from gpt_form_filler.openai_client import OpenAiClient
+    from hubspot import HubSpot
 
-from common.gpt_client import open_ai_client_with_db_cache
-from database.account import Account
-from supawee.client import connect_to_postgres
-from database.constants import DESTINATION_HUBSPOT_ID, OAUTH_DATA_TOKEN_TYPE_OAUTH
-from database.email_log import EmailLog
-from database.models import BaseDataEntry, BaseOrganization
-from database.oauth_data import OauthData
-from database.organization import Organization
-from database.pipeline import Pipeline
+    from app.hubspot_client import HubspotClient
+    from examples.utils.extraction_cache import ExtractionCache
+    from examples.utils.sync_journal import SyncJournal
 
 
 # Feels like "app.result"
@@ -42,6 +43,17 @@ def _count_set_fields(form_data: FormData) -> int:
     return sum(1 for value in form_data.to_dict() if value is not None)
 
 
+def _to_dict_or_none(form_data: Optional[FormData]) -> Optional[Dict[str, Any]]:
+    return None if form_data is None else form_data.to_dict()
+
+
+def _set_fields_only(props: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    # An upsert updates the existing contact, a field the transcript didn't mention mustn't blank out its value.
+    if props is None:
+        return None
+    return {name: value for name, value in props.items() if value not in (None, "")}
+
+
 # TODO(P1, devx): REFACTOR: We should wrap this into a HubspotObject for extra validation,
 #  * essentially take that code from extract_form_data and put it there.
 def _maybe_add_hubspot_owner_id(form_data: FormData, hubspot_owner_id):
@@ -59,7 +71,28 @@ def _maybe_add_hubspot_owner_id(form_data: FormData, hubspot_owner_id):
             pass
 
 
+def _gpt_fill_in_form(
+    gpt_client: OpenAiClient,
+    extraction_cache: Optional[ExtractionCache],
+    form: FormDefinition,
+    text: str,
+    use_current_time: bool,
+):
+    with span("gpt.fill_in_form", form=form.name, text_bytes=len(text)) as s:
+        if extraction_cache is not None:
+            form_data, err = extraction_cache.fill_in_form(
+                gpt_client, form=form, text=text, use_current_time=use_current_time
+            )
+        else:
+            form_data, err = gpt_client.fill_in_form(
+                form=form, text=text, use_current_time=use_current_time
+            )
+        s.set_attribute("error", err)
+        return form_data, err
+
+
 # TODO: hubspot_owner_id might need to be int
+@traced(result_attributes=lambda entry: {"state": entry.state})
 def extract_and_sync_contact_with_follow_up(
     client: HubspotClient,
     gpt_client: OpenAiClient,
@@ -68,7 +101,28 @@ def extract_and_sync_contact_with_follow_up(
     hub_id: Optional[str] = None,
     hubspot_owner_id: Optional[int] = None,
     local_hack=False,
+    api_client: Optional[HubSpot] = None,
+    extraction_cache: Optional[ExtractionCache] = None,
+    combined_extraction: bool = False,
+    journal: Optional[SyncJournal] = None,
+    idempotency_id: Optional[str] = None,
+    upsert_contacts: bool = False,
 ) -> HubspotDataEntry:
+    """
+    extraction_cache: when set, retries of the same note (e.g. after a HubSpot failure) skip GPT entirely,
+    combined_extraction: one GPT call for all three forms instead of one each (falls back per form when invalid),
+    journal: with the data entry's idempotency_id, objects and associations created by an earlier attempt are
+      taken from the journal instead of being created again,
+    upsert_contacts: upserts the contact by email (needs api_client), so an existing contact gets its id back
+      and the associations instead of a 409. NOTE: the fields GPT filled in overwrite the existing contact's
+      values, the ones it left empty keep them.
+    """
+    if journal is not None and idempotency_id is None:
+        raise ValueError("journal needs the idempotency_id of the data entry")
+    if upsert_contacts and api_client is None:
+        raise ValueError("upsert_contacts needs the api_client")
+    client = trace_hubspot_client(client)
+
     # When too little text, then don't even try.
     if len(str(text)) < 50:
         print(f"WARNING: transcript too short to infer data: {text}")
@@ -77,15 +131,152 @@ def extract_and_sync_contact_with_follow_up(
             state="short",
         )
 
-    # CONTACT CREATION
-    contact_form = get_form(FormName.HUBSPOT_CONTACT)
+    contact_form = get_form(FormName.HUBSPOT_CONTACT, hub_id)
+    call_form = get_form(FormName.HUBSPOT_MEETING, hub_id)
+    hs_task_form = get_form(FormName.HUBSPOT_TASK, hub_id)
+
+    # The three GPT extractions are independent, and each create only needs its own GPT output - so we run them
+    # as a dependency graph where only the associations wait for the object ids:
+    #   contact_gpt ---> contact_sync ---+--> contact_to_call
+    #   call_gpt ------> call_sync ------+
+    #   task_gpt ------> task_sync ------+--> contact_to_task
+    # The creates additionally wait on contact_gpt to keep the "incomplete" semantics (nothing gets synced).
+    # NOTE: db_task is only touched from this thread after the graph finishes, the db connection isn't thread-safe.
+
     # TODO(P1, gpt-form-filler migration): We lost task_id=db_task.id which was nice for tracking
-    contact_form_data, contact_err = gpt_client.fill_in_form(form=contact_form, text=text)
-    _maybe_add_hubspot_owner_id(contact_form_data, hubspot_owner_id)
-    db_task.add_generated_output(KEY_HUBSPOT_CONTACT, contact_form_data)
+    def _fill_in_form(form: FormDefinition, use_current_time: bool = False):
+        # use_current_time so hs_timestamp gets filled
+        form_data, err = _gpt_fill_in_form(
+            gpt_client, extraction_cache, form, text, use_current_time
+        )
+        _maybe_add_hubspot_owner_id(form_data, hubspot_owner_id)
+        return form_data
+
+    def _is_contact_complete(contact_gpt: FormData) -> bool:
+        # When it would yield too little information, rather skip and make them re-enter.
+        return _count_set_fields(contact_gpt) > 1
+
+    def _create_once(step: str, create):
+        if journal is None:
+            return create()
+        return journal.create_once(idempotency_id, step, create)
+
+    def _contact_sync(contact_gpt: FormData):
+        if not _is_contact_complete(contact_gpt):
+            return None
+        # TODO(P1, ux): Figure out if you can create contacts without a communication channel
+        if local_hack:
+            # Just mock new contact for every run
+            if bool(contact_gpt):
+                contact_gpt.set_field_value(
+                    FieldNames.EMAIL.value, f"example{int(time.time())}@gmail.com"
+                )
+                contact_gpt.set_field_value(
+                    FieldNames.PHONE.value, f"+1650210{int(time.time()) % 10000}"
+                )
+        if upsert_contacts:
+            from examples.utils.hubspot_api import crm_batch_upsert
+
+            return _create_once(
+                "contact_sync",
+                lambda: crm_batch_upsert(
+                    api_client, "contacts", [_set_fields_only(contact_gpt.to_dict())]
+                )[0],
+            )
+        return _create_once(
+            "contact_sync", lambda: client.crm_contact_create(contact_gpt.to_dict())
+        )
+
+    def _call_sync(contact_gpt: FormData, call_gpt: FormData):
+        if not _is_contact_complete(contact_gpt):
+            return None
+        return _create_once(
+            "call_sync", lambda: client.crm_call_create(call_gpt.to_dict())
+        )
+
+    # TODO(P1, ux): Sometimes, there might be no task.
+    def _task_sync(contact_gpt: FormData, task_gpt: FormData):
+        if not _is_contact_complete(contact_gpt):
+            return None
+        return _create_once(
+            "task_sync", lambda: client.crm_task_create(task_gpt.to_dict())
+        )
+
+    def _associate(
+        step: str, from_response, to_type: str, to_response, association_type
+    ):
+        if from_response is None or to_response is None:
+            return None
+        contact_id = from_response.hs_object_id
+        to_id = to_response.hs_object_id
+        if not bool(contact_id) or not bool(to_id):
+            return None
+        association = ("contact", contact_id, to_type, to_id, association_type)
+        if journal is None:
+            return client.crm_association_create(*association)
+        return journal.associate_once(
+            idempotency_id, step, lambda: client.crm_association_create(*association)
+        )
+
+    def _fill_in_forms_combined():
+        results = fill_in_forms(
+            gpt_client,
+            [(contact_form, False), (call_form, True), (hs_task_form, True)],
+            text,
+            extraction_cache=extraction_cache,
+        )
+        for form_data, _ in results:
+            _maybe_add_hubspot_owner_id(form_data, hubspot_owner_id)
+        return [form_data for form_data, _ in results]
+
+    if combined_extraction:
+        gpt_stages = [
+            Stage("gpt", _fill_in_forms_combined),
+            Stage("contact_gpt", lambda gpt: gpt[0], deps=["gpt"]),
+            Stage("call_gpt", lambda gpt: gpt[1], deps=["gpt"]),
+            Stage("task_gpt", lambda gpt: gpt[2], deps=["gpt"]),
+        ]
+    else:
+        gpt_stages = [
+            Stage("contact_gpt", lambda: _fill_in_form(contact_form)),
+            Stage("call_gpt", lambda: _fill_in_form(call_form, use_current_time=True)),
+            Stage(
+                "task_gpt", lambda: _fill_in_form(hs_task_form, use_current_time=True)
+            ),
+        ]
+    stages = gpt_stages + [
+        Stage("contact_sync", _contact_sync, deps=["contact_gpt"]),
+        Stage("call_sync", _call_sync, deps=["contact_gpt", "call_gpt"]),
+        Stage("task_sync", _task_sync, deps=["contact_gpt", "task_gpt"]),
+        # Two requests either way: the v4 batch association endpoint is per (from_type, to_type) pair.
+        Stage(
+            "contact_to_call",
+            lambda contact_sync, call_sync: _associate(
+                "contact_to_call",
+                contact_sync,
+                "call",
+                call_sync,
+                AssociationType.CONTACT_TO_CALL,
+            ),
+            deps=["contact_sync", "call_sync"],
+        ),
+        Stage(
+            "contact_to_task",
+            lambda contact_sync, task_sync: _associate(
+                "contact_to_task",
+                contact_sync,
+                "task",
+                task_sync,
+                AssociationType.CONTACT_TO_TASK,
+            ),
+            deps=["contact_sync", "task_sync"],
+        ),
+    ]
+    results = run_stage_graph(stages)
 
-    # When it would yield too little information, rather skip and make them re-enter.
-    if _count_set_fields(contact_form_data) <= 1:
+    contact_form_data = results["contact_gpt"]
+    db_task.add_generated_output(KEY_HUBSPOT_CONTACT, contact_form_data)
+    if not _is_contact_complete(contact_form_data):
         print(
             f"fWARNING: incomplete data entry as too little fields filled for {contact_form_data} from text: {text}"
         )
@@ -94,82 +285,106 @@ def extract_and_sync_contact_with_follow_up(
             state="incomplete",
         )
 
-    # TODO(P1, ux): Figure out if you can create contacts without a communication channel
-    if local_hack:
-        # Just mock new contact for every run
-        if bool(contact_form_data):
-            contact_form_data.set_field_value(
-                FieldNames.EMAIL.value, f"example{int(time.time())}@gmail.com"
-            )
-            contact_form_data.set_field_value(
-                FieldNames.PHONE.value, f"+1650210{int(time.time()) % 10000}"
-            )
-
-    contact_response = client.crm_contact_create(contact_form_data.to_dict())
+    contact_response = results["contact_sync"]
     db_task.add_sync_response(
         KEY_HUBSPOT_CONTACT,
         contact_response.status,
         contact_response.get_task_response(),
     )
-    contact_id = contact_response.hs_object_id
-
-    # CALL CREATION
-    call_form = get_form(FormName.HUBSPOT_MEETING)
-    # use_current_time so hs_timestamp gets filled
-    # TODO(P2, gpt-form-filler migration): We lost task_id=db_task.id which was nice for tracking
-    call_form_data, call_err = gpt_client.fill_in_form(form=call_form, text=text, use_current_time=True)
-    _maybe_add_hubspot_owner_id(call_form_data, hubspot_owner_id)
-    db_task.add_generated_output(KEY_HUBSPOT_CALL, call_form_data)
 
-    call_response = client.crm_call_create(call_form_data.to_dict())
+    call_form_data = results["call_gpt"]
+    db_task.add_generated_output(KEY_HUBSPOT_CALL, call_form_data)
+    call_response = results["call_sync"]
     db_task.add_sync_response(
         KEY_HUBSPOT_CALL, call_response.status, call_response.get_task_response()
     )
-    call_id = call_response.hs_object_id
 
-    # TASK CREATION
-    # TODO(P1, ux): Sometimes, there might be no task.
-    hs_task_form = get_form(FormName.HUBSPOT_TASK)
-    # use_current_time so hs_timestamp gets filled
-    # TODO(P2, gpt-form-filler migration): We lost task_id=db_task.id which was nice for tracking
-    hs_task_data, hs_task_err = gpt_client.fill_in_form(form=hs_task_form, text=text, use_current_time=True)
-    _maybe_add_hubspot_owner_id(hs_task_data, hubspot_owner_id)
+    hs_task_data = results["task_gpt"]
     db_task.add_generated_output(KEY_HUBSPOT_TASK, hs_task_data)
-
-    hs_task_response = client.crm_task_create(hs_task_data.to_dict())
+    hs_task_response = results["task_sync"]
     db_task.add_sync_response(
         KEY_HUBSPOT_TASK, hs_task_response.status, hs_task_response.get_task_response()
     )
-    hs_task_id = hs_task_response.hs_object_id
 
-    # ASSOCIATION CREATION
-    contact_to_call_result = None
-    if bool(contact_id) and bool(call_id):
-        contact_to_call_result = client.crm_association_create(
-            "contact", contact_id, "call", call_id, AssociationType.CONTACT_TO_CALL
-        )
-    contact_to_task_result = None
-    if bool(contact_id) and bool(hs_task_id):
-        contact_to_task_result = client.crm_association_create(
-            "contact", contact_id, "task", hs_task_id, AssociationType.CONTACT_TO_TASK
-        )
+    contact_to_call_result = results["contact_to_call"]
+    contact_to_task_result = results["contact_to_task"]
 
-    if (
-        contact_response.is_success()
-        and call_response.is_success()
-        and hs_task_response.is_success()
-    ):
-        state = "success"
-    else:
-        if contact_form_data is None or call_form_data is None or hs_task_data is None:
-            state = "error_gpt"
-        elif contact_response.status == HTTPStatus.CONFLICT:
-            state = "warning_already_created"
-        else:
-            state = "error_hubspot_sync"
+    state = _sync_state(
+        contact_form_data,
+        call_form_data,
+        hs_task_data,
+        contact_response,
+        call_response,
+        hs_task_response,
+    )
 
     db_task.finish()
 
+    return _to_hubspot_data_entry(
+        text=text,
+        state=state,
+        hub_id=hub_id,
+        contact_form_data=contact_form_data,
+        call_form_data=call_form_data,
+        hs_task_data=hs_task_data,
+        contact_response=contact_response,
+        call_response=call_response,
+        hs_task_response=hs_task_response,
+        contact_to_call_result=contact_to_call_result,
+        contact_to_task_result=contact_to_task_result,
+    )
+
+
+def _is_success(response) -> bool:
+    return response is not None and response.is_success()
+
+
+def _props_if_ok(response) -> Optional[Dict[str, Any]]:
+    return None if response is None else response.get_props_if_ok()
+
+
+# The responses are either the HubspotClient single-object responses or BatchItemResult, which behave the same.
+# A response is None when its form had no GPT output to sync (bulk_extract_and_sync only).
+def _sync_state(
+    contact_form_data: Optional[FormData],
+    call_form_data: Optional[FormData],
+    hs_task_data: Optional[FormData],
+    contact_response,
+    call_response,
+    hs_task_response,
+) -> str:
+    if (
+        _is_success(contact_response)
+        and _is_success(call_response)
+        and _is_success(hs_task_response)
+    ):
+        # Upserted onto an existing contact - synced fine, but worth telling.
+        if getattr(contact_response, "created", None) is False:
+            return "warning_already_created"
+        return "success"
+    if contact_form_data is None or call_form_data is None or hs_task_data is None:
+        return "error_gpt"
+    if contact_response.status == HTTPStatus.CONFLICT:
+        return "warning_already_created"
+    return "error_hubspot_sync"
+
+
+def _to_hubspot_data_entry(
+    text: str,
+    state: str,
+    hub_id: Optional[str],
+    contact_form_data: FormData,
+    call_form_data: FormData,
+    hs_task_data: FormData,
+    contact_response,
+    call_response,
+    hs_task_response,
+    contact_to_call_result: Optional[Dict[str, Any]],
+    contact_to_task_result: Optional[Dict[str, Any]],
+) -> HubspotDataEntry:
+    contact_form = get_form(FormName.HUBSPOT_CONTACT, hub_id)
+    call_form = get_form(FormName.HUBSPOT_MEETING, hub_id)
+    hs_task_form = get_form(FormName.HUBSPOT_TASK, hub_id)
     # There are a few columns sets for the same object_type:
     # * the GPT extracted ones (call_data)
     # * the Hubspot returned (there can be a lot of metadata, even repeated values)
@@ -180,29 +395,232 @@ def extract_and_sync_contact_with_follow_up(
         transcript=text,
         state=state,
         contact=HubspotObject.from_api_response_props(
-            hub_id, ObjectType.CONTACT, contact_form, contact_response.get_props_if_ok()
+            hub_id, ObjectType.CONTACT, contact_form, _props_if_ok(contact_response)
         ),
         call=HubspotObject.from_api_response_props(
-            hub_id, ObjectType.CALL, call_form, call_response.get_props_if_ok()
+            hub_id, ObjectType.CALL, call_form, _props_if_ok(call_response)
         ),
         task=HubspotObject.from_api_response_props(
-            hub_id, ObjectType.TASK, hs_task_form, hs_task_response.get_props_if_ok()
+            hub_id, ObjectType.TASK, hs_task_form, _props_if_ok(hs_task_response)
         ),
         contact_to_call_result=contact_to_call_result,
         contact_to_task_result=contact_to_task_result,
         # TODO(P2, devx): This feels more like a new FormObject
         gpt_contact=HubspotObject.from_api_response_props(
-            hub_id, ObjectType.CONTACT, contact_form, contact_form_data.to_dict()
+            hub_id,
+            ObjectType.CONTACT,
+            contact_form,
+            _to_dict_or_none(contact_form_data),
         ),
         gpt_call=HubspotObject.from_api_response_props(
-            hub_id, ObjectType.CALL, call_form, call_form_data.to_dict()
+            hub_id, ObjectType.CALL, call_form, _to_dict_or_none(call_form_data)
         ),
         gpt_task=HubspotObject.from_api_response_props(
-            hub_id, ObjectType.TASK, hs_task_form, hs_task_data.to_dict()
+            hub_id, ObjectType.TASK, hs_task_form, _to_dict_or_none(hs_task_data)
         ),
     )
 
 
+# For backfills: same as calling extract_and_sync_contact_with_follow_up in a loop, but the HubSpot writes go through
+# the CRM batch endpoints (100 objects per request) so we make ~100x less requests and stay under the rate limit.
+@traced(result_attributes=lambda entries: {"entries": len(entries)})
+def bulk_extract_and_sync(
+    api_client: HubSpot,
+    gpt_client: OpenAiClient,
+    transcripts: List[str],
+    db_tasks: Optional[List[Task]] = None,
+    hub_id: Optional[str] = None,
+    hubspot_owner_id: Optional[int] = None,
+    max_gpt_concurrency: int = 8,
+    extraction_cache: Optional[ExtractionCache] = None,
+    combined_extraction: bool = False,
+    upsert_contacts: bool = False,
+) -> List[HubspotDataEntry]:
+    from examples.utils.hubspot_api import (
+        crm_associations_batch_create,
+        crm_batch_create,
+        crm_batch_upsert,
+    )
+
+    if db_tasks is not None and len(db_tasks) != len(transcripts):
+        raise ValueError(
+            f"got {len(db_tasks)} db_tasks for {len(transcripts)} transcripts"
+        )
+    entries: List[Optional[HubspotDataEntry]] = [None] * len(transcripts)
+
+    # GPT EXTRACTION, bounded as OpenAI has its own rate limits
+    forms = [
+        (KEY_HUBSPOT_CONTACT, get_form(FormName.HUBSPOT_CONTACT, hub_id), False),
+        # use_current_time so hs_timestamp gets filled
+        (KEY_HUBSPOT_CALL, get_form(FormName.HUBSPOT_MEETING, hub_id), True),
+        (KEY_HUBSPOT_TASK, get_form(FormName.HUBSPOT_TASK, hub_id), True),
+    ]
+
+    def _fill_in_form(text: str, form: FormDefinition, use_current_time: bool):
+        form_data, err = _gpt_fill_in_form(
+            gpt_client, extraction_cache, form, text, use_current_time
+        )
+        if form_data is None:
+            print(f"WARNING: cannot fill in {form.name} cause {err}")
+        _maybe_add_hubspot_owner_id(form_data, hubspot_owner_id)
+        return form_data
+
+    to_extract = []
+    for i, text in enumerate(transcripts):
+        if len(str(text)) < 50:
+            print(f"WARNING: transcript too short to infer data: {text}")
+            entries[i] = HubspotDataEntry(transcript=text, state="short")
+        else:
+            to_extract.append(i)
+
+    def _fill_in_forms_combined(text: str):
+        results = fill_in_forms(
+            gpt_client,
+            [(form, use_current_time) for _, form, use_current_time in forms],
+            text,
+            extraction_cache=extraction_cache,
+        )
+        for form_data, _ in results:
+            _maybe_add_hubspot_owner_id(form_data, hubspot_owner_id)
+        return [form_data for form_data, _ in results]
+
+    def _result_or_none(future, i: int):
+        # One bad transcript (or a GPT outage for it) must not abort the whole backfill, it becomes "error_gpt".
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"WARNING: GPT extraction failed for transcript {i} cause {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_gpt_concurrency) as executor:
+        if combined_extraction:
+            combined_futures = {
+                i: executor.submit(_fill_in_forms_combined, transcripts[i])
+                for i in to_extract
+            }
+            form_data = {}
+            for i, future in combined_futures.items():
+                i_form_data = _result_or_none(future, i) or [None] * len(forms)
+                for (key, _, _), key_form_data in zip(forms, i_form_data):
+                    form_data[(i, key)] = key_form_data
+        else:
+            futures = {
+                (i, key): executor.submit(
+                    _fill_in_form, transcripts[i], form, use_current_time
+                )
+                for i in to_extract
+                for key, form, use_current_time in forms
+            }
+            form_data = {
+                (i, key): _result_or_none(future, i)
+                for (i, key), future in futures.items()
+            }
+
+    to_sync = []
+    for i in to_extract:
+        for key, _, _ in forms:
+            if db_tasks is not None:
+                db_tasks[i].add_generated_output(key, form_data[(i, key)])
+        contact_form_data = form_data[(i, KEY_HUBSPOT_CONTACT)]
+        if contact_form_data is None:
+            entries[i] = HubspotDataEntry(transcript=transcripts[i], state="error_gpt")
+        elif _count_set_fields(contact_form_data) <= 1:
+            print(
+                f"fWARNING: incomplete data entry as too little fields filled for {contact_form_data}"
+            )
+            entries[i] = HubspotDataEntry(transcript=transcripts[i], state="incomplete")
+        else:
+            to_sync.append(i)
+
+    # HUBSPOT SYNC: the three object types are independent, only the associations need the ids.
+    # A call or task GPT couldn't fill is a None input, it gets no object (and a None result) but the rest syncs.
+    def _batch_create(object_type: str, key: str):
+        inputs = [_to_dict_or_none(form_data[(i, key)]) for i in to_sync]
+        if upsert_contacts and object_type == "contacts":
+            # Existing contacts come back with their id, so they get associated too.
+            return crm_batch_upsert(
+                api_client, object_type, [_set_fields_only(props) for props in inputs]
+            )
+        return crm_batch_create(api_client, object_type, inputs)
+
+    def _batch_associate(contacts, calls, tasks):
+        # Both association kinds go out together, one request per HUBSPOT_BATCH_LIMIT links.
+        entries, positions = [], []
+        for pos, contact in enumerate(contacts):
+            for key, to_type, other, association_type in [
+                ("call", "call", calls[pos], AssociationType.CONTACT_TO_CALL),
+                ("task", "task", tasks[pos], AssociationType.CONTACT_TO_TASK),
+            ]:
+                if contact is None or other is None:
+                    continue
+                if bool(contact.hs_object_id) and bool(other.hs_object_id):
+                    entries.append(
+                        (
+                            "contact",
+                            contact.hs_object_id,
+                            to_type,
+                            other.hs_object_id,
+                            association_type,
+                        )
+                    )
+                    positions.append((pos, key))
+        created = crm_associations_batch_create(api_client, entries) if entries else []
+        return dict(zip(positions, created))
+
+    results = run_stage_graph(
+        [
+            Stage("contacts", lambda: _batch_create("contacts", KEY_HUBSPOT_CONTACT)),
+            Stage("calls", lambda: _batch_create("calls", KEY_HUBSPOT_CALL)),
+            Stage("tasks", lambda: _batch_create("tasks", KEY_HUBSPOT_TASK)),
+            Stage(
+                "associations", _batch_associate, deps=["contacts", "calls", "tasks"]
+            ),
+        ]
+    )
+
+    for pos, i in enumerate(to_sync):
+        contact_form_data = form_data[(i, KEY_HUBSPOT_CONTACT)]
+        call_form_data = form_data[(i, KEY_HUBSPOT_CALL)]
+        hs_task_data = form_data[(i, KEY_HUBSPOT_TASK)]
+        contact_response = results["contacts"][pos]
+        call_response = results["calls"][pos]
+        hs_task_response = results["tasks"][pos]
+        if db_tasks is not None:
+            for key, response in [
+                (KEY_HUBSPOT_CONTACT, contact_response),
+                (KEY_HUBSPOT_CALL, call_response),
+                (KEY_HUBSPOT_TASK, hs_task_response),
+            ]:
+                if response is not None:
+                    db_tasks[i].add_sync_response(
+                        key, response.status, response.get_task_response()
+                    )
+            db_tasks[i].finish()
+
+        entries[i] = _to_hubspot_data_entry(
+            text=transcripts[i],
+            state=_sync_state(
+                contact_form_data,
+                call_form_data,
+                hs_task_data,
+                contact_response,
+                call_response,
+                hs_task_response,
+            ),
+            hub_id=hub_id,
+            contact_form_data=contact_form_data,
+            call_form_data=call_form_data,
+            hs_task_data=hs_task_data,
+            contact_response=contact_response,
+            call_response=call_response,
+            hs_task_response=hs_task_response,
+            contact_to_call_result=results["associations"].get((pos, "call")),
+            contact_to_task_result=results["associations"].get((pos, "task")),
+        )
+
+    return entries
+
+
 test_data1 = """
 I had a chat with Lucas Meyer, who's originally from a small town in Switzerland. 
 It's funny because he went to an international boarding school in Geneva, 
@@ -237,6 +655,18 @@ Later, Lucas gave me a demo of a software tool they’ve been working on. He was
 """
 
 if __name__ == "__main__":
+    from app import hubspot_client
+    from common.config import POSTGRES_LOGIN_URL_FROM_ENV
+    from common.gpt_client import open_ai_client_with_db_cache
+    from database.account import Account
+    from database.constants import DESTINATION_HUBSPOT_ID, OAUTH_DATA_TOKEN_TYPE_OAUTH
+    from database.email_log import EmailLog
+    from database.models import BaseDataEntry, BaseOrganization
+    from database.oauth_data import OauthData
+    from database.organization import Organization
+    from database.pipeline import Pipeline
+    from supawee.client import connect_to_postgres
+
     with connect_to_postgres(POSTGRES_LOGIN_URL_FROM_ENV):
         TEST_ORG_NAME = "testing locally"
         test_acc = Account.get_or_onboard_for_email(
@@ -271,7 +701,7 @@ if __name__ == "__main__":
             refresh_token="9ce60291-2261-48a5-8ddb-e26c9bf59845",  # TestApp - hardcoded each time
         )
 
-        test_hs_client = HubspotClient(test_pipeline.oauth_data_id)
+        test_hs_client = hubspot_client.HubspotClient(test_pipeline.oauth_data_id)
         # We put this into a `try` block as it's optional to go through
         owners_response = None
         try:
@@ -287,7 +717,6 @@ if __name__ == "__main__":
                 f"WARNING: Cannot get or onboard owners cause {e}, response: {owners_response}"
             )
 
-
         test_gpt_client = open_ai_client_with_db_cache()
         test_data_entry_id = BaseDataEntry.insert(
             account_id=test_acc.id,
@@ -1,12 +1,5 @@
-
-
-
-def _hubspot_obj_to_table(
-    heading: str,
-    obj: Optional[HubspotObject],
-    extra_content: str = "",
-) -> str:
-    rows = []
+def _iter_hubspot_obj_table_rows(obj: HubspotObject) -> Iterator[str]:
+    separator = ""
     for field in obj.form.fields:
         if field.ignore_in_display or field.ignore_in_email:
             print(
@@ -15,72 +8,56 @@ def _hubspot_obj_to_table(
             )
             continue
         key, value = obj.get_field_display_label_with_value(field.name)
-        rows.append(_format_summary_table_row(key, value))
-    rows_html = "\n".join(rows)
-    return table_template(
-        heading=heading, rows_html=rows_html, extra_content_html=extra_content
+        yield separator
+        yield _format_summary_table_row(key, value)
+        separator = "\n"
+
+
+def _iter_hubspot_obj_to_table(
+    heading: str,
+    obj: Optional[HubspotObject],
+    extra_content: str = "",
+) -> Iterator[str]:
+    return iter_table_template(
+        heading=heading,
+        rows_html=_iter_hubspot_obj_table_rows(obj),
+        extra_content_html=extra_content,
     )
 
 
-def _hubspot_objs_maybe_to_table(
+def _iter_hubspot_objs_maybe_to_table(
     heading: str,
     obj: Optional[HubspotObject],
     gpt_obj: Optional[HubspotObject],
     extra_content: str = "",
-) -> str:
-    if obj is None:
-        result = main_content_template(
-            heading=heading, content="Could not sync data to HubSpot (API error)"
+) -> Iterator[str]:
+    if obj is not None:
+        yield from _iter_hubspot_obj_to_table(heading, obj, extra_content)
+    elif gpt_obj is None:
+        yield cached_main_content_template(
+            "Could not parse data into structure (GPT error)", heading=heading
         )
-        if gpt_obj is None:
-            result = main_content_template(
-                heading=heading,
-                content="Could not parse data into structure (GPT error)",
-            )
-        else:
-            result += _hubspot_obj_to_table(heading, gpt_obj, extra_content)
     else:
-        result = _hubspot_obj_to_table(heading, obj, extra_content)
-    return result
+        yield cached_main_content_template(
+            "Could not sync data to HubSpot (API error)", heading=heading
+        )
+        yield from _iter_hubspot_obj_to_table(heading, gpt_obj, extra_content)
 
 
-def send_hubspot_result(
-    account_id: UUID, idempotency_id_prefix: str, data: HubspotDataEntry
-) -> bool:
-    person_name = data.contact_name()
-    idempotency_id_suffix = data.state
+extra_info_map = {
+    "error_gpt": "I had problems transforming your note into a HubSpot structures",
+    "error_hubspot_sync": "I encountered problems while syncing your data into your HubSpot",
+    "warning_already_created": "Note: The contact already exists in your HubSpot",
+}
 
-    email_params = EmailLog.get_email_reply_params_for_account_id(
-        account_id=account_id,
-        idempotency_id=f"{idempotency_id_prefix}-result-{idempotency_id_suffix}",
-        subject=f"HubSpot Data Entry for {person_name} - {data.state.capitalize()}",
-    )
-    pre_header = email_params.subject
+# The whitespace around the sections, kept so the email is byte-identical to the previously formatted one.
+_SECTION_SEPARATOR = "\n            "
 
-    if data.state in ["short", "incomplete"]:
-        email_params.body_html = simple_email_body_html(
-            title=f"Note is {data.state} - please enter more information.",
-            sub_title="This is how I understood it",
-            content_text=data.transcript,
-        )
-        return send_email(params=email_params)
-
-    extra_info_map = {
-        "error_gpt": "I had problems transforming your note into a HubSpot structures",
-        "error_hubspot_sync": "I encountered problems while syncing your data into your HubSpot",
-        "warning_already_created": "Note: The contact already exists in your HubSpot",
-    }
-    extra_info = ""
-    if data.state in extra_info_map:
-        extra_info_content = extra_info_map[data.state]
-        extra_info = main_content_template(
-            heading="Sync Status",
-            content=extra_info_content,
-        )
-        pre_header = extra_info_content
 
+def _iter_hubspot_result_content(data: HubspotDataEntry) -> Iterator[str]:
     # success / error with partial results
-    contact_table = _hubspot_objs_maybe_to_table(
+    yield _SECTION_SEPARATOR
+    yield from _iter_hubspot_objs_maybe_to_table(
         "Contact Info", data.contact, data.gpt_contact
     )
 
@@ -88,45 +65,89 @@ def send_hubspot_result(
     todos_extra_content = ""
     if bool(data.task):
         todos_field_name = FieldNames.HS_TASK_BODY.value
-        if todos_field_name in data.task.data:
+        if data.task.has_value(todos_field_name):
             todos_extra_content = """
             <p><b>{heading}</b></p>
             <p>{content}</p>""".format(
                 heading="To Dos", content=data.task.get_display_value(todos_field_name)
             )
 
-    task_table = _hubspot_objs_maybe_to_table(
+    yield _SECTION_SEPARATOR
+    yield from _iter_hubspot_objs_maybe_to_table(
         "Follow up Tasks",
         data.task,
         data.gpt_task,
         todos_extra_content,
     )
 
+    yield _SECTION_SEPARATOR
     if bool(data.call):
         call_body_value = data.call.get_display_value(FieldNames.HS_CALL_BODY.value)
-        further_details = main_content_template(
+        yield from iter_main_content_template(
             heading="Further Details",
-            content=f"""<p style = "line-height: 1.5;" >{call_body_value}</p>""",
+            content=[
+                """<p style = "line-height: 1.5;" >""",
+                call_body_value,
+                "</p>",
+            ],
         )
     else:
-        further_details = main_content_template(
+        yield cached_main_content_template(
+            "<p>Could not sync data to HubSpot (API error)</p>",
             heading="Further Details",
-            content="<p>Could not sync data to HubSpot (API error)</p>",
         )
 
-    email_params.body_html = full_template(
+    yield _SECTION_SEPARATOR
+    if data.state in extra_info_map:
+        # Static per state, rendered once and then served from the cache.
+        yield cached_main_content_template(
+            extra_info_map[data.state], heading="Sync Status"
+        )
+    yield _SECTION_SEPARATOR
+
+
+def iter_hubspot_result_html(data: HubspotDataEntry, pre_header: str) -> Iterator[str]:
+    """Yields the result email body chunk by chunk, nothing is concatenated until the very end (if at all)."""
+    if data.state in ["short", "incomplete"]:
+        return iter_simple_email_body_html(
+            title=f"Note is {data.state} - please enter more information.",
+            sub_title="This is how I understood it",
+            content_text=data.transcript,
+        )
+
+    if data.state in extra_info_map:
+        pre_header = extra_info_map[data.state]
+    return iter_full_template(
         title="HubSpot Data Entry Confirmation",
         pre_header=pre_header,
-        content="""
-            {contact_table}
-            {task_table}
-            {further_details}
-            {extra_info}
-            """.format(
-            contact_table=contact_table,
-            task_table=task_table,
-            further_details=further_details,
-            extra_info=extra_info,
-        ),
+        content=_iter_hubspot_result_content(data),
     )
-    return send_email(params=email_params)
\ No newline at end of file
+
+
+def send_hubspot_result(
+    account_id: UUID,
+    idempotency_id_prefix: str,
+    data: HubspotDataEntry,
+    writer: Optional[TextIO] = None,
+) -> bool:
+    """
+    writer: anything with .write(str) (a socket makefile, an SMTP body buffer, io.StringIO), the body is then
+      streamed into it and delivering it is up to the caller. Without it the body is joined once and sent.
+    """
+    person_name = data.contact_name()
+    idempotency_id_suffix = data.state
+
+    email_params = EmailLog.get_email_reply_params_for_account_id(
+        account_id=account_id,
+        idempotency_id=f"{idempotency_id_prefix}-result-{idempotency_id_suffix}",
+        subject=f"HubSpot Data Entry for {person_name} - {data.state.capitalize()}",
+    )
+    chunks = iter_hubspot_result_html(data, pre_header=email_params.subject)
+
+    if writer is not None:
+        for chunk in chunks:
+            writer.write(chunk)
+        return True
+
+    email_params.body_html = "".join(chunks)
+    return send_email(params=email_params)
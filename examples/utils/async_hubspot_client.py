@@ -0,0 +1,256 @@
+# asyncio counterpart of HubspotClient, on aiohttp.
+# The blocking client ties up a worker thread per in-flight tenant request; with this one a single event loop
+# drives as many tenant syncs as the connection limit allows. Same method names, same response wrappers
+# (status, hs_object_id, is_success(), get_props_if_ok(), get_task_response()), just awaited.
+#
+# Usage:
+#   async with AsyncHubspotClient(lambda: token_cache.get(oauth_data_id)) as client:
+#       contact, call = await asyncio.gather(
+#           client.crm_contact_create(contact_props), client.crm_call_create(call_props)
+#       )
+#       await client.crm_association_create(
+#           "contact", contact.hs_object_id, "call", call.hs_object_id, AssociationType.CONTACT_TO_CALL
+#       )
+import asyncio
+import json
+import random
+import re
+import time
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import aiohttp
+
+from examples.utils.batch_item_result import BatchItemResult
+
+HUBSPOT_API_BASE_URL = "https://api.hubapi.com"
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_REQUEST_TIMEOUT_SECONDS = 30.0
+
+
+class AsyncHubspotApiError(Exception):
+    """Like the SDK's ApiException: status and body of the failed response.
+
+    status is None when there was no response at all (connection error or timeout, after the retries).
+    """
+
+    def __init__(self, status: Optional[int], body: bytes, reason: str = ""):
+        super().__init__(f"HubSpot API error {status}: {reason or repr(body[:500])}")
+        self.status = status
+        self.body = body
+
+
+def _backoff_seconds(attempt: int) -> float:
+    return 0.5 * 2**attempt + random.random() * 0.1
+
+
+def _retry_after_seconds(retry_after: Optional[str], attempt: int) -> float:
+    """Retry-After is either delay-seconds or an HTTP-date, anything else falls back to the backoff."""
+    if retry_after is not None:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            return max(
+                0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()
+            )
+        except (TypeError, ValueError):
+            print(f"WARNING: ignoring unparsable Retry-After {retry_after!r}")
+    return _backoff_seconds(attempt)
+
+
+class AsyncHubspotClient:
+    def __init__(
+        self,
+        access_token: Union[str, Callable[[], str]],
+        base_url: str = HUBSPOT_API_BASE_URL,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        session: Optional[aiohttp.ClientSession] = None,
+        request_timeout_seconds: float = DEFAULT_REQUEST_TIMEOUT_SECONDS,
+    ):
+        """
+        access_token: the token, or a function returning a current one (e.g. AccessTokenCache.get of the tenant),
+          which is called off the event loop as a cold cache refreshes over the network,
+        session: to share one connection pool across many tenants' clients, otherwise the client owns its own,
+        request_timeout_seconds: per attempt, a timed out attempt is retried like a 5xx.
+        """
+        self._access_token = access_token
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self._timeout = aiohttp.ClientTimeout(total=request_timeout_seconds)
+        self._session = session
+        self._owns_session = session is None
+
+    async def __aenter__(self) -> "AsyncHubspotClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections)
+            )
+        return self._session
+
+    async def _get_access_token(self) -> str:
+        if isinstance(self._access_token, str):
+            return self._access_token
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._access_token
+        )
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        json_body: Any = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[int, bytes]:
+        """(status, body bytes), 429s, 5xx, connection errors and timeouts are retried with backoff (honoring
+        Retry-After). Raises AsyncHubspotApiError when the last attempt got no response.
+        """
+        headers = {"Authorization": f"Bearer {await self._get_access_token()}"}
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._get_session().request(
+                    method,
+                    f"{self.base_url}{path}",
+                    json=json_body,
+                    params=params,
+                    headers=headers,
+                    timeout=self._timeout,
+                ) as response:
+                    body = await response.read()
+                    retryable = (
+                        response.status == HTTPStatus.TOO_MANY_REQUESTS
+                        or response.status >= 500
+                    )
+                    if not retryable or attempt == self.max_retries:
+                        return response.status, body
+                    delay = _retry_after_seconds(
+                        response.headers.get("Retry-After"), attempt
+                    )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                reason = f"{type(e).__name__}: {e}"
+                if attempt == self.max_retries:
+                    raise AsyncHubspotApiError(None, b"", reason) from e
+                print(f"WARNING: {method} {path} failed with {reason}, retrying")
+                delay = _backoff_seconds(attempt)
+            await asyncio.sleep(delay)
+
+    async def _request_ok(self, method: str, path: str, **kwargs) -> bytes:
+        status, body = await self._request(method, path, **kwargs)
+        if not 200 <= status < 300:
+            raise AsyncHubspotApiError(status, body)
+        return body
+
+    async def _crm_object_create(
+        self, object_type: str, props: Dict[str, Any]
+    ) -> BatchItemResult:
+        status, body = await self._request(
+            "POST", f"/crm/v3/objects/{object_type}", json_body={"properties": props}
+        )
+        if not 200 <= status < 300:
+            print(f"WARNING: cannot create {object_type} cause {status}: {body[:500]}")
+            return BatchItemResult(status=status, error=body.decode(errors="replace"))
+        created = _loads(body)
+        props = dict(created.get("properties") or {})
+        props.setdefault("hs_object_id", created.get("id"))
+        return BatchItemResult(status=status, props=props)
+
+    async def crm_contact_create(self, props: Dict[str, Any]) -> BatchItemResult:
+        return await self._crm_object_create("contacts", props)
+
+    async def crm_call_create(self, props: Dict[str, Any]) -> BatchItemResult:
+        return await self._crm_object_create("calls", props)
+
+    async def crm_task_create(self, props: Dict[str, Any]) -> BatchItemResult:
+        return await self._crm_object_create("tasks", props)
+
+    async def crm_association_create(
+        self,
+        from_type: str,
+        from_id: Any,
+        to_type: str,
+        to_id: Any,
+        association_type,
+    ) -> Optional[Dict[str, Any]]:
+        """The created link, None when it failed."""
+        status, body = await self._request(
+            "PUT",
+            f"/crm/v4/objects/{from_type}/{from_id}/associations/{to_type}/{to_id}",
+            json_body=[
+                {
+                    "associationCategory": "HUBSPOT_DEFINED",
+                    "associationTypeId": association_type.value,
+                }
+            ],
+        )
+        if not 200 <= status < 300:
+            print(
+                f"WARNING: cannot create {from_type} to {to_type} association cause {status}: {body[:500]}"
+            )
+            return None
+        return _loads(body)
+
+    async def list_owners(self) -> SimpleNamespace:
+        """All owners of the portal (all pages). Like the blocking one, `.results` are the owner objects with the
+        SDK's snake_case attributes (`.id`, `.email`, `.first_name`, `.user_id` ...), timestamps stay ISO strings.
+        """
+        owners = []
+        params: Dict[str, Any] = {"limit": 500}
+        while True:
+            page = _loads(
+                await self._request_ok("GET", "/crm/v3/owners/", params=params)
+            )
+            owners.extend(page.get("results") or [])
+            next_page = (page.get("paging") or {}).get("next")
+            if next_page is None:
+                return SimpleNamespace(results=[_to_model(owner) for owner in owners])
+            params = {**params, "after": next_page["after"]}
+
+    async def get_hubspot_account_metadata(self) -> SimpleNamespace:
+        """Access token metadata, i.e. `.hub_id`, `.hub_domain`, `.user` like the blocking client returns."""
+        token = await self._get_access_token()
+        body = await self._request_ok("GET", f"/oauth/v1/access-tokens/{token}")
+        return SimpleNamespace(**_loads(body))
+
+    async def list_custom_properties(self, object_type: str) -> SimpleNamespace:
+        """Same as the blocking one, `.results` being the properties with the SDK's attribute names
+        (`.name`, `.label`, `.field_type`, `.options` ...)."""
+        body = await self._request_ok("GET", f"/crm/v3/properties/{object_type}")
+        return _to_model(_loads(body))
+
+
+_CAMEL_CASE_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def _to_model(value: Any) -> Any:
+    """The JSON in the shape of the SDK models: objects with snake_case attributes (without the SDK itself)."""
+    if isinstance(value, dict):
+        return SimpleNamespace(
+            **{
+                _CAMEL_CASE_BOUNDARY.sub("_", key).lower(): _to_model(item)
+                for key, item in value.items()
+            }
+        )
+    if isinstance(value, list):
+        return [_to_model(item) for item in value]
+    return value
+
+
+def _loads(body: bytes) -> Any:
+    return json.loads(body) if body else {}
@@ -0,0 +1,28 @@
+# The response wrapper of the batch helpers and the async client, in its own module so that the async client
+# doesn't pull in the blocking HubSpot SDK (which examples.utils.hubspot_api imports).
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class BatchItemResult:
+    """Per-input outcome of a batch call, quacks like the HubspotClient single-object responses."""
+
+    status: int
+    props: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    # Upserts only: False when the object already existed and got updated.
+    created: Optional[bool] = None
+
+    @property
+    def hs_object_id(self) -> Optional[str]:
+        return None if self.props is None else self.props.get("hs_object_id")
+
+    def is_success(self) -> bool:
+        return self.props is not None and 200 <= self.status < 300
+
+    def get_props_if_ok(self) -> Optional[Dict[str, Any]]:
+        return self.props if self.is_success() else None
+
+    def get_task_response(self) -> Dict[str, Any]:
+        return {"status": self.status, "props": self.props, "error": self.error}
@@ -1,4 +1,6 @@
-from typing import Optional
+from functools import lru_cache
+from string import Formatter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 # title, content
 _full_template = """
@@ -71,11 +73,78 @@ style="background-image: url('https://www.example.com/background.jpg');
 """
 
 
-def full_template(title: str, content: str, pre_header: Optional[str]):
+# Compiled once at import: the template split into literal fragments and {slot} placeholders, so rendering is
+# a single join instead of str.format re-scanning kilobytes of HTML for every email.
+class _CompiledTemplate:
+    def __init__(self, template: str):
+        self._parts: List[str] = []
+        slots: List[Tuple[int, str]] = []
+        for literal, field_name, _, _ in Formatter().parse(template):
+            # Formatter.parse already turned {{ and }} into literal braces.
+            if literal:
+                self._parts.append(literal)
+            if field_name is not None:
+                slots.append((len(self._parts), field_name))
+                self._parts.append("")
+        # Filled from the back so splicing in lists doesn't shift the positions we still need to fill.
+        self._slots = slots[::-1]
+        slot_names = dict(slots)
+        self._sequence = [
+            (part, slot_names.get(pos)) for pos, part in enumerate(self._parts)
+        ]
+
+    def parts(self, **values: Union[str, List[str]]) -> List[str]:
+        """The fragments to join, a list value gets spliced in as-is (so nested templates are joined only once)."""
+        parts = self._parts.copy()
+        for pos, name in self._slots:
+            value = values[name]
+            if value.__class__ is str:
+                parts[pos] = value
+            elif isinstance(value, list):
+                parts[pos : pos + 1] = value
+            else:
+                parts[pos] = str(value)
+        return parts
+
+    def render(self, **values: Union[str, List[str]]) -> str:
+        return "".join(self.parts(**values))
+
+    def iter_parts(self, **values: Union[str, Iterable[str]]) -> Iterator[str]:
+        """Streams the fragments, a non-str value (e.g. a generator of a nested template) is streamed through."""
+        for part, name in self._sequence:
+            if name is None:
+                yield part
+                continue
+            value = values[name]
+            if isinstance(value, str):
+                yield value
+            elif isinstance(value, Iterable):
+                yield from value
+            else:
+                yield str(value)
+
+
+_compiled_full_template = _CompiledTemplate(_full_template)
+
+
+def full_template(
+    title: str, content: Union[str, List[str]], pre_header: Optional[str]
+):
     if pre_header is None:
         pre_header = title
-    print(f"FILLING FULL_TEMPLATE {len(title)}, {len(content)}, {len(pre_header)}")
-    return _full_template.format(title=title, content=content, pre_header=pre_header)
+    return _compiled_full_template.render(
+        title=title, content=content, pre_header=pre_header
+    )
+
+
+def iter_full_template(
+    title: str, content: Union[str, Iterable[str]], pre_header: Optional[str]
+) -> Iterator[str]:
+    if pre_header is None:
+        pre_header = title
+    return _compiled_full_template.iter_parts(
+        title=title, content=content, pre_header=pre_header
+    )
 
 
 # We do 96% to be mobile friendly
@@ -85,19 +154,12 @@ _content_begin = """
                     border-radius: 12px;">
 """
 
-
-def main_content_template(content, heading: Optional[str] = None):
-    heading_html = ""
-    if bool(heading):
-        heading_html = """
+_heading_template = """
             <div style="font-size: 18px; font-weight: bold; margin-bottom: 10px;">{heading}</div>
-        """.format(
-            heading=heading
-        )
+        """
 
-    return (
-        _content_begin
-        + """
+# heading_html, content
+_main_content_template = _content_begin + """
             <tr>
               <td style="padding: 20px;">
                 {heading_html}
@@ -105,22 +167,29 @@ def main_content_template(content, heading: Optional[str] = None):
               </td>
             </tr>
           </table>
-    """.format(
-            heading_html=heading_html, content=content
-        )
+    """
+
+_compiled_heading_template = _CompiledTemplate(_heading_template)
+_compiled_main_content_template = _CompiledTemplate(_main_content_template)
+
+
+def main_content_template(content, heading: Optional[str] = None):
+    heading_html = ""
+    if bool(heading):
+        heading_html = _compiled_heading_template.render(heading=heading)
+
+    return _compiled_main_content_template.render(
+        heading_html=heading_html, content=content
     )
 
 
-# extra_content_html should include <tr> ... </tr>
-def table_template(heading, rows_html: str, extra_content_html: str):
-    if len(str(extra_content_html)) > 5:
-        extra_content_html = f"""
+_extra_content_template = """
         <div style="height:1px; background-color:lightgray; margin-top:20px; margin-bottom:25px;"></div>
             {extra_content_html}
         """
-    return (
-        _content_begin
-        + """
+
+# heading, rows_html, extra_content_html
+_table_template = _content_begin + """
         <tr>
           <td style="padding: 20px;">
             <div style="font-size: 18px; font-weight: bold; margin-bottom: 10px;">{heading}</div>
@@ -137,11 +206,92 @@ def table_template(heading, rows_html: str, extra_content_html: str):
           </td>
         </tr>
       </table>
-""".format(
-            heading=heading,
-            rows_html=rows_html,
-            extra_content_html=extra_content_html,
+"""
+
+_compiled_extra_content_template = _CompiledTemplate(_extra_content_template)
+_compiled_table_template = _CompiledTemplate(_table_template)
+
+
+def iter_main_content_template(
+    content: Union[str, Iterable[str]], heading: Optional[str] = None
+) -> Iterator[str]:
+    heading_html = ""
+    if bool(heading):
+        heading_html = _compiled_heading_template.render(heading=heading)
+
+    return _compiled_main_content_template.iter_parts(
+        heading_html=heading_html, content=content
+    )
+
+
+# Most of the result email is the same for every send (status boxes, API / GPT error fallbacks), so those
+# fragments are rendered once per distinct input. Only use it for fragments from a small set of inputs,
+# user content would just churn the cache.
+RENDER_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def cached_main_content_template(content: str, heading: Optional[str] = None) -> str:
+    return main_content_template(content, heading)
+
+
+_cached_renderers = [cached_main_content_template]
+_invalidation_hooks: List[Callable[[], None]] = []
+
+
+def register_template_cache_invalidation_hook(hook: Callable[[], None]) -> None:
+    """For callers keeping their own rendered fragments, called by invalidate_template_cache.
+
+    Registering the same hook again (e.g. from a reloaded module) keeps it once.
+    """
+    if hook not in _invalidation_hooks:
+        _invalidation_hooks.append(hook)
+
+
+def invalidate_template_cache() -> None:
+    """Call after changing any of the templates (e.g. hot-reloading them), drops all rendered fragments."""
+    for renderer in _cached_renderers:
+        renderer.cache_clear()
+    for hook in _invalidation_hooks:
+        hook()
+
+
+def template_cache_stats() -> Dict[str, Any]:
+    hits = sum(renderer.cache_info().hits for renderer in _cached_renderers)
+    misses = sum(renderer.cache_info().misses for renderer in _cached_renderers)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses > 0 else 0.0,
+        "size": sum(renderer.cache_info().currsize for renderer in _cached_renderers),
+        "max_size": RENDER_CACHE_SIZE * len(_cached_renderers),
+    }
+
+
+# extra_content_html should include <tr> ... </tr>
+def table_template(heading, rows_html: Union[str, List[str]], extra_content_html: str):
+    if len(str(extra_content_html)) > 5:
+        extra_content_html = _compiled_extra_content_template.parts(
+            extra_content_html=extra_content_html
         )
+    return _compiled_table_template.render(
+        heading=heading,
+        rows_html=rows_html,
+        extra_content_html=extra_content_html,
+    )
+
+
+def iter_table_template(
+    heading, rows_html: Union[str, Iterable[str]], extra_content_html: str
+) -> Iterator[str]:
+    if len(str(extra_content_html)) > 5:
+        extra_content_html = _compiled_extra_content_template.iter_parts(
+            extra_content_html=extra_content_html
+        )
+    return _compiled_table_template.iter_parts(
+        heading=heading,
+        rows_html=rows_html,
+        extra_content_html=extra_content_html,
     )
 
 
@@ -167,6 +317,19 @@ def simple_email_body_html(
     )
 
 
+def iter_simple_email_body_html(
+    title: str, content_text: str, sub_title: Optional[str] = None
+) -> Iterator[str]:
+    return iter_full_template(
+        title=title,
+        pre_header=sub_title,
+        content=iter_main_content_template(
+            heading=sub_title,
+            content=content_text,
+        ),
+    )
+
+
 def button_template(text: str, href: str) -> str:
     return f"""
       <table align="center" cellspacing="0" cellpadding="14" style="border-radius: 12px; width: auto;
@@ -181,5 +344,3 @@ def button_template(text: str, href: str) -> str:
         </tr>
       </table>
     """
-
-
@@ -0,0 +1,250 @@
+# Content-addressed cache of GPT form extractions.
+# The key is a hash of the normalized transcript, the prompt-relevant parts of the FormDefinition (fields with
+# ignore_in_prompt never reach GPT, so they don't invalidate anything) and the model. So when a voice note is
+# retried after a HubSpot failure, the three fill_in_form calls come from the cache and only the sync runs again.
+#
+# Usage:
+#   extraction_cache = ExtractionCache(SqliteExtractionCacheBackend("/tmp/extractions.db"), model="gpt-4o")
+#   form_data, err = extraction_cache.fill_in_form(gpt_client, form=contact_form, text=text)
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Tuple
+
+from common.form import FormData, FormDefinition
+
+DEFAULT_MAX_ENTRIES = 1024
+# Bump when the key or value layout changes, so old entries are never served for a different meaning.
+# 2: values are JSON instead of pickle.
+_KEY_VERSION = 2
+
+
+def normalize_transcript(text: str) -> str:
+    """Same note, same key: unicode and whitespace differences don't change what GPT extracts."""
+    return " ".join(unicodedata.normalize("NFC", str(text)).split())
+
+
+def _option_key(option: Any) -> Any:
+    return [getattr(option, "label", None), getattr(option, "value", str(option))]
+
+
+def form_prompt_fingerprint(form: FormDefinition) -> list:
+    return [
+        [
+            field.name,
+            field.field_type,
+            field.label,
+            field.description,
+            [_option_key(option) for option in field.options or []],
+        ]
+        for field in form.fields
+        if not field.ignore_in_prompt
+    ]
+
+
+def extraction_cache_key(
+    text: str, form: FormDefinition, model: str, use_current_time: bool = False
+) -> str:
+    payload = json.dumps(
+        [
+            _KEY_VERSION,
+            model,
+            use_current_time,
+            form_prompt_fingerprint(form),
+            normalize_transcript(text),
+        ],
+        default=str,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# The values are JSON, unpickling whatever is in a shared file would run arbitrary code. FormData holds datetimes
+# for the datetime fields (use_current_time), those get tagged so they come back as datetimes.
+_DATETIME_TAG = "__datetime__"
+_DATE_TAG = "__date__"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {_DATETIME_TAG: value.isoformat()}
+    if isinstance(value, date):
+        return {_DATE_TAG: value.isoformat()}
+    raise TypeError(f"cannot cache a {type(value).__name__} value")
+
+
+def _decode_value(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        if _DATETIME_TAG in obj:
+            return datetime.fromisoformat(obj[_DATETIME_TAG])
+        if _DATE_TAG in obj:
+            return date.fromisoformat(obj[_DATE_TAG])
+    return obj
+
+
+def dumps_form_data(data: Dict[str, Any]) -> bytes:
+    return json.dumps(data, default=_encode_value, ensure_ascii=False).encode()
+
+
+def loads_form_data(value: bytes) -> Dict[str, Any]:
+    return json.loads(value, object_hook=_decode_value)
+
+
+class InMemoryExtractionCacheBackend:
+    """LRU bounded by max_entries, per process."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, stored_at: float, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (stored_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SqliteExtractionCacheBackend:
+    """Single file, survives restarts and is shared by the workers on the box."""
+
+    def __init__(self, path: str):
+        self.path = path
+        # The stage graph runs the extractions on worker threads, one connection guarded by a lock is plenty.
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS extractions "
+            "(key TEXT PRIMARY KEY, stored_at REAL NOT NULL, value BLOB NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stored_at, value FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+        return None if row is None else (row[0], bytes(row[1]))
+
+    def set(self, key: str, stored_at: float, value: bytes) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, stored_at, value) VALUES (?, ?, ?)",
+                (key, stored_at, value),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM extractions WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class ExtractionCache:
+    def __init__(
+        self,
+        backend=None,
+        model: str = "",
+        ttl_seconds: Optional[float] = None,
+    ):
+        """
+        backend: InMemoryExtractionCacheBackend (default) or SqliteExtractionCacheBackend, anything with get/set/delete,
+        model: the model gpt_client extracts with - a different model must not reuse old extractions,
+        ttl_seconds: None keeps entries until evicted.
+        """
+        self.backend = (
+            backend if backend is not None else InMemoryExtractionCacheBackend()
+        )
+        self.model = model
+        self.ttl_seconds = ttl_seconds
+        # Shared by the bulk path's GPT worker threads.
+        self._lock = threading.Lock()
+        self._metrics: Counter = Counter()
+
+    def _count(self, metric: str) -> None:
+        with self._lock:
+            self._metrics[metric] += 1
+
+    def get(
+        self, text: str, form: FormDefinition, use_current_time: bool = False
+    ) -> Optional[FormData]:
+        key = extraction_cache_key(text, form, self.model, use_current_time)
+        entry = self.backend.get(key)
+        if entry is None:
+            self._count("misses")
+            return None
+        stored_at, value = entry
+        if self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds:
+            self._count("expired")
+            self.backend.delete(key)
+            return None
+        try:
+            data = loads_form_data(value)
+        except ValueError as e:
+            print(f"WARNING: dropping unreadable extraction cache entry {key}: {e}")
+            self._count("unreadable")
+            self.backend.delete(key)
+            return None
+        self._count("hits")
+        # Stored as the plain dict, a fresh FormData per hit so callers can mutate it (e.g. set hubspot_owner_id).
+        return FormData(form, data)
+
+    def put(
+        self,
+        text: str,
+        form: FormDefinition,
+        form_data: FormData,
+        use_current_time: bool = False,
+    ) -> None:
+        try:
+            value = dumps_form_data(form_data.to_dict())
+        except TypeError as e:
+            # Not worth failing the extraction over, it just won't be cached.
+            print(f"WARNING: not caching extraction: {e}")
+            self._count("unserializable")
+            return
+        key = extraction_cache_key(text, form, self.model, use_current_time)
+        self.backend.set(key, time.time(), value)
+        self._count("stores")
+
+    def fill_in_form(
+        self,
+        gpt_client,
+        form: FormDefinition,
+        text: str,
+        use_current_time: bool = False,
+    ) -> Tuple[Optional[FormData], Optional[str]]:
+        """Drop-in for gpt_client.fill_in_form, failed extractions are not cached."""
+        form_data = self.get(text, form, use_current_time)
+        if form_data is not None:
+            return form_data, None
+        form_data, err = gpt_client.fill_in_form(
+            form=form, text=text, use_current_time=use_current_time
+        )
+        if form_data is not None and err is None:
+            self.put(text, form, form_data, use_current_time)
+        return form_data, err
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._metrics)
@@ -0,0 +1,674 @@
+# In-process fake of the HubSpot endpoints we use, so the pipeline can be exercised (and benchmarked) without
+# a portal and a production refresh token. It's a real HTTP server on localhost, so everything from the SDK's
+# serialization to the connection pool runs like against api.hubapi.com.
+#
+# Covers: CRM objects (create, get, list, batch create/read/upsert, search), associations (v4 single and batch),
+# owners, properties (with ETags) and the OAuth token endpoints.
+# Latency, 5xx errors and 429s can be injected per request.
+#
+# Usage:
+#   with FakeHubspot(latency_seconds=0.05, rate_limit_rate=0.01) as fake:
+#       api_client = HubSpot(access_token="fake", host=fake.url)
+#       api_client.crm.objects.basic_api.create("contacts", {"properties": {"email": "a@b.c"}})
+#       fake.metrics()  # {"requests": 1, "create": 1, ...}
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+FAKE_HUB_ID = 1234567
+FAKE_HUB_DOMAIN = "fake-portal.hubspot.com"
+FAKE_RATE_LIMIT_MAX = 100
+FAKE_RATE_LIMIT_INTERVAL_MS = 10_000
+# Only what the pipeline and the property codegen need, anything else can be passed to FakeHubspot.
+DEFAULT_PROPERTIES = {
+    "contact": ["email", "firstname", "lastname", "phone", "jobtitle", "company"],
+    "call": ["hs_timestamp", "hs_call_title", "hs_call_body", "hs_call_direction"],
+    "task": ["hs_timestamp", "hs_task_subject", "hs_task_body", "hs_task_priority"],
+    "meeting": ["hs_timestamp", "hs_meeting_title", "hs_meeting_body"],
+}
+# https://developers.hubspot.com/docs/api/crm/understanding-the-crm#object-type-ids
+OBJECT_TYPE_IDS = {"contact": "0-1", "task": "0-27", "meeting": "0-47", "call": "0-48"}
+
+
+def _now_iso() -> str:
+    return (
+        datetime.now(timezone.utc)
+        .isoformat(timespec="milliseconds")
+        .replace("+00:00", "Z")
+    )
+
+
+def _singular(object_type: str) -> str:
+    # The SDK calls pass both "contacts" and "contact", HubSpot accepts either.
+    return object_type[:-1] if object_type.endswith("s") else object_type
+
+
+def _comparable(value: Any) -> Any:
+    if value is None:
+        return None
+    text = str(value)
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp() * 1000
+    except ValueError:
+        return text.lower()
+
+
+_FILTER_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "EQ": lambda a, b: a == b,
+    "NEQ": lambda a, b: a != b,
+    "GT": lambda a, b: a is not None and a > b,
+    "GTE": lambda a, b: a is not None and a >= b,
+    "LT": lambda a, b: a is not None and a < b,
+    "LTE": lambda a, b: a is not None and a <= b,
+    "HAS_PROPERTY": lambda a, _: a is not None,
+    "NOT_HAS_PROPERTY": lambda a, _: a is None,
+}
+
+
+class FakeHubspot:
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after_seconds: int = 1,
+        properties: Optional[Dict[str, List[str]]] = None,
+        num_owners: int = 3,
+        seed: Optional[int] = None,
+    ):
+        """
+        latency_seconds: added to every request,
+        error_rate / rate_limit_rate: share of requests answered with a 500 / a 429 (with Retry-After),
+        properties: property names per object type for the properties API, DEFAULT_PROPERTIES otherwise.
+        """
+        self.latency_seconds = latency_seconds
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after_seconds = retry_after_seconds
+        self.properties = properties or DEFAULT_PROPERTIES
+        self._random = random.Random(seed)
+        self._started_at = _now_iso()
+
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self.objects: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.associations: List[Dict[str, Any]] = []
+        self.owners = [
+            {
+                "id": str(100 + i),
+                "email": f"owner{i}@example.com",
+                "firstName": f"Owner{i}",
+                "lastName": "Fake",
+                "userId": 200 + i,
+                "createdAt": _now_iso(),
+                "updatedAt": _now_iso(),
+                "archived": False,
+            }
+            for i in range(num_owners)
+        ]
+        self._metrics: Counter = Counter()
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._routes: List[Tuple[str, "re.Pattern", Callable]] = [
+            (
+                "POST",
+                re.compile(r"/crm/v3/objects/(?P<object_type>[^/]+)/batch/create"),
+                self._batch_create,
+            ),
+            (
+                "POST",
+                re.compile(r"/crm/v3/objects/(?P<object_type>[^/]+)/batch/read"),
+                self._batch_read,
+            ),
+            (
+                "POST",
+                re.compile(r"/crm/v3/objects/(?P<object_type>[^/]+)/batch/upsert"),
+                self._batch_upsert,
+            ),
+            (
+                "POST",
+                re.compile(r"/crm/v3/objects/(?P<object_type>[^/]+)/search"),
+                self._search,
+            ),
+            (
+                "POST",
+                re.compile(r"/crm/v3/objects/(?P<object_type>[^/]+)"),
+                self._create,
+            ),
+            (
+                "GET",
+                re.compile(r"/crm/v3/objects/(?P<object_type>[^/]+)/(?P<id>[^/]+)"),
+                self._get,
+            ),
+            (
+                "GET",
+                re.compile(r"/crm/v3/objects/(?P<object_type>[^/]+)"),
+                self._get_page,
+            ),
+            (
+                "PUT",
+                re.compile(
+                    r"/crm/v4/objects/(?P<from>[^/]+)/(?P<from_id>[^/]+)/associations/(?P<to>[^/]+)/(?P<to_id>[^/]+)"
+                ),
+                self._associate,
+            ),
+            (
+                "POST",
+                re.compile(
+                    r"/crm/v4/associations/(?P<from>[^/]+)/(?P<to>[^/]+)/batch/create"
+                ),
+                self._batch_associate,
+            ),
+            ("GET", re.compile(r"/crm/v3/owners/?"), self._owners),
+            (
+                "GET",
+                re.compile(r"/crm/v3/properties/(?P<object_type>[^/]+)"),
+                self._properties,
+            ),
+            ("POST", re.compile(r"/oauth/v1/token"), self._oauth_token),
+            (
+                "GET",
+                re.compile(r"/oauth/v1/access-tokens/(?P<token>[^/]+)"),
+                self._access_token_info,
+            ),
+        ]
+
+    # LIFECYCLE
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeHubspot":
+        fake = self
+
+        class Handler(_FakeHubspotHandler):
+            hubspot = fake
+
+        self._server = _FakeHubspotServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-hubspot", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeHubspot":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._metrics)
+
+    # DISPATCH
+
+    def handle(
+        self,
+        method: str,
+        raw_path: str,
+        body: bytes,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> Tuple[int, Dict[str, str], Any]:
+        """(status, extra headers, JSON-able body or None for no body)"""
+        parsed = urlparse(raw_path)
+        query = parse_qs(parsed.query)
+        with self._lock:
+            self._metrics["requests"] += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+        for route_method, pattern, handler in self._routes:
+            match = pattern.fullmatch(parsed.path)
+            if route_method != method or match is None:
+                continue
+            # The counters and the seeded Random are shared by all request threads of the server.
+            with self._lock:
+                self._metrics[handler.__name__.lstrip("_")] += 1
+                # Injected failures only on routes that exist, so a typo'd path is still an obvious 404.
+                roll = self._random.random()
+                if roll < self.rate_limit_rate:
+                    self._metrics["injected_429"] += 1
+                    return (
+                        HTTPStatus.TOO_MANY_REQUESTS,
+                        {
+                            "Retry-After": str(self.retry_after_seconds),
+                            # Like HubSpot's, a 429 reports the burst budget as used up.
+                            "X-HubSpot-RateLimit-Max": str(FAKE_RATE_LIMIT_MAX),
+                            "X-HubSpot-RateLimit-Remaining": "0",
+                            "X-HubSpot-RateLimit-Interval-Milliseconds": str(
+                                FAKE_RATE_LIMIT_INTERVAL_MS
+                            ),
+                        },
+                        _error("RATE_LIMITS", "You have reached your secondly limit."),
+                    )
+                if roll < self.rate_limit_rate + self.error_rate:
+                    self._metrics["injected_500"] += 1
+                    return (
+                        HTTPStatus.INTERNAL_SERVER_ERROR,
+                        {},
+                        _error("ERROR", "injected error"),
+                    )
+            if parsed.path == "/oauth/v1/token":
+                payload = {k: v[0] for k, v in parse_qs(body.decode()).items()}
+            else:
+                payload = json.loads(body) if body else {}
+            with self._lock:
+                status, response = handler(
+                    payload=payload, query=query, **match.groupdict()
+                )
+                if handler == self._properties:
+                    return self._conditional(status, response, headers or {})
+            return status, {}, response
+
+        return (
+            HTTPStatus.NOT_FOUND,
+            {},
+            _error("OBJECT_NOT_FOUND", f"no route for {method} {parsed.path}"),
+        )
+
+    def _conditional(
+        self, status: int, response: Any, headers: Mapping[str, str]
+    ) -> Tuple[int, Dict[str, str], Any]:
+        # Like HubSpot's properties API: an ETag, and a 304 without body for an If-None-Match of the current one.
+        digest = hashlib.sha1(json.dumps(response, sort_keys=True).encode())
+        etag = f'"{digest.hexdigest()}"'
+        if headers.get("If-None-Match") == etag:
+            self._metrics["not_modified"] += 1
+            return HTTPStatus.NOT_MODIFIED, {"ETag": etag}, None
+        return status, {"ETag": etag}, response
+
+    # CRM OBJECTS
+
+    def _new_object(
+        self, object_type: str, properties: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        object_id = str(self._next_id)
+        self._next_id += 1
+        now = _now_iso()
+        stored = {
+            k: None if v is None else str(v) for k, v in (properties or {}).items()
+        }
+        stored.update(
+            {
+                "hs_object_id": object_id,
+                "createdate": now,
+                "lastmodifieddate": now,
+                "hs_createdate": now,
+                "hs_lastmodifieddate": now,
+            }
+        )
+        obj = {
+            "id": object_id,
+            "properties": stored,
+            "createdAt": now,
+            "updatedAt": now,
+            "archived": False,
+        }
+        self.objects.setdefault(object_type, {})[object_id] = obj
+        return obj
+
+    def _update_object(self, obj: Dict[str, Any], properties: Dict[str, Any]) -> None:
+        now = _now_iso()
+        obj["properties"].update(
+            {k: None if v is None else str(v) for k, v in properties.items()}
+        )
+        obj["properties"]["lastmodifieddate"] = now
+        obj["properties"]["hs_lastmodifieddate"] = now
+        obj["updatedAt"] = now
+
+    def _find_by(
+        self, object_type: str, id_property: Optional[str], value: Any
+    ) -> Optional[Dict[str, Any]]:
+        objects = self.objects.get(object_type, {})
+        if id_property is None or id_property == "hs_object_id":
+            return objects.get(str(value))
+        wanted = str(value).strip().lower()
+        for obj in objects.values():
+            if str(obj["properties"].get(id_property) or "").strip().lower() == wanted:
+                return obj
+        return None
+
+    def _conflict(
+        self, object_type: str, properties: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        if object_type != "contact" or not (properties or {}).get("email"):
+            return None
+        return self._find_by("contact", "email", properties["email"])
+
+    @staticmethod
+    def _project(
+        obj: Dict[str, Any], properties: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        if not properties:
+            return obj
+        return {
+            **obj,
+            "properties": {name: obj["properties"].get(name) for name in properties},
+        }
+
+    def _create(self, object_type, payload, query):
+        object_type = _singular(object_type)
+        existing = self._conflict(object_type, payload.get("properties"))
+        if existing is not None:
+            return HTTPStatus.CONFLICT, _error(
+                "CONFLICT", f"Contact already exists. Existing ID: {existing['id']}"
+            )
+        return HTTPStatus.CREATED, self._new_object(
+            object_type, payload.get("properties")
+        )
+
+    def _get(self, object_type, id, payload, query):
+        obj = self._find_by(
+            _singular(object_type), (query.get("idProperty") or [None])[0], id
+        )
+        if obj is None:
+            return HTTPStatus.NOT_FOUND, _error(
+                "OBJECT_NOT_FOUND", f"{object_type} {id} not found"
+            )
+        return HTTPStatus.OK, self._project(obj, _query_list(query, "properties"))
+
+    def _get_page(self, object_type, payload, query):
+        objects = list(self.objects.get(_singular(object_type), {}).values())
+        return HTTPStatus.OK, _page(
+            [self._project(obj, _query_list(query, "properties")) for obj in objects],
+            limit=int((query.get("limit") or [10])[0]),
+            after=(query.get("after") or [None])[0],
+        )
+
+    def _batch_create(self, object_type, payload, query):
+        object_type = _singular(object_type)
+        inputs = payload.get("inputs") or []
+        # Like HubSpot: one existing email fails the whole batch.
+        for item in inputs:
+            existing = self._conflict(object_type, item.get("properties"))
+            if existing is not None:
+                return HTTPStatus.CONFLICT, _error(
+                    "CONFLICT", f"Contact already exists. Existing ID: {existing['id']}"
+                )
+        results = []
+        for item in inputs:
+            obj = self._new_object(object_type, item.get("properties"))
+            results.append(
+                {**obj, "objectWriteTraceId": item.get("objectWriteTraceId")}
+            )
+        return HTTPStatus.CREATED, _batch_response(results)
+
+    def _batch_read(self, object_type, payload, query):
+        object_type = _singular(object_type)
+        results = []
+        for item in payload.get("inputs") or []:
+            obj = self._find_by(object_type, payload.get("idProperty"), item.get("id"))
+            if obj is not None:
+                results.append(self._project(obj, payload.get("properties")))
+        return HTTPStatus.OK, _batch_response(results)
+
+    def _batch_upsert(self, object_type, payload, query):
+        object_type = _singular(object_type)
+        results = []
+        for item in payload.get("inputs") or []:
+            id_property = item.get("idProperty")
+            obj = self._find_by(object_type, id_property, item.get("id"))
+            new = obj is None
+            if new:
+                properties = dict(item.get("properties") or {})
+                if id_property and id_property != "hs_object_id":
+                    properties.setdefault(
+                        id_property, str(item.get("id")).strip().lower()
+                    )
+                obj = self._new_object(object_type, properties)
+            else:
+                self._update_object(obj, item.get("properties") or {})
+            results.append({**obj, "new": new})
+        return HTTPStatus.OK, _batch_response(results)
+
+    def _search(self, object_type, payload, query):
+        objects = list(self.objects.get(_singular(object_type), {}).values())
+        filter_groups = payload.get("filterGroups") or []
+        if filter_groups:
+            # Groups are OR-ed, the filters within a group AND-ed.
+            objects = [
+                obj
+                for obj in objects
+                if any(
+                    all(_matches(obj, f) for f in group.get("filters") or [])
+                    for group in filter_groups
+                )
+            ]
+        if payload.get("query"):
+            needle = str(payload["query"]).lower()
+            objects = [
+                obj
+                for obj in objects
+                if any(needle in str(v).lower() for v in obj["properties"].values())
+            ]
+        for sort in reversed(payload.get("sorts") or []):
+            name = (
+                sort["propertyName"]
+                if isinstance(sort, dict)
+                else str(sort).lstrip("-")
+            )
+            descending = (
+                sort.get("direction") == "DESCENDING"
+                if isinstance(sort, dict)
+                else str(sort).startswith("-")
+            )
+            objects.sort(
+                key=lambda obj: _sort_key(obj["properties"].get(name)),
+                reverse=descending,
+            )
+        page = _page(
+            [self._project(obj, payload.get("properties")) for obj in objects],
+            limit=int(payload.get("limit") or 10),
+            after=payload.get("after"),
+        )
+        page["total"] = len(objects)
+        return HTTPStatus.OK, page
+
+    # ASSOCIATIONS
+
+    def _add_association(
+        self, from_type: str, from_id: Any, to_type: str, to_id: Any, types
+    ) -> Optional[Dict]:
+        from_type, to_type = _singular(from_type), _singular(to_type)
+        if (
+            self._find_by(from_type, None, from_id) is None
+            or self._find_by(to_type, None, to_id) is None
+        ):
+            return None
+        link = {
+            "fromObjectTypeId": OBJECT_TYPE_IDS.get(from_type, from_type),
+            "fromObjectId": int(from_id),
+            "toObjectTypeId": OBJECT_TYPE_IDS.get(to_type, to_type),
+            "toObjectId": int(to_id),
+            "labels": [],
+        }
+        self.associations.append({**link, "types": types})
+        return link
+
+    def _associate(self, to_id, payload, query, **path):
+        link = self._add_association(
+            path["from"], path["from_id"], path["to"], to_id, payload
+        )
+        if link is None:
+            return HTTPStatus.NOT_FOUND, _error(
+                "OBJECT_NOT_FOUND", "one of the objects does not exist"
+            )
+        return HTTPStatus.CREATED, link
+
+    def _batch_associate(self, payload, query, **path):
+        results = []
+        for item in payload.get("inputs") or []:
+            link = self._add_association(
+                path["from"],
+                item["from"]["id"],
+                path["to"],
+                item["to"]["id"],
+                item.get("types"),
+            )
+            if link is not None:
+                results.append(link)
+        return HTTPStatus.CREATED, _batch_response(results)
+
+    # OWNERS, PROPERTIES, OAUTH
+
+    def _owners(self, payload, query):
+        return HTTPStatus.OK, _page(
+            self.owners,
+            limit=int((query.get("limit") or [100])[0]),
+            after=(query.get("after") or [None])[0],
+        )
+
+    def _properties(self, object_type, payload, query):
+        object_type = _singular(object_type)
+        return HTTPStatus.OK, {
+            "results": [
+                {
+                    "name": name,
+                    "label": name.replace("_", " ").title(),
+                    "type": "datetime" if name == "hs_timestamp" else "string",
+                    "fieldType": "date" if name == "hs_timestamp" else "text",
+                    "description": f"The {name} of the {object_type}",
+                    "groupName": f"{object_type}information",
+                    "options": [],
+                    "hubspotDefined": True,
+                    "hidden": False,
+                    "formField": True,
+                    # Fixed, so the ETag only changes with the properties.
+                    "createdAt": self._started_at,
+                    "updatedAt": self._started_at,
+                }
+                for name in self.properties.get(object_type, [])
+            ]
+        }
+
+    def _oauth_token(self, payload, query):
+        return HTTPStatus.OK, {
+            "access_token": f"fake-access-{self._random.getrandbits(32):08x}",
+            "refresh_token": payload.get("refresh_token") or "fake-refresh",
+            "expires_in": 1800,
+            "token_type": "bearer",
+        }
+
+    def _access_token_info(self, token, payload, query):
+        return HTTPStatus.OK, {
+            "token": token,
+            "user": self.owners[0]["email"] if self.owners else "fake@example.com",
+            "hub_domain": FAKE_HUB_DOMAIN,
+            "scopes": ["crm.objects.contacts.write", "crm.objects.contacts.read"],
+            "hub_id": FAKE_HUB_ID,
+            "app_id": 1,
+            "expires_in": 1800,
+            "user_id": self.owners[0]["userId"] if self.owners else 1,
+            "token_type": "access",
+        }
+
+
+class _FakeHubspotServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 resets connections once a few pipelines connect at the same time.
+    request_queue_size = 128
+
+
+class _FakeHubspotHandler(BaseHTTPRequestHandler):
+    hubspot: FakeHubspot
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real thing
+    # Headers and body are separate writes, with Nagle every keep-alive response waits for the delayed ACK.
+    disable_nagle_algorithm = True
+
+    def _dispatch(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        status, headers, response = self.hubspot.handle(
+            self.command, self.path, body, self.headers
+        )
+        data = b"" if response is None else json.dumps(response).encode()
+        self.send_response(int(status))
+        self.send_header("Content-Type", "application/json;charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _dispatch
+
+    def log_message(self, format: str, *args) -> None:
+        pass  # benchmarks make thousands of requests
+
+
+def _error(category: str, message: str) -> Dict[str, Any]:
+    return {
+        "status": "error",
+        "message": message,
+        "category": category,
+        "correlationId": "fake",
+    }
+
+
+def _batch_response(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    now = _now_iso()
+    return {
+        "status": "COMPLETE",
+        "results": results,
+        "startedAt": now,
+        "completedAt": now,
+    }
+
+
+def _page(items: List[Any], limit: int, after: Optional[str]) -> Dict[str, Any]:
+    start = int(after or 0)
+    page: Dict[str, Any] = {"results": items[start : start + limit]}
+    if start + limit < len(items):
+        page["paging"] = {"next": {"after": str(start + limit)}}
+    return page
+
+
+def _query_list(query: Dict[str, List[str]], name: str) -> Optional[List[str]]:
+    # The SDK sends lists as repeated params, curl users as comma separated.
+    values = [v for value in query.get(name) or [] for v in value.split(",") if v]
+    return values or None
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    comparable = _comparable(value)
+    # None first, then numbers/dates, then strings - like HubSpot, nothing blows up on mixed types.
+    if comparable is None:
+        return 0, 0
+    return (1, comparable) if isinstance(comparable, float) else (2, comparable)
+
+
+def _matches(obj: Dict[str, Any], search_filter: Dict[str, Any]) -> bool:
+    actual = _comparable(obj["properties"].get(search_filter["propertyName"]))
+    operator = search_filter.get("operator", "EQ")
+    if operator == "IN":
+        return actual in {_comparable(v) for v in search_filter.get("values") or []}
+    expected = _comparable(search_filter.get("value"))
+    if type(actual) is not type(expected) and operator not in (
+        "HAS_PROPERTY",
+        "NOT_HAS_PROPERTY",
+    ):
+        return operator == "NEQ"
+    return _FILTER_OPERATORS[operator](actual, expected)
@@ -0,0 +1,429 @@
+# Helpers over the official `hubspot.Client` for things our HubspotClient wrapper does one request at a time.
+# Request bodies are plain dicts (the SDK serializes them as-is), which keeps us independent of the generated
+# model class names which keep changing between SDK versions.
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.hubspot_models import ObjectType
+from common.form import FormDefinition
+from hubspot import HubSpot
+from hubspot.crm.associations.v4 import ApiException as AssociationsApiException
+from hubspot.crm.objects import ApiException
+
+from examples.utils.batch_item_result import BatchItemResult
+from examples.utils.hubspot_object import HubspotObject, form_property_names
+from examples.utils.tracing import payload_bytes, span
+
+# https://developers.hubspot.com/docs/api/crm/understanding-the-crm#batch-operations
+HUBSPOT_BATCH_LIMIT = 100
+# https://developers.hubspot.com/docs/api/crm/search#limitations
+HUBSPOT_SEARCH_LIMIT = 200
+
+
+def chunks(
+    items: Sequence[Any], size: int = HUBSPOT_BATCH_LIMIT
+) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _is_input_error(status: Optional[int]) -> bool:
+    # 4xx other than rate limits means (at least) one of the inputs is bad, retrying the same batch won't help.
+    return (
+        status is not None
+        and 400 <= status < 500
+        and status != HTTPStatus.TOO_MANY_REQUESTS
+    )
+
+
+def _batch_create_chunk(
+    api_client: HubSpot, object_type: str, chunk: Sequence[Tuple[int, Dict[str, Any]]]
+) -> Dict[int, BatchItemResult]:
+    body = {
+        "inputs": [
+            # objectWriteTraceId is echoed back, HubSpot doesn't guarantee result order.
+            {"properties": props, "objectWriteTraceId": str(index)}
+            for index, props in chunk
+        ]
+    }
+    try:
+        with span(
+            "hubspot.batch_create",
+            object_type=object_type,
+            inputs=len(chunk),
+            payload_bytes=payload_bytes(body),
+        ) as s:
+            batch_api = api_client.crm.objects.batch_api
+            response, status, _ = batch_api.create_with_http_info(object_type, body)
+            s.set_attribute("status", status)
+            s.set_attribute("results", len(response.results or []))
+    except ApiException as e:
+        if len(chunk) > 1 and _is_input_error(e.status):
+            # A single duplicate email fails the whole batch, isolate it so the other 99 still go through.
+            print(
+                f"WARNING: batch create of {len(chunk)} {object_type} failed with {e.status}, retrying one by one"
+            )
+            results = {}
+            for item in chunk:
+                results.update(_batch_create_chunk(api_client, object_type, [item]))
+            return results
+        return {
+            index: BatchItemResult(status=e.status, error=str(e.body))
+            for index, _ in chunk
+        }
+
+    results = {}
+    for created in response.results or []:
+        results[int(created.object_write_trace_id)] = BatchItemResult(
+            status=HTTPStatus.CREATED, props=created.properties
+        )
+    # 207 Multi-Status: whatever isn't in results has failed, details are in response.errors.
+    errors = str(getattr(response, "errors", None))
+    for index, _ in chunk:
+        if index not in results:
+            results[index] = BatchItemResult(
+                status=HTTPStatus.MULTI_STATUS, error=errors
+            )
+    return results
+
+
+def crm_batch_create(
+    api_client: HubSpot,
+    object_type: str,
+    inputs: Sequence[Optional[Dict[str, Any]]],
+) -> List[Optional[BatchItemResult]]:
+    """Creates objects HUBSPOT_BATCH_LIMIT at a time, returns one result per input (None for None inputs)."""
+    indexed = [(i, props) for i, props in enumerate(inputs) if props is not None]
+    results: Dict[int, BatchItemResult] = {}
+    for chunk in chunks(indexed):
+        results.update(_batch_create_chunk(api_client, object_type, chunk))
+    return [results.get(i) for i in range(len(inputs))]
+
+
+def _upsert_key(value: Any) -> str:
+    # HubSpot stores emails lower-cased, which is also what comes back in the results.
+    return str(value).strip().lower()
+
+
+def crm_batch_upsert(
+    api_client: HubSpot,
+    object_type: str,
+    inputs: Sequence[Optional[Dict[str, Any]]],
+    id_property: str = "email",
+) -> List[Optional[BatchItemResult]]:
+    """Creates or updates objects by a unique property, returns one result per input (None for None inputs).
+
+    Unlike a create, an existing object is not a 409 but comes back with its id (and created=False), so it can be
+    associated right away. id_property has to be a unique-value property, i.e. email for contacts (phone isn't).
+    Inputs without a value for it are created instead.
+    """
+    # The same key twice within one request fails the request, so they are sent once and the result shared.
+    indexes_by_key: Dict[str, List[int]] = {}
+    props_by_key: Dict[str, Dict[str, Any]] = {}
+    to_create: List[Tuple[int, Dict[str, Any]]] = []
+    for i, props in enumerate(inputs):
+        if props is None:
+            continue
+        if not props.get(id_property):
+            to_create.append((i, props))
+            continue
+        key = _upsert_key(props[id_property])
+        indexes_by_key.setdefault(key, []).append(i)
+        props_by_key[key] = props
+
+    results: Dict[int, BatchItemResult] = {}
+    for chunk in chunks(list(props_by_key)):
+        body = {
+            "inputs": [
+                {"id": key, "idProperty": id_property, "properties": props_by_key[key]}
+                for key in chunk
+            ]
+        }
+        try:
+            with span(
+                "hubspot.batch_upsert",
+                object_type=object_type,
+                inputs=len(chunk),
+                payload_bytes=payload_bytes(body),
+            ) as s:
+                batch_api = api_client.crm.objects.batch_api
+                response, status, _ = batch_api.upsert_with_http_info(object_type, body)
+                s.set_attribute("status", status)
+                s.set_attribute("results", len(response.results or []))
+        except ApiException as e:
+            for key in chunk:
+                for i in indexes_by_key[key]:
+                    results[i] = BatchItemResult(status=e.status, error=str(e.body))
+            continue
+
+        upserted = {}
+        for result in response.results or []:
+            props = result.properties or {}
+            upserted[_upsert_key(props.get(id_property))] = result
+        errors = str(getattr(response, "errors", None))
+        for key in chunk:
+            result = upserted.get(key)
+            for i in indexes_by_key[key]:
+                if result is None:
+                    results[i] = BatchItemResult(
+                        status=HTTPStatus.MULTI_STATUS, error=errors
+                    )
+                    continue
+                # hs_object_id isn't always among the returned properties, the id is.
+                props = dict(result.properties or {})
+                props.setdefault("hs_object_id", result.id)
+                results[i] = BatchItemResult(
+                    status=HTTPStatus.CREATED if result.new else HTTPStatus.OK,
+                    props=props,
+                    created=bool(result.new),
+                )
+
+    for chunk in chunks(to_create):
+        results.update(_batch_create_chunk(api_client, object_type, chunk))
+    return [results.get(i) for i in range(len(inputs))]
+
+
+# (from_type, from_id, to_type, to_id, AssociationType), e.g. ("contact", "51", "call", "1203", CONTACT_TO_CALL)
+AssociationInput = Tuple[str, Any, str, Any, Any]
+
+
+def crm_associations_batch_create(
+    api_client: HubSpot, entries: Sequence[AssociationInput]
+) -> List[Optional[Dict[str, Any]]]:
+    """Creates the associations with as few v4 batch requests as possible, returns the created link per input.
+
+    The v4 endpoint is per (from_type, to_type) pair, so entries are grouped by it and sent HUBSPOT_BATCH_LIMIT
+    at a time. A failed input (or a failed request) yields None at its position.
+    """
+    by_types: Dict[Tuple[str, str], List[int]] = {}
+    for i, (from_type, _, to_type, _, _) in enumerate(entries):
+        by_types.setdefault((from_type, to_type), []).append(i)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(entries)
+    for (from_type, to_type), indexes in by_types.items():
+        for chunk in chunks(indexes):
+            body = {
+                "inputs": [
+                    {
+                        "from": {"id": str(entries[i][1])},
+                        "to": {"id": str(entries[i][3])},
+                        "types": [
+                            {
+                                "associationCategory": "HUBSPOT_DEFINED",
+                                "associationTypeId": entries[i][4].value,
+                            }
+                        ],
+                    }
+                    for i in chunk
+                ]
+            }
+            try:
+                with span(
+                    "hubspot.batch_associate",
+                    object_type=f"{from_type}_to_{to_type}",
+                    inputs=len(chunk),
+                    payload_bytes=payload_bytes(body),
+                ) as s:
+                    batch_api = api_client.crm.associations.v4.batch_api
+                    response, status, _ = batch_api.create_with_http_info(
+                        from_type, to_type, body
+                    )
+                    s.set_attribute("status", status)
+                    s.set_attribute("results", len(response.results or []))
+            except AssociationsApiException as e:
+                print(
+                    f"WARNING: cannot create {len(chunk)} {from_type} to {to_type} associations cause {e.status}"
+                )
+                continue
+
+            created = {
+                (str(r.from_object_id), str(r.to_object_id)): r.to_dict()
+                for r in response.results or []
+            }
+            for i in chunk:
+                results[i] = created.get((str(entries[i][1]), str(entries[i][3])))
+    return results
+
+
+# READS: all of them only ask for the properties of the given form (instead of the default or full set),
+# that's usually a dozen properties instead of hundreds - which shrinks both the payload and the decoding.
+# NOTE: ObjectType values are the CRM object type names (contact, call, task).
+
+
+def crm_get_object(
+    api_client: HubSpot,
+    hub_id: Optional[str],
+    object_type: ObjectType,
+    object_id: str,
+    form: FormDefinition,
+) -> Optional[HubspotObject]:
+    try:
+        # Raw bytes, so the response gets projected to the form fields while decoding.
+        response = api_client.crm.objects.basic_api.get_by_id(
+            object_type.value,
+            object_id,
+            properties=list(form_property_names(form)),
+            _preload_content=False,
+        )
+    except ApiException as e:
+        if e.status == HTTPStatus.NOT_FOUND:
+            return None
+        raise
+    return HubspotObject.from_api_response_bytes(
+        hub_id, object_type, form, response.data
+    )
+
+
+def crm_search_objects(
+    api_client: HubSpot,
+    hub_id: Optional[str],
+    object_type: ObjectType,
+    form: FormDefinition,
+    filter_groups: Optional[List[Dict[str, Any]]] = None,
+    sorts: Optional[List[Any]] = None,
+    query: Optional[str] = None,
+    limit: int = HUBSPOT_SEARCH_LIMIT,
+    after: Optional[str] = None,
+) -> Tuple[List[HubspotObject], Optional[str]]:
+    """One page of search results, and the `after` cursor of the next page (None on the last one)."""
+    body: Dict[str, Any] = {
+        "properties": list(form_property_names(form)),
+        "filterGroups": filter_groups or [],
+        "limit": limit,
+    }
+    if sorts is not None:
+        body["sorts"] = sorts
+    if query is not None:
+        body["query"] = query
+    if after is not None:
+        body["after"] = after
+
+    response = api_client.crm.objects.search_api.do_search(object_type.value, body)
+    objects = [
+        HubspotObject.from_api_response_props(
+            hub_id, object_type, form, result.properties
+        )
+        for result in response.results or []
+    ]
+    next_page = response.paging.next if response.paging is not None else None
+    return objects, next_page.after if next_page is not None else None
+
+
+def crm_batch_read_objects(
+    api_client: HubSpot,
+    hub_id: Optional[str],
+    object_type: ObjectType,
+    form: FormDefinition,
+    object_ids: Sequence[str],
+    id_property: Optional[str] = None,
+) -> List[Optional[HubspotObject]]:
+    """Reads HUBSPOT_BATCH_LIMIT objects per request, returns them in the order of object_ids (None if not found).
+
+    id_property: to read by some other unique property, e.g. "email" for contacts.
+    """
+    properties = list(form_property_names(form))
+    key_property = id_property or "hs_object_id"
+    found: Dict[str, HubspotObject] = {}
+    for chunk in chunks(object_ids):
+        body: Dict[str, Any] = {
+            "inputs": [{"id": str(object_id)} for object_id in chunk],
+            # We need the key to put the results back in order, even if the form doesn't have it.
+            "properties": (
+                properties
+                if key_property in properties
+                else properties + [key_property]
+            ),
+        }
+        if id_property is not None:
+            body["idProperty"] = id_property
+        response = api_client.crm.objects.batch_api.read(object_type.value, body)
+        for result in response.results or []:
+            key = (result.properties or {}).get(key_property, result.id)
+            found[str(key)] = HubspotObject.from_api_response_props(
+                hub_id, object_type, form, result.properties
+            )
+    return [found.get(str(object_id)) for object_id in object_ids]
+
+
+# LISTING: generators over all pages, following the paging.next.after cursors. With prefetch the next page is
+# requested on a background thread while the caller works through the current one, so a full export costs about
+# max(request time, processing time) per page instead of the sum - and only two pages are in memory at a time.
+# NOTE: The properties API isn't paginated, see PropertySchemaCache for that one.
+
+# https://developers.hubspot.com/docs/api/crm/owners
+HUBSPOT_OWNERS_PAGE_LIMIT = 500
+HUBSPOT_OBJECTS_PAGE_LIMIT = 100
+
+
+def _iter_pages(
+    fetch_page: Callable[[Optional[str]], Tuple[List[Any], Optional[str]]],
+    prefetch: bool = True,
+) -> Iterator[Any]:
+    """fetch_page(after) returns the page items and the cursor of the next page (None on the last one)."""
+    if not prefetch:
+        after = None
+        while True:
+            items, after = fetch_page(after)
+            yield from items
+            if after is None:
+                return
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hubspot-prefetch")
+    try:
+        future = executor.submit(fetch_page, None)
+        while True:
+            items, after = future.result()
+            if after is not None:
+                future = executor.submit(fetch_page, after)
+            yield from items
+            if after is None:
+                return
+    finally:
+        # Also when the caller stops early, the pending prefetch is left to finish on its own.
+        executor.shutdown(wait=False)
+
+
+def iter_owners(
+    api_client: HubSpot, limit: int = HUBSPOT_OWNERS_PAGE_LIMIT, prefetch: bool = True
+) -> Iterator[Any]:
+    """All owners of the portal, one PublicOwner at a time."""
+
+    def fetch_page(after: Optional[str]):
+        response = api_client.crm.owners.owners_api.get_page(limit=limit, after=after)
+        next_page = response.paging.next if response.paging is not None else None
+        return response.results or [], (
+            next_page.after if next_page is not None else None
+        )
+
+    return _iter_pages(fetch_page, prefetch)
+
+
+def iter_objects(
+    api_client: HubSpot,
+    hub_id: Optional[str],
+    object_type: ObjectType,
+    form: FormDefinition,
+    limit: int = HUBSPOT_OBJECTS_PAGE_LIMIT,
+    prefetch: bool = True,
+) -> Iterator[HubspotObject]:
+    """All objects of the type, e.g. a contact export, with only the form's properties."""
+    properties = list(form_property_names(form))
+
+    def fetch_page(after: Optional[str]):
+        # Raw bytes: for a page of 100 objects the SDK model deserialization costs more than the request.
+        response = api_client.crm.objects.basic_api.get_page(
+            object_type.value,
+            limit=limit,
+            after=after,
+            properties=properties,
+            _preload_content=False,
+        )
+        # Projected while decoding, the properties of a result are never built as a full dict.
+        objects, paging = HubspotObject.list_from_api_page_bytes(
+            hub_id, object_type, form, response.data
+        )
+        next_page = (paging or {}).get("next")
+        return objects, next_page["after"] if next_page is not None else None
+
+    return _iter_pages(fetch_page, prefetch)
@@ -0,0 +1,138 @@
+# One process-wide urllib3 connection pool for all HubSpot tenants.
+# hubspot.Client builds a new ApiClient (and with it a new PoolManager) for every `client.crm.contacts.basic_api`
+# style access, so each tenant and each burst of requests pays for a fresh TLS handshake to api.hubapi.com.
+# The access token travels in the per-request Authorization header, so sharing the sockets between tenants is safe.
+#
+# Usage, optionally together with the rate limiter:
+#   api_client = hubspot.Client.create(
+#       access_token=..., api_factory=pooled_api_factory(rate_limited_api_factory(hub_id))
+#   )
+import socket
+import ssl
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import urllib3
+from hubspot.discovery.discovery_base import DiscoveryBase
+from urllib3.connection import HTTPConnection
+
+DEFAULT_NUM_POOLS = 4
+# Max open sockets kept per host, roughly the number of threads talking to HubSpot at the same time.
+DEFAULT_MAXSIZE = 16
+
+# One PoolManager per distinct TLS setup of the SDK configurations (normally there is just the default one),
+# a client with its own CA bundle or verify_ssl=False must not end up on sockets verified differently.
+_shared_pool_managers: Dict[Tuple[Tuple[str, Any], ...], urllib3.PoolManager] = {}
+_shared_pool_kwargs: Dict[str, Any] = {}
+_shared_pool_lock = threading.Lock()
+
+
+def configure_shared_pool(
+    maxsize: int = DEFAULT_MAXSIZE,
+    num_pools: int = DEFAULT_NUM_POOLS,
+    block: bool = False,
+    keep_alive: bool = True,
+    http2: bool = False,
+) -> urllib3.PoolManager:
+    """(Re)creates the shared pools, call it once at worker startup before creating clients.
+
+    With block=True callers wait for a free connection instead of opening (and then discarding) extra ones.
+    http2 needs urllib3>=2.3 with the `h2` package installed, otherwise we stay on HTTP/1.1 keep-alive.
+    Returns the pool for the default SDK configuration.
+    """
+    socket_options = list(HTTPConnection.default_socket_options)
+    if keep_alive:
+        # HTTP/1.1 connections are persistent by default, TCP keep-alive stops idle ones being silently dropped.
+        socket_options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+
+    if http2:
+        try:
+            from urllib3 import http2 as urllib3_http2
+
+            urllib3_http2.inject_into_urllib3()
+        except ImportError as e:
+            print(f"WARNING: HTTP/2 not available, staying on HTTP/1.1: {e}")
+
+    with _shared_pool_lock:
+        for pool_manager in _shared_pool_managers.values():
+            pool_manager.clear()
+        _shared_pool_managers.clear()
+        _shared_pool_kwargs.clear()
+        _shared_pool_kwargs.update(
+            num_pools=num_pools,
+            maxsize=maxsize,
+            block=block,
+            socket_options=socket_options,
+        )
+    return get_shared_pool()
+
+
+def _tls_settings(configuration) -> Tuple[Tuple[str, Any], ...]:
+    # Same as the SDK's RESTClientObject passes to its own PoolManager, None being the default Configuration.
+    settings = {
+        "cert_reqs": (
+            ssl.CERT_REQUIRED
+            if getattr(configuration, "verify_ssl", True)
+            else ssl.CERT_NONE
+        ),
+        "ca_certs": getattr(configuration, "ssl_ca_cert", None),
+        "cert_file": getattr(configuration, "cert_file", None),
+        "key_file": getattr(configuration, "key_file", None),
+    }
+    for name in ("assert_hostname", "retries"):
+        value = getattr(configuration, name, None)
+        if value is not None:
+            settings[name] = value
+    return tuple(sorted(settings.items()))
+
+
+def get_shared_pool(configuration=None) -> urllib3.PoolManager:
+    """The shared pool for the TLS settings of an SDK Configuration."""
+    if not _shared_pool_kwargs:
+        configure_shared_pool()
+    key = _tls_settings(configuration)
+    with _shared_pool_lock:
+        pool_manager = _shared_pool_managers.get(key)
+        if pool_manager is None:
+            pool_manager = urllib3.PoolManager(**_shared_pool_kwargs, **dict(key))
+            _shared_pool_managers[key] = pool_manager
+        return pool_manager
+
+
+def shared_pool_stats() -> Dict[str, int]:
+    """Connection reuse counters, `reused_requests` going up while `connections_opened` stays flat is the goal.
+
+    NOTE: Counters of per-host pools evicted from the PoolManager (more than num_pools hosts) are lost.
+    """
+    with _shared_pool_lock:
+        pool_managers = list(_shared_pool_managers.values())
+    connections_opened = 0
+    requests = 0
+    for pool_manager in pool_managers:
+        for key in pool_manager.pools.keys():
+            pool = pool_manager.pools.get(key)
+            if pool is None:
+                continue
+            connections_opened += pool.num_connections
+            requests += pool.num_requests
+    return {
+        "connections_opened": connections_opened,
+        "requests": requests,
+        "reused_requests": max(0, requests - connections_opened),
+    }
+
+
+def pooled_api_factory(base_factory: Optional[Callable] = None) -> Callable:
+    """An `api_factory` for hubspot.Client which sends all requests through the shared pool."""
+    base_factory = base_factory or DiscoveryBase._default_api_factory
+
+    def api_factory(api_client_package, api_name, config):
+        api = base_factory(api_client_package, api_name, config)
+        rest_client = api.api_client.rest_client
+        configuration = api.api_client.configuration
+        # Proxied clients keep their own ProxyManager.
+        if not configuration.proxy:
+            rest_client.pool_manager = get_shared_pool(configuration)
+        return api
+
+    return api_factory
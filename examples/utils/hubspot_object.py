@@ -1,19 +1,182 @@
+import json
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
 
-def _get_field(fields: List[FieldDefinition], name: str):
-    for field in fields:
-        if field.name == name:
-            return field
+from app.hubspot_models import FieldDefinition, FieldNames, ObjectType
+from common.form import FormDefinition
+
+
+class _FormLayout:
+    """Field positions of a form, interned so that all objects of the same form share one instance."""
+
+    __slots__ = ("form", "index", "positions", "names")
+
+    def __init__(self, form: FormDefinition):
+        self.form = form
+        self.index: Dict[str, FieldDefinition] = {}
+        self.positions: Dict[str, int] = {}
+        for field in form.fields:
+            # Keep the first definition on duplicates, same as the previous linear scan did.
+            if field.name not in self.index:
+                self.positions[field.name] = len(self.index)
+                self.index[field.name] = field
+        self.names: Tuple[str, ...] = tuple(self.index)
+
+
+# Forms are long-lived singletons (see get_form), so we index them once by identity. The layout keeps a reference
+# to its form so a recycled id() can never hand out a stale layout.
+_form_layouts: Dict[int, _FormLayout] = {}
+# HubSpot responses carry hundreds of properties we don't care about, printing each of them drowns the logs.
+_unknown_field_counts: Counter = Counter()
+
+
+def _get_form_layout(form: FormDefinition) -> _FormLayout:
+    layout = _form_layouts.get(id(form))
+    if layout is None or layout.form is not form:
+        layout = _FormLayout(form)
+        _form_layouts[id(form)] = layout
+    return layout
+
+
+def get_field_index(form: FormDefinition) -> Dict[str, FieldDefinition]:
+    return _get_form_layout(form).index
+
+
+def form_property_names(form: FormDefinition) -> Tuple[str, ...]:
+    """The HubSpot property names to request for a form, in field order."""
+    return _get_form_layout(form).names
+
+
+def unknown_field_counts() -> Dict[str, int]:
+    return dict(_unknown_field_counts)
+
+
+def _get_field(form: FormDefinition, name: str) -> Optional[FieldDefinition]:
+    field = get_field_index(form).get(name)
+    if field is not None:
+        return field
 
     # This function is oftentimes used to check if name is in the field list so only warning.
-    # It's a bit annoying, but can be lifesaving when developing.
-    print(f"WARNING: Requested field {name} not in list")
+    # It's a bit annoying, but can be lifesaving when developing - so we only print it the first time.
+    _unknown_field_counts[name] += 1
+    if _unknown_field_counts[name] == 1:
+        print(
+            f"WARNING: Requested field {name} not in list (further occurrences are only counted)"
+        )
     return None
 
 
+_UNSET = object()
+
+
+# The stdlib scanner, for the parts of a response we walk ourselves, see HubspotObject.from_api_response_bytes.
+_scan_value = json.JSONDecoder().scan_once
+_skip_whitespace = json.decoder.WHITESPACE.match
+
+
+class _PropertiesDecoder(json.JSONDecoder):
+    """Decodes a `properties` object projected on the form fields.
+
+    The pairs of all other properties get dropped in the object hook, before a dict is built for them. The hook
+    also runs for objects nested in a property value, so `objects` counts the calls to spot those.
+    """
+
+    def __init__(self, positions: Dict[str, int]):
+        super().__init__(object_pairs_hook=self._project)
+        self._positions = positions
+        self.objects = 0
+
+    def _project(self, pairs: List[Tuple[str, Any]]) -> Dict[str, Any]:
+        self.objects += 1
+        positions = self._positions
+        return {key: value for key, value in pairs if key in positions}
+
+
+def _scan(s: str, idx: int, scan_once=_scan_value) -> Tuple[Any, int]:
+    try:
+        return scan_once(s, idx)
+    except StopIteration as e:
+        raise json.JSONDecodeError("Expecting value", s, e.value) from None
+
+
+def _walk_object(s: str, idx: int, read_value: Callable[[str, int], int]) -> int:
+    """Walks the JSON object starting at s[idx], read_value(key, idx) consumes each value and returns its end."""
+    idx = _skip_whitespace(s, idx + 1).end()
+    if s[idx : idx + 1] == "}":
+        return idx + 1
+    while True:
+        if s[idx : idx + 1] != '"':
+            raise json.JSONDecodeError(
+                "Expecting property name enclosed in double quotes", s, idx
+            )
+        key, idx = json.decoder.scanstring(s, idx + 1)
+        idx = _skip_whitespace(s, idx).end()
+        if s[idx : idx + 1] != ":":
+            raise json.JSONDecodeError("Expecting ':' delimiter", s, idx)
+        idx = read_value(key, _skip_whitespace(s, idx + 1).end())
+        idx = _skip_whitespace(s, idx).end()
+        if s[idx : idx + 1] == "}":
+            return idx + 1
+        if s[idx : idx + 1] != ",":
+            raise json.JSONDecodeError("Expecting ',' delimiter", s, idx)
+        idx = _skip_whitespace(s, idx + 1).end()
+
+
+def _walk_array(s: str, idx: int, read_item: Callable[[int], int]) -> int:
+    """Same for the JSON array starting at s[idx], read_item(idx) consumes each item and returns its end."""
+    idx = _skip_whitespace(s, idx + 1).end()
+    if s[idx : idx + 1] == "]":
+        return idx + 1
+    while True:
+        idx = _skip_whitespace(s, read_item(idx)).end()
+        if s[idx : idx + 1] == "]":
+            return idx + 1
+        if s[idx : idx + 1] != ",":
+            raise json.JSONDecodeError("Expecting ',' delimiter", s, idx)
+        idx = _skip_whitespace(s, idx + 1).end()
+
+
+def _walk_document(s: str, read_top: Callable[[str, int], int]) -> bool:
+    """Walks a whole JSON document with _walk_object, returns False (after validating it) when it isn't an object."""
+    idx = _skip_whitespace(s, 0).end()
+    is_object = s[idx : idx + 1] == "{"
+    if is_object:
+        idx = _walk_object(s, idx, read_top)
+    else:
+        _, idx = _scan(s, idx)
+    idx = _skip_whitespace(s, idx).end()
+    if idx != len(s):
+        raise json.JSONDecodeError("Extra data", s, idx)
+    return is_object
+
+
+def _decode_properties(
+    s: str, idx: int, layout: "_FormLayout"
+) -> Tuple[Optional[Dict[str, Any]], int]:
+    if s[idx : idx + 1] != "{":
+        _, idx = _scan(s, idx)
+        return None, idx
+    decoder = _PropertiesDecoder(layout.positions)
+    props, end = _scan(s, idx, decoder.scan_once)
+    if decoder.objects > 1:
+        # A property value holds an object of its own, which the hook projected as well: decode those in full.
+        props, end = _scan(s, idx)
+        props = {key: value for key, value in props.items() if key in layout.positions}
+    return props, end
+
+
 # This class will act as the value storage
 # TODO(P1, devx): This starts to feel like FormData, once HubSpot becomes important again we can think of refactor
 #  - would need some custom display transformers for e.g. get_link.
 class HubspotObject:
+    # We keep tens of thousands of these in memory during reconciliation runs. So no per-object __dict__ and
+    # no per-object data dict: values sit in a list indexed by the field position in the (shared) form layout.
+    # tracemalloc, 12-field form with 10 values set, excluding the values: ~390 B -> ~225 B per object (Python 3.11).
+    __slots__ = ("hub_id", "object_type", "_layout", "_values")
+
     def __init__(
         self,
         hub_id: Optional[str],
@@ -28,8 +191,24 @@ class HubspotObject:
             print(f"WARNING: invalid hub_id {hub_id} given, expected int: {e}")
 
         self.object_type = object_type
-        self.form = form
-        self.data = {}  # you can just plug into properties
+        self._layout = _get_form_layout(form)
+        self._values = [_UNSET] * len(self._layout.names)
+
+    @property
+    def form(self) -> FormDefinition:
+        return self._layout.form
+
+    @property
+    def data(self) -> Mapping[str, Any]:
+        """Read-only view of the set values, writing to it raises TypeError - use set_field_value instead."""
+        names = self._layout.names
+        return MappingProxyType(
+            {
+                names[pos]: value
+                for pos, value in enumerate(self._values)
+                if value is not _UNSET
+            }
+        )
 
     @classmethod
     def from_api_response_props(
@@ -44,18 +223,109 @@ class HubspotObject:
 
         # Hubspot response has many more fields than what we care about - so this will end up ignoring a bunch.
         result = HubspotObject(hub_id=hub_id, object_type=object_type, form=form)
+        positions = result._layout.positions
+        values = result._values
         for field_name, value in response_props.items():
-            result.set_field_value(field_name, value)
+            pos = positions.get(field_name)
+            if pos is None:
+                _unknown_field_counts[field_name] += 1
+            else:
+                values[pos] = value
         return result
 
+    @classmethod
+    def from_api_response_bytes(
+        cls,
+        hub_id: Optional[str],
+        object_type: ObjectType,
+        form: FormDefinition,
+        raw_response: Union[bytes, str],
+    ) -> Optional["HubspotObject"]:
+        """Like from_api_response_props, but straight from the raw JSON of a single-object response.
+
+        Only the top level `properties` gets decoded, and only its form fields make it into a dict - the rest of the
+        property map (hundreds of entries for contacts) is dropped pair by pair. Everything else is only validated.
+        """
+        layout = _get_form_layout(form)
+        found: Dict[str, Any] = {}
+
+        def read_top(key: str, idx: int) -> int:
+            if key == "properties":
+                found[key], idx = _decode_properties(s, idx, layout)
+                return idx
+            return _scan(s, idx)[1]
+
+        s = (
+            raw_response.decode("utf-8")
+            if isinstance(raw_response, (bytes, bytearray))
+            else raw_response
+        )
+        if not _walk_document(s, read_top) or found.get("properties") is None:
+            return None
+        return cls.from_api_response_props(
+            hub_id, object_type, form, found["properties"]
+        )
+
+    @classmethod
+    def list_from_api_page_bytes(
+        cls,
+        hub_id: Optional[str],
+        object_type: ObjectType,
+        form: FormDefinition,
+        raw_page: Union[bytes, str],
+    ) -> Tuple[List["HubspotObject"], Optional[Dict[str, Any]]]:
+        """Same for a page of a list / search response: an object per result, and the page's `paging`."""
+        layout = _get_form_layout(form)
+        objects: List[HubspotObject] = []
+        page: Dict[str, Any] = {}
+
+        def read_result(idx: int) -> int:
+            result: Dict[str, Any] = {}
+
+            def read_value(key: str, idx: int) -> int:
+                if key == "properties":
+                    result[key], idx = _decode_properties(s, idx, layout)
+                    return idx
+                return _scan(s, idx)[1]
+
+            if s[idx : idx + 1] == "{":
+                idx = _walk_object(s, idx, read_value)
+            else:
+                _, idx = _scan(s, idx)
+            props = result.get("properties") or {}
+            objects.append(
+                cls.from_api_response_props(hub_id, object_type, form, props)
+            )
+            return idx
+
+        def read_top(key: str, idx: int) -> int:
+            if key == "results" and s[idx : idx + 1] == "[":
+                return _walk_array(s, idx, read_result)
+            page[key], idx = _scan(s, idx)
+            return idx
+
+        s = (
+            raw_page.decode("utf-8")
+            if isinstance(raw_page, (bytes, bytearray))
+            else raw_page
+        )
+        if not _walk_document(s, read_top):
+            return [], None
+        return objects, page.get("paging")
+
     def get_field(self, field_name):
-        return _get_field(self.form.fields, field_name)
+        return _get_field(self.form, field_name)
+
+    def has_value(self, field_name: str) -> bool:
+        pos = self._layout.positions.get(field_name)
+        return pos is not None and self._values[pos] is not _UNSET
 
     def set_field_value(self, field_name: str, value: Any, raise_key_error=False):
-        field = self.get_field(field_name)
-        if bool(field):
-            self.data[field_name] = value
+        pos = self._layout.positions.get(field_name)
+        if pos is not None:
+            self._values[pos] = value
         else:
+            _get_field(self.form, field_name)  # for the warning
             # print(f"INFO: omitting `{field_name}` from")
             if raise_key_error:
                 raise KeyError(
@@ -63,9 +333,12 @@ class HubspotObject:
                 )
 
     def get_display_value(self, field_name: str) -> str:
-        field = self.get_field(field_name)
-        if bool(field):
-            return field.display_value(self.data.get(field_name))
+        pos = self._layout.positions.get(field_name)
+        if pos is not None:
+            value = self._values[pos]
+            field = self._layout.index[field_name]
+            return field.display_value(None if value is _UNSET else value)
+        _get_field(self.form, field_name)  # for the warning
         return "None"
 
     def get_field_display_label_with_value(self, field_name: str) -> Tuple[str, Any]:
@@ -98,10 +371,16 @@ class HubspotObject:
         return None
 
 
-@dataclass
+# Slots for the entries too (~170 B -> ~120 B per entry on Python 3.11), dataclass supports it from Python 3.10.
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class HubspotDataEntry:
     transcript: str
-    state: str = "new"  # "short", "incomplete", "error_gpt", "error_hubspot_sync", "warning_already_created", "success"
+    state: str = (
+        "new"  # "short", "incomplete", "error_gpt", "error_hubspot_sync", "warning_already_created", "success"
+    )
 
     contact: Optional[HubspotObject] = None
     call: Optional[HubspotObject] = None
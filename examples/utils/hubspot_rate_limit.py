@@ -0,0 +1,209 @@
+# Client-side rate limiting for HubSpot, shared by all clients of the same portal (hub_id) in the process.
+# HubSpot enforces a burst limit (e.g. 110 requests / 10 seconds for OAuth apps) and a daily limit per portal,
+# https://developers.hubspot.com/docs/api/usage-details#rate-limits
+#
+# Usage, every request made through this client waits for a token and retries on 429:
+#   api_client = hubspot.Client.create(access_token=..., api_factory=rate_limited_api_factory(hub_id))
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from hubspot.discovery.discovery_base import DiscoveryBase
+
+DEFAULT_MAX_REQUESTS = 110
+DEFAULT_INTERVAL_SECONDS = 10.0
+DEFAULT_MAX_RETRIES = 5
+# Used when a 429 comes without Retry-After, doubled for each attempt (with full jitter).
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+HEADER_MAX = "x-hubspot-ratelimit-max"
+HEADER_REMAINING = "x-hubspot-ratelimit-remaining"
+HEADER_INTERVAL_MS = "x-hubspot-ratelimit-interval-milliseconds"
+HEADER_DAILY = "x-hubspot-ratelimit-daily"
+HEADER_DAILY_REMAINING = "x-hubspot-ratelimit-daily-remaining"
+HEADER_RETRY_AFTER = "retry-after"
+
+
+@dataclass
+class RateLimitBudget:
+    burst_remaining: int
+    burst_max: int
+    interval_seconds: float
+    daily_remaining: Optional[int] = None
+    daily_max: Optional[int] = None
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class HubspotRateLimiter:
+    """Token bucket which HubSpot's X-HubSpot-RateLimit-* response headers keep in sync with the server."""
+
+    def __init__(
+        self,
+        max_requests: int = DEFAULT_MAX_REQUESTS,
+        interval_seconds: float = DEFAULT_INTERVAL_SECONDS,
+    ):
+        self._lock = threading.Lock()
+        self.max_requests = max_requests
+        self.interval_seconds = interval_seconds
+        self.daily_max: Optional[int] = None
+        self.daily_remaining: Optional[int] = None
+        self._tokens = float(max_requests)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        rate = self.max_requests / self.interval_seconds
+        self._tokens = min(
+            float(self.max_requests), self._tokens + (now - self._updated_at) * rate
+        )
+        self._updated_at = now
+
+    def acquire(self) -> None:
+        """Blocks until a request can be made."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait_seconds = self._blocked_until - now
+                if wait_seconds <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    rate = self.max_requests / self.interval_seconds
+                    wait_seconds = (1 - self._tokens) / rate
+            time.sleep(wait_seconds)
+
+    def back_off(self, seconds: float) -> None:
+        """Nobody for this portal sends anything for `seconds`, e.g. after a 429 with Retry-After."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers: Optional[Mapping[str, str]]) -> None:
+        if not headers:
+            return
+        headers = {str(k).lower(): v for k, v in headers.items()}
+        with self._lock:
+            self._refill(time.monotonic())
+            max_requests = _int_header(headers, HEADER_MAX)
+            if max_requests is not None and max_requests > 0:
+                self.max_requests = max_requests
+            interval_ms = _int_header(headers, HEADER_INTERVAL_MS)
+            if interval_ms is not None and interval_ms > 0:
+                self.interval_seconds = interval_ms / 1000
+            # The server is authoritative, other processes spend from the same portal budget.
+            remaining = _int_header(headers, HEADER_REMAINING)
+            if remaining is not None:
+                self._tokens = min(self._tokens, float(remaining))
+
+            daily_max = _int_header(headers, HEADER_DAILY)
+            if daily_max is not None:
+                self.daily_max = daily_max
+            daily_remaining = _int_header(headers, HEADER_DAILY_REMAINING)
+            if daily_remaining is not None:
+                self.daily_remaining = daily_remaining
+
+    def remaining(self) -> RateLimitBudget:
+        with self._lock:
+            self._refill(time.monotonic())
+            return RateLimitBudget(
+                burst_remaining=int(self._tokens),
+                burst_max=self.max_requests,
+                interval_seconds=self.interval_seconds,
+                daily_remaining=self.daily_remaining,
+                daily_max=self.daily_max,
+            )
+
+
+_limiters: Dict[Any, HubspotRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(hub_id: Any) -> HubspotRateLimiter:
+    with _limiters_lock:
+        if hub_id not in _limiters:
+            _limiters[hub_id] = HubspotRateLimiter()
+        return _limiters[hub_id]
+
+
+def _retry_delay_seconds(headers: Mapping[str, str], attempt: int) -> float:
+    retry_after = headers.get(HEADER_RETRY_AFTER)
+    if retry_after is not None:
+        try:
+            # A bit of jitter so all the waiting workers don't hit HubSpot in the same millisecond.
+            return float(retry_after) + random.uniform(0, 1)
+        except ValueError:
+            pass
+    return random.uniform(
+        0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt)
+    )
+
+
+def with_rate_limit(
+    request: Callable[..., Any],
+    limiter: HubspotRateLimiter,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+) -> Callable[..., Any]:
+    """Wraps a RESTClientObject.request so it waits for a token and retries 429s."""
+
+    def request_with_rate_limit(*args, **kwargs):
+        attempt = 0
+        while True:
+            limiter.acquire()
+            try:
+                response = request(*args, **kwargs)
+            except Exception as e:
+                # Every hubspot.* package has its own ApiException class, they all carry status and headers.
+                headers = {
+                    str(k).lower(): v
+                    for k, v in (getattr(e, "headers", None) or {}).items()
+                }
+                limiter.update_from_headers(headers)
+                if (
+                    getattr(e, "status", None) != HTTPStatus.TOO_MANY_REQUESTS
+                    or attempt >= max_retries
+                ):
+                    raise
+                delay = _retry_delay_seconds(headers, attempt)
+                print(
+                    f"WARNING: HubSpot rate limited us, retry {attempt + 1}/{max_retries} in {delay:.1f}s"
+                )
+                limiter.back_off(delay)
+                attempt += 1
+                continue
+
+            # RESTResponse, or the raw urllib3 response when called with _preload_content=False.
+            if hasattr(response, "getheaders"):
+                limiter.update_from_headers(response.getheaders())
+            else:
+                limiter.update_from_headers(getattr(response, "headers", None))
+            return response
+
+    return request_with_rate_limit
+
+
+def rate_limited_api_factory(
+    hub_id: Any,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    base_factory: Optional[Callable] = None,
+) -> Callable:
+    """An `api_factory` for hubspot.Client which routes every request through the portal's rate limiter."""
+    base_factory = base_factory or DiscoveryBase._default_api_factory
+    limiter = get_rate_limiter(hub_id)
+
+    def api_factory(api_client_package, api_name, config):
+        api = base_factory(api_client_package, api_name, config)
+        rest_client = api.api_client.rest_client
+        rest_client.request = with_rate_limit(rest_client.request, limiter, max_retries)
+        return api
+
+    return api_factory
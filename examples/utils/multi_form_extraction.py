@@ -0,0 +1,142 @@
+# Fills several forms from the same text with a single GPT call.
+# The pipeline extracts a contact, a meeting and a task from each transcript - three fill_in_form calls which
+# each send (and bill) the whole transcript. Here the forms are merged into one FormDefinition with namespaced
+# field names ("contact__firstname"), filled once, and the output is split back into one FormData per form.
+# Whatever doesn't come back valid is extracted again with its own fill_in_form call.
+#
+# Usage:
+#   (contact, err), (call, err), (task, err) = fill_in_forms(
+#       gpt_client, [(contact_form, False), (call_form, True), (task_form, True)], text
+#   )
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from common.form import FormData, FormDefinition
+
+FIELD_NAME_SEPARATOR = "__"
+FORM_NAME_SEPARATOR = "+"
+
+FormResult = Tuple[Optional[FormData], Optional[str]]
+
+
+def _form_prefix(form: FormDefinition) -> str:
+    return str(getattr(form.name, "value", form.name))
+
+
+def combine_forms(forms: Sequence[FormDefinition]) -> FormDefinition:
+    """One form with the fields of all, named after all of them (e.g. "hubspot_contact+hubspot_task")."""
+    fields = []
+    for form in forms:
+        prefix = _form_prefix(form)
+        for field in form.fields:
+            combined_field = copy.copy(field)
+            combined_field.name = f"{prefix}{FIELD_NAME_SEPARATOR}{field.name}"
+            # The label is what GPT sees next to the value, so it has to tell the contact's name from the task's.
+            combined_field.label = f"{prefix}: {field.label}"
+            fields.append(combined_field)
+    return FormDefinition(
+        FORM_NAME_SEPARATOR.join(_form_prefix(form) for form in forms), fields
+    )
+
+
+def _has_value(data: Dict, name: str) -> bool:
+    return data.get(name) not in (None, "")
+
+
+def _missing_required_fields(form: FormDefinition, data: Dict) -> List[str]:
+    # Not every FieldDefinition knows `required`, those fields are all optional.
+    return [
+        field.name
+        for field in form.fields
+        if getattr(field, "required", False) and not _has_value(data, field.name)
+    ]
+
+
+def split_form_data(
+    forms: Sequence[FormDefinition], combined_data: Dict
+) -> List[Optional[FormData]]:
+    """One FormData per form, None for the forms which didn't validate.
+
+    A form counts as failed too when none of its fields came back, or a required one is missing: with one
+    prompt for all forms GPT sometimes skips a form entirely, which its own fill_in_form call wouldn't do.
+    """
+    values: Dict[str, Dict] = {_form_prefix(form): {} for form in forms}
+    for combined_name, value in combined_data.items():
+        prefix, _, name = combined_name.partition(FIELD_NAME_SEPARATOR)
+        if prefix in values:
+            values[prefix][name] = value
+
+    results = []
+    for form in forms:
+        data = values[_form_prefix(form)]
+        if not any(_has_value(data, name) for name in data):
+            print(f"WARNING: combined extraction for {form.name} has no fields")
+            results.append(None)
+            continue
+        missing = _missing_required_fields(form, data)
+        if missing:
+            print(
+                f"WARNING: combined extraction for {form.name} misses required fields {missing}"
+            )
+            results.append(None)
+            continue
+        try:
+            results.append(FormData(form, data))
+        except Exception as e:
+            print(f"WARNING: combined extraction for {form.name} did not validate: {e}")
+            results.append(None)
+    return results
+
+
+def fill_in_forms(
+    gpt_client,
+    forms: Sequence[Tuple[FormDefinition, bool]],
+    text: str,
+    extraction_cache=None,
+) -> List[FormResult]:
+    """
+    forms: (form, use_current_time) pairs, results are in the same order,
+    extraction_cache: optional ExtractionCache, used for the combined and the fallback calls alike.
+
+    NOTE: use_current_time is per prompt, so the combined call has it as soon as one form wants it - and the
+    other forms (e.g. the contact) see the current time too. That only matters for their date fields, a fallback
+    call goes with the form's own flag again.
+    """
+
+    def _fill_in_form(form: FormDefinition, use_current_time: bool) -> FormResult:
+        if extraction_cache is not None:
+            return extraction_cache.fill_in_form(
+                gpt_client, form=form, text=text, use_current_time=use_current_time
+            )
+        return gpt_client.fill_in_form(
+            form=form, text=text, use_current_time=use_current_time
+        )
+
+    form_definitions = [form for form, _ in forms]
+    results: List[Optional[FormResult]] = [None] * len(forms)
+    try:
+        combined_data, err = _fill_in_form(
+            combine_forms(form_definitions),
+            any(use_current_time for _, use_current_time in forms),
+        )
+    except Exception as e:
+        combined_data, err = None, str(e)
+    if combined_data is not None and err is None:
+        for i, form_data in enumerate(
+            split_form_data(form_definitions, combined_data.to_dict())
+        ):
+            if form_data is not None:
+                results[i] = (form_data, None)
+    else:
+        print(
+            f"WARNING: combined extraction failed, falling back to one call per form: {err}"
+        )
+
+    fallback = [i for i, result in enumerate(results) if result is None]
+    if fallback:
+        with ThreadPoolExecutor(max_workers=len(fallback)) as executor:
+            futures = {i: executor.submit(_fill_in_form, *forms[i]) for i in fallback}
+            for i, future in futures.items():
+                results[i] = future.result()
+    return results
@@ -0,0 +1,72 @@
+# Loads the per-portal FormDefinitions written by examples/generate_models_from_api_response.py,
+# so a worker imports a prebuilt module instead of calling the properties API and building FieldDefinitions.
+#
+# Usage:
+#   contact_form = get_form(FormName.HUBSPOT_CONTACT, hub_id=hub_id)
+# which prefers the portal's prebuilt form and falls back to app.form_library.get_form.
+import importlib
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from app import form_library
+from common.form import FormDefinition, FormName
+
+DEFAULT_PREBUILT_FORMS_PACKAGE = "examples.generated_forms"
+
+FORM_NAMES_BY_OBJECT_TYPE = {
+    "contact": FormName.HUBSPOT_CONTACT,
+    "call": FormName.HUBSPOT_MEETING,
+    "task": FormName.HUBSPOT_TASK,
+}
+
+# Misses are kept too, a failed import costs ~40us and get_form runs several times per data entry.
+# A portal whose module gets generated while the worker runs needs a clear_prebuilt_forms_cache().
+_prebuilt_forms: Dict[Tuple[Any, str], Optional[Mapping[FormName, FormDefinition]]] = {}
+
+
+def prebuilt_forms_module_name(hub_id: Any) -> str:
+    return f"hubspot_forms_{hub_id}"
+
+
+def load_prebuilt_forms(
+    hub_id: Any, package: str = DEFAULT_PREBUILT_FORMS_PACKAGE
+) -> Optional[Mapping[FormName, FormDefinition]]:
+    """None when nothing was generated for the portal yet, callers then fall back to get_form / the API.
+
+    The result is shared by all callers, so the mapping is read-only. The FormDefinitions in it are not, they are
+    long-lived singletons just like the ones of form_library.get_form - so never change them in place.
+    """
+    key = (hub_id, package)
+    if key in _prebuilt_forms:
+        return _prebuilt_forms[key]
+
+    module_name = f"{package}.{prebuilt_forms_module_name(hub_id)}"
+    try:
+        module = importlib.import_module(module_name)
+    except ModuleNotFoundError as e:
+        # Only "not generated", a broken import inside the generated module should still blow up.
+        if e.name not in (package, module_name):
+            raise
+        forms = None
+    else:
+        forms = MappingProxyType(dict(module.FORMS))
+    _prebuilt_forms[key] = forms
+    return forms
+
+
+def clear_prebuilt_forms_cache() -> None:
+    """Call after generating or regenerating a portal's module in a running process (reload a regenerated one)."""
+    _prebuilt_forms.clear()
+
+
+def get_form(
+    form_name: FormName,
+    hub_id: Optional[Any] = None,
+    package: str = DEFAULT_PREBUILT_FORMS_PACKAGE,
+) -> FormDefinition:
+    """The portal's prebuilt form when there is one, otherwise the default one of form_library."""
+    if hub_id is not None:
+        forms = load_prebuilt_forms(hub_id, package)
+        if forms is not None and form_name in forms:
+            return forms[form_name]
+    return form_library.get_form(form_name)
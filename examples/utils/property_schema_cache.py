@@ -0,0 +1,192 @@
+# Cache for the CRM properties API (the schema of contacts, calls, tasks ... in a portal),
+# keyed by (hub_id, object_type).
+# The properties API is slow and returns hundreds of kilobytes for contacts, while the schema changes maybe once
+# a month - so we only ask once per portal per TTL, and even then with If-None-Match when we have an ETag.
+#
+# Usage:
+#   schema_cache = PropertySchemaCache(cache_dir="/tmp/hubspot-schemas")
+#   props = schema_cache.get(api_client, hub_id, "contact")  # same as `list_custom_properties(...)`
+#   _gen_form_from_properties_api_response(FormName.HUBSPOT_CONTACT, props.results)
+import json
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Any, Dict, Optional, Tuple
+
+from hubspot import HubSpot
+from hubspot.crm.properties import ApiClient, ApiException
+
+DEFAULT_TTL_SECONDS = 60 * 60
+
+
+@dataclass
+class _SchemaEntry:
+    body: bytes  # the raw response, that's what goes to disk and what an ETag describes
+    etag: Optional[str]
+    fetched_at: float
+    collection: Any = None  # CollectionResponsePropertyNoPaging, deserialized lazily
+
+
+class _RawResponse:
+    """What ApiClient.deserialize needs from a response."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def properties_from_response_body(body: bytes):
+    """Deserializes a raw properties API response (or a saved fixture of one) into the SDK model."""
+    return ApiClient().deserialize(
+        _RawResponse(body), "CollectionResponsePropertyNoPaging"
+    )
+
+
+class PropertySchemaCache:
+    def __init__(
+        self, ttl_seconds: float = DEFAULT_TTL_SECONDS, cache_dir: Optional[str] = None
+    ):
+        """cache_dir: optional on-disk layer, so fresh processes (and other workers on the box) share the schemas."""
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir = cache_dir
+        self._entries: Dict[Tuple[str, str], _SchemaEntry] = {}
+        self._lock = threading.Lock()
+        # One lock per (hub_id, object_type), so concurrent misses of the same schema collapse into a single fetch.
+        self._fetch_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._metrics: Counter = Counter()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _fetch_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            if key not in self._fetch_locks:
+                self._fetch_locks[key] = threading.Lock()
+            return self._fetch_locks[key]
+
+    def _count(self, metric: str) -> None:
+        with self._lock:
+            self._metrics[metric] += 1
+
+    def _is_fresh(self, entry: Optional[_SchemaEntry]) -> bool:
+        return entry is not None and time.time() - entry.fetched_at < self.ttl_seconds
+
+    def _path(self, hub_id: str, object_type: str) -> str:
+        return os.path.join(self.cache_dir, f"{hub_id}-{object_type}.json")
+
+    def _load_from_disk(self, hub_id: str, object_type: str) -> Optional[_SchemaEntry]:
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._path(hub_id, object_type)) as f:
+                stored = json.load(f)
+            return _SchemaEntry(
+                body=stored["body"].encode(),
+                etag=stored.get("etag"),
+                fetched_at=stored["fetched_at"],
+            )
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save_to_disk(self, hub_id: str, object_type: str, entry: _SchemaEntry):
+        if self.cache_dir is None:
+            return
+        path = self._path(hub_id, object_type)
+        # Write + rename so a concurrent reader never sees half a file.
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "body": entry.body.decode(),
+                    "etag": entry.etag,
+                    "fetched_at": entry.fetched_at,
+                },
+                f,
+            )
+        os.replace(tmp_path, path)
+
+    def _fetch(
+        self, api_client: HubSpot, object_type: str, stale: Optional[_SchemaEntry]
+    ) -> _SchemaEntry:
+        headers = {}
+        if stale is not None and stale.etag is not None:
+            headers["If-None-Match"] = stale.etag
+        try:
+            response = api_client.crm.properties.core_api.get_all(
+                object_type, _preload_content=False, _headers=headers
+            )
+        except ApiException as e:
+            if e.status == HTTPStatus.NOT_MODIFIED and stale is not None:
+                self._count("revalidated")
+                stale.fetched_at = time.time()
+                return stale
+            raise
+        self._count("fetched")
+        return _SchemaEntry(
+            body=response.data,
+            etag=response.headers.get("ETag"),
+            fetched_at=time.time(),
+        )
+
+    def get(self, api_client: HubSpot, hub_id: Any, object_type: str):
+        """Same as core_api.get_all(object_type), i.e. the response with `.results` being the ModelProperty list."""
+        key = (str(hub_id), object_type)
+        with self._lock:
+            entry = self._entries.get(key)
+        if self._is_fresh(entry):
+            self._count("hits")
+            return entry.collection
+
+        with self._fetch_lock(key):
+            with self._lock:
+                entry = self._entries.get(key)
+            # Whoever held the lock before us might have just fetched it.
+            if self._is_fresh(entry):
+                self._count("collapsed_fetches")
+                return entry.collection
+
+            if entry is None:
+                entry = self._load_from_disk(*key)
+                if entry is not None:
+                    self._count("disk_hits")
+            if self._is_fresh(entry):
+                self._count("hits")
+            else:
+                self._count("misses")
+                entry = self._fetch(api_client, object_type, stale=entry)
+                self._save_to_disk(*key, entry)
+
+            if entry.collection is None:
+                entry.collection = properties_from_response_body(entry.body)
+            with self._lock:
+                self._entries[key] = entry
+            return entry.collection
+
+    def invalidate(
+        self, hub_id: Optional[Any] = None, object_type: Optional[str] = None
+    ) -> None:
+        """E.g. after creating a custom property. Without arguments drops everything."""
+        with self._lock:
+            keys = [
+                key
+                for key in self._entries
+                if (hub_id is None or key[0] == str(hub_id))
+                and (object_type is None or key[1] == object_type)
+            ]
+            for key in keys:
+                del self._entries[key]
+        if self.cache_dir is None:
+            return
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(".json"):
+                continue
+            file_hub_id, _, file_object_type = file_name[: -len(".json")].partition("-")
+            if (hub_id is None or file_hub_id == str(hub_id)) and (
+                object_type is None or file_object_type == object_type
+            ):
+                os.remove(os.path.join(self.cache_dir, file_name))
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._metrics)
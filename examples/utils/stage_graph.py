@@ -0,0 +1,69 @@
+# Minimal dependency-graph executor: every stage runs as soon as all of its dependencies are done,
+# so independent network calls (GPT, HubSpot) overlap and wall-time approaches the critical path.
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from examples.utils.tracing import span, tracing_enabled
+
+
+@dataclass
+class Stage:
+    name: str
+    # Called with the results of `deps` as keyword arguments, e.g. fn(contact_gpt=..., call_gpt=...).
+    fn: Callable[..., Any]
+    deps: List[str] = field(default_factory=list)
+
+
+def _run_traced_stage(stage: Stage, kwargs: Dict[str, Any]) -> Any:
+    with span(f"stage.{stage.name}", stage=stage.name):
+        return stage.fn(**kwargs)
+
+
+def run_stage_graph(
+    stages: List[Stage], max_workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """Runs the stages on a thread pool and returns {stage_name: result}, re-raises the first failure."""
+    by_name = {stage.name: stage for stage in stages}
+    if len(by_name) != len(stages):
+        raise ValueError(f"duplicate stage names in {[s.name for s in stages]}")
+    for stage in stages:
+        unknown = [dep for dep in stage.deps if dep not in by_name]
+        if unknown:
+            raise ValueError(f"stage {stage.name} depends on unknown stages {unknown}")
+
+    traced = tracing_enabled()
+    results: Dict[str, Any] = {}
+    pending = list(stages)
+    running: Dict[Future, Stage] = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1) as executor:
+        while pending or running:
+            ready = [s for s in pending if all(dep in results for dep in s.deps)]
+            for stage in ready:
+                pending.remove(stage)
+                kwargs = {dep: results[dep] for dep in stage.deps}
+                if traced:
+                    # Copy of the caller's context, so the stage spans nest under the caller's span.
+                    future = executor.submit(
+                        contextvars.copy_context().run, _run_traced_stage, stage, kwargs
+                    )
+                else:
+                    future = executor.submit(stage.fn, **kwargs)
+                running[future] = stage
+
+            if not running:
+                raise ValueError(
+                    f"dependency cycle between stages {[s.name for s in pending]}"
+                )
+
+            done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                # Let the already running ones finish (leaving the `with`), but don't schedule anything new.
+                if future.exception() is not None:
+                    pending.clear()
+                    raise future.exception()
+                results[stage.name] = future.result()
+
+    return results
@@ -0,0 +1,183 @@
+# Local journal of what a data entry already synced to HubSpot, keyed by its idempotency id.
+# Our queue is at-least-once, so a note can be processed again after a partial failure (e.g. the contact got
+# created, the task create timed out). Without the journal the retry creates the call and task a second time,
+# or ends in warning_already_created on the contact. With it, each step that already succeeded is replayed from
+# the journal and the retry resumes at the first incomplete one.
+#
+# Usage:
+#   journal = SyncJournal("/var/lib/voxana/sync-journal.db")
+#   extract_and_sync_contact_with_follow_up(..., journal=journal, idempotency_id=data_entry.idempotency_id)
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Optional
+
+from examples.utils.batch_item_result import BatchItemResult
+
+
+@dataclass
+class JournalEntry:
+    idempotency_id: str
+    step: str
+    status: int
+    object_id: Optional[str]
+    result: Any  # the created object's props, or the association link
+    recorded_at: float
+    # What the create's response wrote into the db Task (get_task_response), None for associations.
+    task_response: Any = None
+    # Upserts only: whether the object was created (or an existing one updated), None for plain creates.
+    created: Optional[bool] = None
+
+
+class _JournaledResult(BatchItemResult):
+    """A create replayed from the journal, its task response is the one the original response gave."""
+
+    def __init__(self, entry: JournalEntry):
+        super().__init__(status=entry.status, props=entry.result, created=entry.created)
+        self._task_response = entry.task_response
+
+    def get_task_response(self) -> Dict[str, Any]:
+        if self._task_response is None:
+            return super().get_task_response()
+        return self._task_response
+
+
+class SyncJournal:
+    def __init__(self, path: str):
+        self.path = path
+        # Sync stages run on the stage graph's worker threads, one connection guarded by a lock is enough.
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sync_steps ("
+            " idempotency_id TEXT NOT NULL,"
+            " step TEXT NOT NULL,"
+            " status INTEGER NOT NULL,"
+            " object_id TEXT,"
+            " result TEXT,"
+            " recorded_at REAL NOT NULL,"
+            " task_response TEXT,"
+            " created INTEGER,"
+            " PRIMARY KEY (idempotency_id, step))"
+        )
+        self._lock = threading.Lock()
+
+    def get(self, idempotency_id: str, step: str) -> Optional[JournalEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, object_id, result, recorded_at, task_response, created FROM sync_steps"
+                " WHERE idempotency_id = ? AND step = ?",
+                (idempotency_id, step),
+            ).fetchone()
+        if row is None:
+            return None
+        status, object_id, result, recorded_at, task_response, created = row
+        return JournalEntry(
+            idempotency_id=idempotency_id,
+            step=step,
+            status=status,
+            object_id=object_id,
+            result=None if result is None else json.loads(result),
+            recorded_at=recorded_at,
+            task_response=None if task_response is None else json.loads(task_response),
+            created=None if created is None else bool(created),
+        )
+
+    def record(
+        self,
+        idempotency_id: str,
+        step: str,
+        status: int,
+        object_id: Optional[str] = None,
+        result: Any = None,
+        task_response: Any = None,
+        created: Optional[bool] = None,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_steps"
+                " (idempotency_id, step, status, object_id, result, recorded_at, task_response, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    idempotency_id,
+                    step,
+                    int(status),
+                    None if object_id is None else str(object_id),
+                    _dumps_or_none(result),
+                    time.time(),
+                    _dumps_or_none(task_response),
+                    None if created is None else int(created),
+                ),
+            )
+
+    def completed_steps(self, idempotency_id: str) -> Dict[str, JournalEntry]:
+        with self._lock:
+            steps = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT step FROM sync_steps WHERE idempotency_id = ?",
+                    (idempotency_id,),
+                )
+            ]
+        return {step: self.get(idempotency_id, step) for step in steps}
+
+    def forget(self, idempotency_id: str) -> None:
+        """E.g. when the user deleted the objects in HubSpot and wants the note synced again."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM sync_steps WHERE idempotency_id = ?", (idempotency_id,)
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def create_once(self, idempotency_id: str, step: str, create: Callable[[], Any]):
+        """
+        Runs an object create (HubspotClient.crm_*_create or anything returning a response like it) unless the
+        journal has it already, then the recorded object is returned as BatchItemResult. Only successes are recorded,
+        together with their get_task_response() so the db Task gets the same sync response on a replay.
+        """
+        entry = self.get(idempotency_id, step)
+        if entry is not None:
+            return _JournaledResult(entry)
+
+        response = create()
+        if response is not None and response.is_success():
+            self.record(
+                idempotency_id,
+                step,
+                response.status,
+                object_id=response.hs_object_id,
+                result=response.get_props_if_ok(),
+                task_response=response.get_task_response(),
+                # Upsert responses tell created from updated, which decides the data entry's state.
+                created=getattr(response, "created", None),
+            )
+        return response
+
+    def associate_once(
+        self, idempotency_id: str, step: str, associate: Callable[[], Any]
+    ):
+        """Same for associations, where the result is the created link or None when it failed."""
+        entry = self.get(idempotency_id, step)
+        if entry is not None:
+            return entry.result
+
+        result = associate()
+        if result is not None:
+            self.record_association(idempotency_id, step, result)
+        return result
+
+    def record_association(self, idempotency_id: str, step: str, result: Any) -> None:
+        # The SDK models aren't JSON, their dict is what the data entry keeps anyway.
+        stored = result.to_dict() if hasattr(result, "to_dict") else result
+        self.record(idempotency_id, step, HTTPStatus.OK, result=stored)
+
+
+def _dumps_or_none(value: Any) -> Optional[str]:
+    return None if value is None else json.dumps(value, default=str)
@@ -0,0 +1,186 @@
+# In-process cache of HubSpot OAuth access tokens keyed by oauth_data_id.
+# HubSpot access tokens live 30 minutes, refreshing one costs an OAuth round-trip plus a database write
+# (OauthData.update_safely). The cache hands out tokens from memory and a background thread renews them a few
+# minutes before they expire, so the request path only ever refreshes on a true cold start.
+#
+# Usage:
+#   token_cache = AccessTokenCache(refresh_fn=hubspot_refresh_fn(client_id, client_secret, load_refresh_token))
+#   token_cache.start_background_refresh()
+#   api_client = hubspot.Client.create(access_token=token_cache.get(oauth_data_id))
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Set
+
+from hubspot import HubSpot
+
+# Renew tokens this long before they expire.
+DEFAULT_REFRESH_MARGIN_SECONDS = 5 * 60
+DEFAULT_CHECK_INTERVAL_SECONDS = 30
+
+
+@dataclass
+class AccessToken:
+    access_token: str
+    expires_at: float  # unix timestamp
+
+    def expires_within(self, seconds: float) -> bool:
+        return self.expires_at - time.time() <= seconds
+
+
+class AccessTokenCache:
+    def __init__(
+        self,
+        refresh_fn: Callable[[Any], AccessToken],
+        load_fn: Optional[Callable[[Any], Optional[AccessToken]]] = None,
+        refresh_margin_seconds: float = DEFAULT_REFRESH_MARGIN_SECONDS,
+    ):
+        """
+        refresh_fn: does the OAuth refresh for an oauth_data_id (and persists the result),
+        load_fn: optional cheap read of the last persisted token, used on a cold start before refreshing.
+        """
+        self._refresh_fn = refresh_fn
+        self._load_fn = load_fn
+        self.refresh_margin_seconds = refresh_margin_seconds
+
+        self._tokens: Dict[Any, AccessToken] = {}
+        # Invalidated ids: their persisted token is the one which just got rejected, so load_fn mustn't be used.
+        self._invalidated: Set[Any] = set()
+        self._lock = threading.Lock()
+        # One lock per oauth_data_id, so concurrent refreshes of the same tenant collapse into a single one.
+        self._refresh_locks: Dict[Any, threading.Lock] = {}
+        self._metrics: Counter = Counter()
+
+        self._stop_event = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    def _is_fresh(self, token: Optional[AccessToken]) -> bool:
+        return token is not None and not token.expires_within(
+            self.refresh_margin_seconds
+        )
+
+    def _refresh_lock(self, oauth_data_id: Any) -> threading.Lock:
+        with self._lock:
+            if oauth_data_id not in self._refresh_locks:
+                self._refresh_locks[oauth_data_id] = threading.Lock()
+            return self._refresh_locks[oauth_data_id]
+
+    def _count(self, metric: str) -> None:
+        with self._lock:
+            self._metrics[metric] += 1
+
+    def get(self, oauth_data_id: Any) -> str:
+        token = self._tokens.get(oauth_data_id)
+        if self._is_fresh(token):
+            self._count("hits")
+            return token.access_token
+
+        self._count("misses")
+        return self.refresh(oauth_data_id, force=False).access_token
+
+    def put(self, oauth_data_id: Any, token: AccessToken) -> None:
+        """Seeds the cache, e.g. right after the OAuth callback stored a brand-new token."""
+        with self._lock:
+            self._tokens[oauth_data_id] = token
+            self._invalidated.discard(oauth_data_id)
+
+    def invalidate(self, oauth_data_id: Any) -> None:
+        """E.g. after a 401 - the next get() goes for a new token (a refresh, not the persisted one)."""
+        with self._lock:
+            self._tokens.pop(oauth_data_id, None)
+            self._invalidated.add(oauth_data_id)
+
+    def refresh(self, oauth_data_id: Any, force: bool = True) -> AccessToken:
+        with self._refresh_lock(oauth_data_id):
+            with self._lock:
+                token = self._tokens.get(oauth_data_id)
+                force = force or oauth_data_id in self._invalidated
+            # Whoever held the lock before us might have just refreshed it.
+            if not force and self._is_fresh(token):
+                self._count("collapsed_refreshes")
+                return token
+
+            if not force and token is None and self._load_fn is not None:
+                token = self._load_fn(oauth_data_id)
+                if self._is_fresh(token):
+                    self._count("loads")
+                    self.put(oauth_data_id, token)
+                    return token
+
+            try:
+                token = self._refresh_fn(oauth_data_id)
+            except Exception:
+                self._count("refresh_errors")
+                raise
+            self._count("refreshes")
+            self.put(oauth_data_id, token)
+            return token
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._metrics)
+
+    def _refresh_expiring(self) -> None:
+        with self._lock:
+            expiring = [
+                oauth_data_id
+                for oauth_data_id, token in self._tokens.items()
+                if not self._is_fresh(token)
+            ]
+        for oauth_data_id in expiring:
+            try:
+                self.refresh(oauth_data_id, force=False)
+            except Exception as e:
+                # Keep going, get() will retry on the request path if it's still broken by then.
+                print(
+                    f"WARNING: background token refresh failed for {oauth_data_id}: {e}"
+                )
+
+    def start_background_refresh(
+        self, check_interval_seconds: float = DEFAULT_CHECK_INTERVAL_SECONDS
+    ) -> None:
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        self._stop_event.clear()
+
+        def _run():
+            while not self._stop_event.wait(check_interval_seconds):
+                self._refresh_expiring()
+
+        self._refresher = threading.Thread(
+            target=_run, name="hubspot-token-refresher", daemon=True
+        )
+        self._refresher.start()
+
+    def stop_background_refresh(self) -> None:
+        self._stop_event.set()
+        if self._refresher is not None:
+            self._refresher.join()
+            self._refresher = None
+
+
+def hubspot_refresh_fn(
+    client_id: str,
+    client_secret: str,
+    get_refresh_token: Callable[[Any], str],
+    on_refreshed: Optional[Callable[[Any, AccessToken, str], None]] = None,
+) -> Callable[[Any], AccessToken]:
+    """refresh_fn doing the standard HubSpot refresh_token grant, on_refreshed is where to persist the result."""
+
+    def refresh(oauth_data_id: Any) -> AccessToken:
+        response = HubSpot().oauth.tokens_api.create(
+            grant_type="refresh_token",
+            client_id=client_id,
+            client_secret=client_secret,
+            refresh_token=get_refresh_token(oauth_data_id),
+        )
+        token = AccessToken(
+            access_token=response.access_token,
+            expires_at=time.time() + response.expires_in,
+        )
+        if on_refreshed is not None:
+            on_refreshed(oauth_data_id, token, response.refresh_token)
+        return token
+
+    return refresh
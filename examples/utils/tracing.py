@@ -0,0 +1,305 @@
+# Lightweight timing spans for the GPT -> HubSpot pipeline, to tell which stage made a data entry slow.
+# Spans nest (also across the stage graph's worker threads), carry attributes like object type, status and
+# payload bytes, and are handed to pluggable exporters. Without an exporter configured, span() returns a shared
+# no-op and nothing is measured, so the instrumentation can stay in the hot path.
+#
+# Usage:
+#   memory = InMemorySpanExporter()
+#   configure_tracing(memory, LogSpanExporter(min_duration_ms=500))
+#   extract_and_sync_contact_with_follow_up(...)
+#   for s in memory.spans(): print(s.name, s.duration_ms, s.attributes)
+#
+#   with span("gpt.fill_in_form", form=form.name) as s:
+#       ...
+#       s.set_attribute("status", 200)
+import functools
+import json
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+_exporters: List["SpanExporter"] = []
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "error",
+    )
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self.end_ns is None else (self.end_ns - self.start_ns) / 1e6
+
+    def __repr__(self) -> str:
+        return f"Span({self.name}, {self.duration_ms}ms, {self.attributes})"
+
+
+class _NoopSpan:
+    """What span() returns while tracing is off: no clock reads, no allocation."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _ActiveSpan:
+    __slots__ = ("_name", "_attributes", "_span", "_token")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self._name = name
+        self._attributes = attributes
+
+    def __enter__(self) -> Span:
+        self._span = Span(self._name, _current_span.get(), self._attributes)
+        self._token = _current_span.set(self._span)
+        for exporter in _exporters:
+            try:
+                exporter.on_start(self._span)
+            except Exception as e:
+                print(f"WARNING: span exporter {exporter} failed: {e}")
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._span.end_ns = time.time_ns()
+        if exc is not None:
+            self._span.error = f"{exc_type.__name__}: {exc}"
+            # The ApiException of every hubspot.* package carries the HTTP status of the failed request.
+            if hasattr(exc, "status"):
+                self._span.attributes.setdefault("status", exc.status)
+        _current_span.reset(self._token)
+        for exporter in _exporters:
+            try:
+                exporter.on_end(self._span)
+            except Exception as e:
+                # A broken exporter must not break the data entry.
+                print(f"WARNING: span exporter {exporter} failed: {e}")
+        return False
+
+
+def span(name: str, **attributes):
+    if not _exporters:
+        return _NOOP_SPAN
+    return _ActiveSpan(name, attributes)
+
+
+def tracing_enabled() -> bool:
+    return bool(_exporters)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def configure_tracing(*exporters: "SpanExporter") -> None:
+    """Replaces the exporters, without any tracing is off."""
+    _exporters[:] = exporters
+
+
+def disable_tracing() -> None:
+    _exporters.clear()
+
+
+def traced(
+    name: Optional[str] = None,
+    result_attributes: Optional[Callable[[Any], Dict[str, Any]]] = None,
+):
+    """Decorator, result_attributes picks attributes from the return value (e.g. the state of a data entry)."""
+
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _exporters:
+                return fn(*args, **kwargs)
+            with _ActiveSpan(span_name, {}) as s:
+                result = fn(*args, **kwargs)
+                if result_attributes is not None and result is not None:
+                    s.attributes.update(result_attributes(result))
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+# EXPORTERS
+
+
+class SpanExporter:
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps the finished spans, for tests, benchmarks and ad-hoc debugging."""
+
+    def __init__(self, max_spans: int = 100_000):
+        self.max_spans = max_spans
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            if len(self._spans) < self.max_spans:
+                self._spans.append(span)
+
+    def spans(self, name: Optional[str] = None) -> List[Span]:
+        with self._lock:
+            return [s for s in self._spans if name is None or s.name == name]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+
+class LogSpanExporter(SpanExporter):
+    """One line per finished span, optionally only the slow ones."""
+
+    def __init__(
+        self, min_duration_ms: float = 0.0, write: Callable[[str], None] = print
+    ):
+        self.min_duration_ms = min_duration_ms
+        self._write = write
+
+    def on_end(self, span: Span) -> None:
+        if span.duration_ms < self.min_duration_ms:
+            return
+        error = f" error={span.error}" if span.error is not None else ""
+        self._write(
+            f"TRACE {span.name} {span.duration_ms:.1f}ms trace={span.trace_id} span={span.span_id} "
+            f"parent={span.parent_id} {json.dumps(span.attributes, default=str)}{error}"
+        )
+
+
+class OpenTelemetrySpanExporter(SpanExporter):
+    """Mirrors the spans into an OpenTelemetry tracer (pip install opentelemetry-api), keeping the nesting."""
+
+    def __init__(self, tracer=None):
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = tracer or trace.get_tracer("voxana.pipeline")
+        self._otel_spans: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span) -> None:
+        with self._lock:
+            parent = self._otel_spans.get(span.parent_id)
+        context = (
+            self._trace.set_span_in_context(parent) if parent is not None else None
+        )
+        otel_span = self._tracer.start_span(
+            span.name,
+            context=context,
+            start_time=span.start_ns,
+            attributes=_otel_attributes(span.attributes),
+        )
+        with self._lock:
+            self._otel_spans[span.span_id] = otel_span
+
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            otel_span = self._otel_spans.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        # Attributes set while the span was running.
+        otel_span.set_attributes(_otel_attributes(span.attributes))
+        if span.error is not None:
+            from opentelemetry.trace import Status, StatusCode
+
+            otel_span.set_status(Status(StatusCode.ERROR, span.error))
+        otel_span.end(end_time=span.end_ns)
+
+
+def _otel_attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    # OTel only takes str, bool, int, float (and sequences of those), e.g. enums become their str.
+    return {
+        key: value if isinstance(value, (str, bool, int, float)) else str(value)
+        for key, value in attributes.items()
+        if value is not None
+    }
+
+
+# HUBSPOT CLIENT
+
+_CRM_METHOD = re.compile(r"crm_(?P<object_type>[a-z]+)_")
+
+
+def payload_bytes(payload: Any) -> Optional[int]:
+    """Size of a JSON request body, None for anything else and while tracing is off (to skip the json.dumps)."""
+    if not _exporters or not isinstance(payload, (dict, list)):
+        return None
+    return len(json.dumps(payload, default=str))
+
+
+def _payload_bytes(args, kwargs) -> Optional[int]:
+    return payload_bytes(args[0] if args else next(iter(kwargs.values()), None))
+
+
+class _TracedHubspotClient:
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        match = _CRM_METHOD.match(name)
+        object_type = match.group("object_type") if match is not None else None
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            with span(
+                f"hubspot.{name}",
+                object_type=object_type,
+                payload_bytes=_payload_bytes(args, kwargs),
+            ) as s:
+                result = attr(*args, **kwargs)
+                s.set_attribute("status", getattr(result, "status", None))
+                return result
+
+        return call
+
+
+def trace_hubspot_client(client):
+    """Wraps a HubspotClient (or anything with its methods) so every call is a span, returns it as-is when off."""
+    if not _exporters:
+        return client
+    return _TracedHubspotClient(client)
@@ -0,0 +1,15 @@
+import pytest
+from hubspot import HubSpot
+
+from examples.utils.fake_hubspot import FakeHubspot
+
+
+@pytest.fixture
+def fake_hubspot():
+    with FakeHubspot(seed=0) as fake:
+        yield fake
+
+
+@pytest.fixture
+def api_client(fake_hubspot: FakeHubspot) -> HubSpot:
+    return HubSpot(access_token="fake", host=fake_hubspot.url)
@@ -0,0 +1,170 @@
+# In-memory stand-ins for the clients the pipeline talks to: GPT, our HubspotClient wrapper and the db Task.
+import threading
+import time
+import zlib
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from common.form import FormData, FormDefinition
+from hubspot import HubSpot
+from hubspot.crm.associations.v4 import ApiException as AssociationsApiException
+from hubspot.crm.objects import ApiException
+
+from examples.utils.hubspot_api import BatchItemResult
+
+
+def default_answer(form: FormDefinition, text: str) -> Dict[str, Any]:
+    """A plausible value for every prompted field, unique per transcript so contacts don't collide on email."""
+    n = zlib.crc32(text.encode())
+    data: Dict[str, Any] = {}
+    for field in form.fields:
+        if field.ignore_in_prompt:
+            continue
+        if field.name == "email":
+            data[field.name] = f"fake{n}@example.com"
+        elif field.name == "phone":
+            data[field.name] = f"+1650{n % 10**7:07d}"
+        elif field.field_type in ("date", "datetime"):
+            data[field.name] = "2024-05-01T10:00:00Z"
+        elif field.options:
+            data[field.name] = field.options[0].value
+        else:
+            data[field.name] = f"{field.name} {n}"
+    return data
+
+
+class FakeGptClient:
+    """fill_in_form with a fixed latency, answer(form, text) gives the field values (None for a failed fill)."""
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        answer: Callable[[FormDefinition, str], Optional[Dict[str, Any]]] = (
+            default_answer
+        ),
+    ):
+        self.latency_seconds = latency_seconds
+        self.answer = answer
+        self.calls: List[Tuple[Any, str]] = []
+        self._lock = threading.Lock()
+
+    def fill_in_form(
+        self, form: FormDefinition, text: str, use_current_time: bool = False
+    ):
+        with self._lock:
+            self.calls.append((form.name, text))
+        time.sleep(self.latency_seconds)
+        data = self.answer(form, text)
+        if data is None:
+            return None, "could not fill in the form"
+        return FormData(form, data), None
+
+
+class FakeHubspotClient:
+    """The HubspotClient methods the pipeline uses, objects get ids from a counter.
+
+    statuses: object type -> status to fail its creates with, e.g. {"contacts": HTTPStatus.CONFLICT}.
+    """
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        statuses: Optional[Dict[str, int]] = None,
+    ):
+        self.latency_seconds = latency_seconds
+        self.statuses = statuses or {}
+        self.requests: List[str] = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def _create(self, object_type: str, props: Dict[str, Any]) -> BatchItemResult:
+        time.sleep(self.latency_seconds)
+        with self._lock:
+            self.requests.append(f"create {object_type}")
+            object_id = str(self._next_id)
+            self._next_id += 1
+        status = self.statuses.get(object_type)
+        if status is not None:
+            return BatchItemResult(status=status, error=f"{object_type} failed")
+        return BatchItemResult(
+            status=HTTPStatus.CREATED, props={**props, "hs_object_id": object_id}
+        )
+
+    def crm_contact_create(self, props: Dict[str, Any]) -> BatchItemResult:
+        return self._create("contacts", props)
+
+    def crm_call_create(self, props: Dict[str, Any]) -> BatchItemResult:
+        return self._create("calls", props)
+
+    def crm_task_create(self, props: Dict[str, Any]) -> BatchItemResult:
+        return self._create("tasks", props)
+
+    def crm_association_create(
+        self, from_type, from_id, to_type, to_id, association_type
+    ) -> Dict[str, Any]:
+        time.sleep(self.latency_seconds)
+        with self._lock:
+            self.requests.append(f"associate {from_type} {to_type}")
+        return {"fromObjectId": from_id, "toObjectId": to_id}
+
+
+class SdkHubspotClient:
+    """The HubspotClient methods on a plain api_client, e.g. against FakeHubspot (HubspotClient needs OauthData)."""
+
+    def __init__(self, api_client: HubSpot):
+        self.api_client = api_client
+
+    def _create(self, object_type: str, props: Dict[str, Any]) -> BatchItemResult:
+        try:
+            created = self.api_client.crm.objects.basic_api.create(
+                object_type, {"properties": props}
+            )
+        except ApiException as e:
+            return BatchItemResult(status=e.status, error=str(e.body))
+        return BatchItemResult(status=HTTPStatus.CREATED, props=created.properties)
+
+    def crm_contact_create(self, props: Dict[str, Any]) -> BatchItemResult:
+        return self._create("contacts", props)
+
+    def crm_call_create(self, props: Dict[str, Any]) -> BatchItemResult:
+        return self._create("calls", props)
+
+    def crm_task_create(self, props: Dict[str, Any]) -> BatchItemResult:
+        return self._create("tasks", props)
+
+    def crm_association_create(
+        self, from_type, from_id, to_type, to_id, association_type
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            return self.api_client.crm.associations.v4.basic_api.create(
+                from_type,
+                from_id,
+                to_type,
+                to_id,
+                [
+                    {
+                        "associationCategory": "HUBSPOT_DEFINED",
+                        "associationTypeId": association_type.value,
+                    }
+                ],
+            ).to_dict()
+        except AssociationsApiException:
+            return None
+
+
+class FakeDbTask:
+    def __init__(self):
+        self.generated_outputs: Dict[str, Optional[FormData]] = {}
+        self.sync_responses: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self.finished = False
+
+    def add_generated_output(self, key: str, form_data: Optional[FormData]) -> None:
+        self.generated_outputs[key] = form_data
+
+    def add_sync_response(
+        self, key: str, status: int, response: Dict[str, Any]
+    ) -> None:
+        self.sync_responses[key] = (status, response)
+
+    def finish(self) -> None:
+        self.finished = True
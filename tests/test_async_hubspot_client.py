@@ -0,0 +1,292 @@
+import asyncio
+import subprocess
+import sys
+import time
+from email.utils import formatdate
+
+from aiohttp import web
+from app.hubspot_models import AssociationType
+
+from examples.utils.async_hubspot_client import AsyncHubspotApiError, AsyncHubspotClient
+
+
+async def _serve(routes, run):
+    """Runs run(base_url) against an aiohttp app with the given routes on a free local port."""
+    app = web.Application()
+    app.add_routes(routes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        return await run(f"http://127.0.0.1:{port}")
+    finally:
+        await runner.cleanup()
+
+
+def _flaky(first_response):
+    """A handler which answers the first request with first_response() and creates a contact afterwards."""
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        if len(requests) == 1:
+            return await first_response()
+        return web.json_response(
+            {"id": "11", "properties": {"email": "a@example.com"}}, status=201
+        )
+
+    return handler, requests
+
+
+def test_retry_after_http_date():
+    async def rate_limited():
+        # An HTTP-date instead of seconds, already due.
+        return web.Response(
+            status=429, headers={"Retry-After": formatdate(time.time())}
+        )
+
+    handler, requests = _flaky(rate_limited)
+
+    async def run(base_url):
+        async with AsyncHubspotClient("token", base_url=base_url) as client:
+            return await client.crm_contact_create({"email": "a@example.com"})
+
+    result = asyncio.run(_serve([web.post("/crm/v3/objects/contacts", handler)], run))
+
+    assert result.is_success() and result.hs_object_id == "11"
+    assert len(requests) == 2
+
+
+def test_timeout_is_retried():
+    async def too_slow():
+        await asyncio.sleep(1)
+        return web.Response(status=500)
+
+    handler, requests = _flaky(too_slow)
+
+    async def run(base_url):
+        async with AsyncHubspotClient(
+            "token", base_url=base_url, request_timeout_seconds=0.2
+        ) as client:
+            return await client.crm_contact_create({"email": "a@example.com"})
+
+    result = asyncio.run(_serve([web.post("/crm/v3/objects/contacts", handler)], run))
+
+    assert result.hs_object_id == "11"
+    assert len(requests) == 2
+
+
+def test_connection_error_is_wrapped():
+    async def run(base_url):
+        async with AsyncHubspotClient(
+            "token", base_url=base_url, max_retries=1
+        ) as client:
+            try:
+                await client.list_owners()
+            except AsyncHubspotApiError as e:
+                return e
+
+    # Nothing listens there anymore once the server is gone.
+    base_url = asyncio.run(_serve([], lambda base_url: asyncio.sleep(0, base_url)))
+    error = asyncio.run(run(base_url))
+
+    assert error is not None and error.status is None
+
+
+def test_list_owners_pages_into_the_sdk_shape():
+    owners = [
+        {"id": str(i), "email": f"o{i}@example.com", "firstName": "O", "userId": i}
+        for i in range(3)
+    ]
+
+    async def handler(request):
+        after = int(request.query.get("after", 0))
+        page = {"results": owners[after : after + 2]}
+        if after + 2 < len(owners):
+            page["paging"] = {"next": {"after": str(after + 2)}}
+        return web.json_response(page)
+
+    async def run(base_url):
+        async with AsyncHubspotClient("token", base_url=base_url) as client:
+            return await client.list_owners()
+
+    response = asyncio.run(_serve([web.get("/crm/v3/owners/", handler)], run))
+
+    assert [owner.email for owner in response.results] == [o["email"] for o in owners]
+    assert response.results[2].first_name == "O"
+    assert response.results[2].user_id == 2
+
+
+def test_failed_create_is_a_failed_result():
+    async def handler(request):
+        return web.json_response(
+            {"message": "Property values were not valid"}, status=400
+        )
+
+    async def run(base_url):
+        async with AsyncHubspotClient("token", base_url=base_url) as client:
+            return await client.crm_task_create({"hs_task_subject": ""})
+
+    result = asyncio.run(_serve([web.post("/crm/v3/objects/tasks", handler)], run))
+
+    assert result.status == 400
+    assert not result.is_success()
+    assert result.get_props_if_ok() is None
+    assert "not valid" in result.get_task_response()["error"]
+
+
+def test_association_create():
+    requests = []
+
+    async def handler(request):
+        requests.append((request.match_info, await request.json()))
+        if request.match_info["to_id"] == "404":
+            return web.json_response({"message": "not found"}, status=404)
+        return web.json_response({"fromObjectId": 1, "toObjectId": 2}, status=201)
+
+    async def run(base_url):
+        async with AsyncHubspotClient("token", base_url=base_url) as client:
+            return await asyncio.gather(
+                client.crm_association_create(
+                    "contact", 1, "call", 2, AssociationType.CONTACT_TO_CALL
+                ),
+                client.crm_association_create(
+                    "contact", 1, "task", 404, AssociationType.CONTACT_TO_TASK
+                ),
+            )
+
+    route = "/crm/v4/objects/{from_type}/{from_id}/associations/{to_type}/{to_id}"
+    created, failed = asyncio.run(_serve([web.put(route, handler)], run))
+
+    assert created == {"fromObjectId": 1, "toObjectId": 2}
+    assert failed is None
+    match_info, body = requests[0]
+    assert dict(match_info) == {
+        "from_type": "contact",
+        "from_id": "1",
+        "to_type": "call",
+        "to_id": "2",
+    }
+    assert body == [
+        {
+            "associationCategory": "HUBSPOT_DEFINED",
+            "associationTypeId": AssociationType.CONTACT_TO_CALL.value,
+        }
+    ]
+
+
+def test_account_metadata_of_the_current_token():
+    async def handler(request):
+        assert request.headers["Authorization"] == "Bearer fresh-token"
+        return web.json_response(
+            {
+                "token": request.match_info["token"],
+                "hub_id": 42,
+                "hub_domain": "example.com",
+                "user": "owner@example.com",
+            }
+        )
+
+    async def run(base_url):
+        async with AsyncHubspotClient(
+            lambda: "fresh-token", base_url=base_url
+        ) as client:
+            return await client.get_hubspot_account_metadata()
+
+    route = "/oauth/v1/access-tokens/{token}"
+    metadata = asyncio.run(_serve([web.get(route, handler)], run))
+
+    assert metadata.token == "fresh-token"
+    assert (metadata.hub_id, metadata.hub_domain) == (42, "example.com")
+
+
+def test_list_custom_properties_in_the_sdk_shape():
+    async def handler(request):
+        return web.json_response(
+            {
+                "results": [
+                    {
+                        "name": "lead_source",
+                        "label": "Lead Source",
+                        "fieldType": "select",
+                        "hubspotDefined": False,
+                        "options": [
+                            {"label": "Web", "value": "web", "displayOrder": 0}
+                        ],
+                    }
+                ]
+            }
+        )
+
+    async def run(base_url):
+        async with AsyncHubspotClient("token", base_url=base_url) as client:
+            return await client.list_custom_properties("contacts")
+
+    route = "/crm/v3/properties/contacts"
+    response = asyncio.run(_serve([web.get(route, handler)], run))
+
+    (prop,) = response.results
+    assert (prop.name, prop.field_type, prop.hubspot_defined) == (
+        "lead_source",
+        "select",
+        False,
+    )
+    assert prop.options[0].value == "web"
+    assert prop.options[0].display_order == 0
+
+
+def test_many_concurrent_requests_on_one_loop():
+    in_flight = 0
+    max_in_flight = 0
+
+    async def handler(request):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        body = await request.json()
+        return web.json_response(
+            {"id": body["properties"]["email"], "properties": body["properties"]},
+            status=201,
+        )
+
+    async def run(base_url):
+        async with AsyncHubspotClient(
+            "token", base_url=base_url, max_connections=10
+        ) as client:
+            return await asyncio.gather(
+                *(
+                    client.crm_contact_create({"email": f"c{i}@example.com"})
+                    for i in range(200)
+                )
+            )
+
+    started = time.perf_counter()
+    results = asyncio.run(_serve([web.post("/crm/v3/objects/contacts", handler)], run))
+    elapsed = time.perf_counter() - started
+
+    assert [result.hs_object_id for result in results] == [
+        f"c{i}@example.com" for i in range(200)
+    ]
+    # The connector caps it, and one after the other would take 4s.
+    assert 1 < max_in_flight <= 10
+    assert elapsed < 2
+
+
+def test_does_not_import_the_blocking_sdk():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, examples.utils.async_hubspot_client;"
+            " print(sorted(m for m in sys.modules if m.split('.')[0] == 'hubspot'))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.strip() == "[]"
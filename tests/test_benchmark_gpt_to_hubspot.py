@@ -0,0 +1,81 @@
+# Throughput of the GPT -> HubSpot pipeline against the in-process FakeHubspot, with a fake GPT client.
+# A baseline without a portal, OpenAI or the database:
+#   pytest tests/test_benchmark_gpt_to_hubspot.py --benchmark-only
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from examples.gpt_to_hubspot import (
+    bulk_extract_and_sync,
+    extract_and_sync_contact_with_follow_up,
+    test_data1,
+)
+from tests.fakes import FakeDbTask, FakeGptClient, SdkHubspotClient
+
+NUM_ENTRIES = 20
+CONCURRENCY = 8
+ROUNDS = 3
+
+_runs = itertools.count()
+
+
+def _transcripts():
+    # Distinct texts per round too, otherwise the entries would conflict on the contacts of the previous round.
+    run = next(_runs)
+    return [f"Note #{i} (run {run}). {test_data1}" for i in range(NUM_ENTRIES)]
+
+
+def _record(benchmark, fake_hubspot, gpt_client):
+    entries = NUM_ENTRIES * (ROUNDS + 1)  # pedantic also runs the warmup round
+    benchmark.extra_info["gpt_calls_per_entry"] = len(gpt_client.calls) / entries
+    benchmark.extra_info["hubspot_requests_per_entry"] = (
+        fake_hubspot.metrics()["requests"] / entries
+    )
+
+
+@pytest.mark.parametrize("combined_extraction", [False, True])
+def test_per_entry_throughput(benchmark, fake_hubspot, api_client, combined_extraction):
+    client = SdkHubspotClient(api_client)
+    gpt_client = FakeGptClient()
+
+    def run(transcripts):
+        with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+            return list(
+                executor.map(
+                    lambda text: extract_and_sync_contact_with_follow_up(
+                        client,
+                        gpt_client,
+                        FakeDbTask(),
+                        text,
+                        combined_extraction=combined_extraction,
+                    ),
+                    transcripts,
+                )
+            )
+
+    entries = benchmark.pedantic(
+        run,
+        setup=lambda: ((_transcripts(),), {}),
+        rounds=ROUNDS,
+        warmup_rounds=1,
+    )
+
+    assert [entry.state for entry in entries] == ["success"] * NUM_ENTRIES
+    _record(benchmark, fake_hubspot, gpt_client)
+
+
+def test_bulk_throughput(benchmark, fake_hubspot, api_client):
+    gpt_client = FakeGptClient()
+
+    entries = benchmark.pedantic(
+        lambda transcripts: bulk_extract_and_sync(
+            api_client, gpt_client, transcripts, max_gpt_concurrency=CONCURRENCY
+        ),
+        setup=lambda: ((_transcripts(),), {}),
+        rounds=ROUNDS,
+        warmup_rounds=1,
+    )
+
+    assert [entry.state for entry in entries] == ["success"] * NUM_ENTRIES
+    _record(benchmark, fake_hubspot, gpt_client)
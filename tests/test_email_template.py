@@ -0,0 +1,81 @@
+import pytest
+
+from examples.benchmark_email_template import render_after, render_before
+from examples.utils import email_template
+from examples.utils.email_template import (
+    cached_main_content_template,
+    invalidate_template_cache,
+    iter_table_template,
+    main_content_template,
+    register_template_cache_invalidation_hook,
+    table_template,
+    template_cache_stats,
+)
+
+
+@pytest.fixture
+def empty_template_cache(monkeypatch):
+    monkeypatch.setattr(email_template, "_invalidation_hooks", [])
+    invalidate_template_cache()
+    yield
+    monkeypatch.undo()
+    invalidate_template_cache()
+
+
+def test_compiled_templates_render_byte_identical_output():
+    assert len(render_before()) == 8357
+    assert render_after() == render_before()
+
+
+def test_iter_template_matches_the_joined_one():
+    assert "".join(iter_table_template("Tasks", iter(["a", "b"]), "To Dos ...")) == (
+        table_template("Tasks", "ab", "To Dos ...")
+    )
+
+
+def test_template_cache_stats_count_hits_and_misses(empty_template_cache):
+    cached_main_content_template("Synced", "Sync Status")
+    cached_main_content_template("Synced", "Sync Status")
+    cached_main_content_template("Synced", "Sync Status")
+    cached_main_content_template("Not synced", "Sync Status")
+
+    stats = template_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 2, 2)
+    assert stats["hit_rate"] == 0.5
+    assert cached_main_content_template("Synced", "Sync Status") == (
+        main_content_template("Synced", "Sync Status")
+    )
+
+
+def test_invalidate_drops_renders_of_the_old_template(
+    empty_template_cache, monkeypatch
+):
+    before = cached_main_content_template("Synced")
+    # What a hot-reload of the templates does.
+    monkeypatch.setattr(
+        email_template,
+        "_compiled_main_content_template",
+        email_template._CompiledTemplate("<td>{heading_html}{content}</td>"),
+    )
+    assert cached_main_content_template("Synced") == before
+
+    invalidate_template_cache()
+
+    assert cached_main_content_template("Synced") == "<td>Synced</td>"
+    assert template_cache_stats()["size"] == 1
+
+
+def test_invalidate_calls_each_registered_hook_once(empty_template_cache):
+    own_fragments = {"footer": "<td>old footer</td>"}
+    calls = []
+
+    def drop_own_fragments():
+        calls.append(1)
+        own_fragments.clear()
+
+    register_template_cache_invalidation_hook(drop_own_fragments)
+    register_template_cache_invalidation_hook(drop_own_fragments)
+    invalidate_template_cache()
+
+    assert own_fragments == {}
+    assert len(calls) == 1
@@ -0,0 +1,64 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from app.form_library import get_form
+from common.form import FormName
+
+from examples.utils.extraction_cache import (
+    ExtractionCache,
+    SqliteExtractionCacheBackend,
+)
+from tests.fakes import FakeGptClient, default_answer
+
+TEXT = "Met Lucas Meyer at the conference, follow up about the VRBO offer next week."
+
+
+def _with_timestamp(form, text):
+    data = default_answer(form, text)
+    data["hs_timestamp"] = datetime(2024, 5, 1, 10, 0, tzinfo=timezone.utc)
+    return data
+
+
+def test_sqlite_cache_stores_json_and_survives_restarts(tmp_path):
+    path = str(tmp_path / "extractions.db")
+    form = get_form(FormName.HUBSPOT_MEETING)
+    gpt_client = FakeGptClient(answer=_with_timestamp)
+    cache = ExtractionCache(SqliteExtractionCacheBackend(path), model="gpt-4o")
+    form_data, _ = cache.fill_in_form(gpt_client, form=form, text=TEXT)
+    cache.backend.close()
+
+    backend = SqliteExtractionCacheBackend(path)
+    ((value,),) = backend._conn.execute("SELECT value FROM extractions").fetchall()
+    assert json.loads(value)["hs_timestamp"] == {
+        "__datetime__": "2024-05-01T10:00:00+00:00"
+    }
+    cached, err = ExtractionCache(backend, model="gpt-4o").fill_in_form(
+        gpt_client, form=form, text=TEXT
+    )
+
+    assert err is None
+    assert cached.to_dict() == form_data.to_dict()
+    assert len(gpt_client.calls) == 1
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    form = get_form(FormName.HUBSPOT_CONTACT)
+    cache = ExtractionCache(SqliteExtractionCacheBackend(str(tmp_path / "e.db")))
+    cache.fill_in_form(FakeGptClient(), form=form, text=TEXT)
+    cache.backend._conn.execute("UPDATE extractions SET value = ?", (b"\x80pickle",))
+
+    assert cache.get(TEXT, form) is None
+    assert cache.metrics()["unreadable"] == 1
+    assert cache.backend._conn.execute("SELECT * FROM extractions").fetchall() == []
+
+
+def test_metrics_count_every_concurrent_lookup():
+    form = get_form(FormName.HUBSPOT_CONTACT)
+    cache = ExtractionCache()
+    cache.fill_in_form(FakeGptClient(), form=form, text=TEXT)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: cache.get(TEXT, form), range(2000)))
+
+    assert cache.metrics() == {"misses": 1, "stores": 1, "hits": 2000}
@@ -0,0 +1,223 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from app.form_library import get_form
+from common.form import FormName
+
+from examples.gpt_to_hubspot import (
+    KEY_HUBSPOT_CALL,
+    KEY_HUBSPOT_CONTACT,
+    KEY_HUBSPOT_TASK,
+    bulk_extract_and_sync,
+    extract_and_sync_contact_with_follow_up,
+    test_data1,
+)
+from tests.fakes import (
+    FakeDbTask,
+    FakeGptClient,
+    FakeHubspotClient,
+    SdkHubspotClient,
+    default_answer,
+)
+
+
+def _only_one_contact_field(form, text):
+    data = default_answer(form, text)
+    if form.name == FormName.HUBSPOT_CONTACT:
+        return {"email": data["email"]}
+    return data
+
+
+def test_success():
+    client = FakeHubspotClient()
+    db_task = FakeDbTask()
+
+    entry = extract_and_sync_contact_with_follow_up(
+        client, FakeGptClient(), db_task, test_data1, hub_id="123"
+    )
+
+    assert entry.state == "success"
+    assert entry.contact_to_call_result is not None
+    assert entry.contact_to_task_result is not None
+    assert sorted(client.requests) == [
+        "associate contact call",
+        "associate contact task",
+        "create calls",
+        "create contacts",
+        "create tasks",
+    ]
+    assert set(db_task.sync_responses) == {
+        KEY_HUBSPOT_CONTACT,
+        KEY_HUBSPOT_CALL,
+        KEY_HUBSPOT_TASK,
+    }
+    assert db_task.finished
+
+
+def test_short_transcript_is_not_extracted():
+    gpt_client = FakeGptClient()
+
+    entry = extract_and_sync_contact_with_follow_up(
+        FakeHubspotClient(), gpt_client, FakeDbTask(), "Call Lucas."
+    )
+
+    assert entry.state == "short"
+    assert gpt_client.calls == []
+
+
+def test_incomplete_contact_syncs_nothing():
+    client = FakeHubspotClient()
+    db_task = FakeDbTask()
+
+    entry = extract_and_sync_contact_with_follow_up(
+        client, FakeGptClient(answer=_only_one_contact_field), db_task, test_data1
+    )
+
+    assert entry.state == "incomplete"
+    assert client.requests == []
+    assert db_task.sync_responses == {}
+
+
+def test_existing_contact():
+    entry = extract_and_sync_contact_with_follow_up(
+        FakeHubspotClient(statuses={"contacts": HTTPStatus.CONFLICT}),
+        FakeGptClient(),
+        FakeDbTask(),
+        test_data1,
+    )
+
+    assert entry.state == "warning_already_created"
+    assert entry.contact_to_call_result is None
+
+
+def test_failed_sync():
+    entry = extract_and_sync_contact_with_follow_up(
+        FakeHubspotClient(statuses={"tasks": HTTPStatus.BAD_REQUEST}),
+        FakeGptClient(),
+        FakeDbTask(),
+        test_data1,
+    )
+
+    assert entry.state == "error_hubspot_sync"
+    assert entry.contact_to_call_result is not None
+    assert entry.contact_to_task_result is None
+
+
+def test_gpt_and_hubspot_calls_overlap():
+    gpt_latency, hubspot_latency = 0.2, 0.1
+    # One after the other: 3 GPT calls, 3 creates and 2 associations.
+    sequential = 3 * gpt_latency + 5 * hubspot_latency
+
+    start = time.perf_counter()
+    entry = extract_and_sync_contact_with_follow_up(
+        FakeHubspotClient(latency_seconds=hubspot_latency),
+        FakeGptClient(latency_seconds=gpt_latency),
+        FakeDbTask(),
+        test_data1,
+    )
+    elapsed = time.perf_counter() - start
+
+    assert entry.state == "success"
+    # The critical path is GPT -> create -> associate.
+    assert elapsed < gpt_latency + 2 * hubspot_latency + 0.15 < sequential
+    assert entry.gpt_call is not None
+
+
+def _failing_for_some_transcripts(form, text):
+    if "GPT down" in text:
+        raise RuntimeError("GPT down")
+    if "no call" in text and form.name == FormName.HUBSPOT_MEETING:
+        return None
+    return default_answer(form, text)
+
+
+@pytest.mark.parametrize("combined_extraction", [False, True])
+def test_bulk_gpt_failure_only_fails_its_transcript(
+    fake_hubspot, api_client, combined_extraction
+):
+    transcripts = [
+        f"Note 0. {test_data1}",
+        f"Note 1, GPT down. {test_data1}",
+        f"Note 2. {test_data1}",
+    ]
+    db_tasks = [FakeDbTask() for _ in transcripts]
+
+    entries = bulk_extract_and_sync(
+        api_client,
+        FakeGptClient(answer=_failing_for_some_transcripts),
+        transcripts,
+        db_tasks=db_tasks,
+        combined_extraction=combined_extraction,
+    )
+
+    assert [entry.state for entry in entries] == ["success", "error_gpt", "success"]
+    assert len(fake_hubspot.objects["contact"]) == 2
+    assert db_tasks[1].sync_responses == {}
+
+
+def test_bulk_unfilled_form_syncs_the_rest(fake_hubspot, api_client):
+    transcripts = [f"Note 0, no call. {test_data1}", f"Note 1. {test_data1}"]
+    db_tasks = [FakeDbTask() for _ in transcripts]
+
+    entries = bulk_extract_and_sync(
+        api_client,
+        FakeGptClient(answer=_failing_for_some_transcripts),
+        transcripts,
+        db_tasks=db_tasks,
+    )
+
+    assert [entry.state for entry in entries] == ["error_gpt", "success"]
+    assert entries[0].call is None and entries[0].contact_to_call_result is None
+    assert entries[0].contact_to_task_result is not None
+    assert len(fake_hubspot.objects["call"]) == 1
+    assert set(db_tasks[0].sync_responses) == {KEY_HUBSPOT_CONTACT, KEY_HUBSPOT_TASK}
+
+
+def _no_phone(form, text):
+    data = default_answer(form, text)
+    if form.name == FormName.HUBSPOT_CONTACT:
+        data["phone"] = None
+        data["lastname"] = ""
+    return data
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_upsert_keeps_the_fields_the_transcript_did_not_mention(
+    fake_hubspot, api_client, bulk
+):
+    answer = default_answer(get_form(FormName.HUBSPOT_CONTACT), test_data1)
+    existing = api_client.crm.objects.basic_api.create(
+        "contacts",
+        {
+            "properties": {
+                "email": answer["email"],
+                "phone": "+15550100",
+                "lastname": "Meyer",
+            }
+        },
+    )
+    gpt_client = FakeGptClient(answer=_no_phone)
+
+    if bulk:
+        (entry,) = bulk_extract_and_sync(
+            api_client, gpt_client, [test_data1], upsert_contacts=True
+        )
+    else:
+        entry = extract_and_sync_contact_with_follow_up(
+            SdkHubspotClient(api_client),
+            gpt_client,
+            FakeDbTask(),
+            test_data1,
+            api_client=api_client,
+            upsert_contacts=True,
+        )
+
+    # Synced onto the existing contact.
+    assert entry.state == "warning_already_created"
+    assert entry.contact_to_call_result is not None
+    (contact,) = fake_hubspot.objects["contact"].values()
+    assert contact["id"] == existing.id
+    assert contact["properties"]["phone"] == "+15550100"
+    assert contact["properties"]["lastname"] == "Meyer"
+    assert contact["properties"]["firstname"] == answer["firstname"]
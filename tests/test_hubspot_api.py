@@ -0,0 +1,128 @@
+import time
+
+import pytest
+from app.form_library import get_form
+from app.hubspot_models import AssociationType, ObjectType
+from common.form import FormName
+from hubspot import HubSpot
+
+from examples.utils.fake_hubspot import FakeHubspot
+from examples.utils.hubspot_api import (
+    crm_associations_batch_create,
+    crm_batch_create,
+    iter_objects,
+    iter_owners,
+)
+
+
+def _create(api_client, object_type, count):
+    results = crm_batch_create(
+        api_client,
+        object_type,
+        [{"description": f"{object_type} {i}"} for i in range(count)],
+    )
+    return [result.hs_object_id for result in results]
+
+
+def test_associations_batch_create_request_count(fake_hubspot, api_client):
+    contacts = _create(api_client, "contacts", 150)
+    calls = _create(api_client, "calls", 150)
+    tasks = _create(api_client, "tasks", 3)
+    entries = [
+        ("contact", contact, "call", call, AssociationType.CONTACT_TO_CALL)
+        for contact, call in zip(contacts, calls)
+    ] + [
+        ("contact", contact, "task", task, AssociationType.CONTACT_TO_TASK)
+        for contact, task in zip(contacts, tasks)
+    ]
+    requests_before = fake_hubspot.metrics()["requests"]
+
+    results = crm_associations_batch_create(api_client, entries)
+
+    # 150 contact->call links in two batches of at most 100, the contact->task ones need their own request.
+    assert fake_hubspot.metrics()["requests"] - requests_before == 3
+    assert fake_hubspot.metrics()["batch_associate"] == 3
+    assert [(r["from_object_id"], r["to_object_id"]) for r in results] == [
+        (from_id, to_id) for _, from_id, _, to_id, _ in entries
+    ]
+
+
+def test_associations_batch_create_failed_link_is_none(fake_hubspot, api_client):
+    (contact,) = _create(api_client, "contacts", 1)
+    (call,) = _create(api_client, "calls", 1)
+
+    results = crm_associations_batch_create(
+        api_client,
+        [
+            ("contact", contact, "call", "404", AssociationType.CONTACT_TO_CALL),
+            ("contact", contact, "call", call, AssociationType.CONTACT_TO_CALL),
+        ],
+    )
+
+    assert results[0] is None
+    assert results[1]["to_object_id"] == call
+    assert fake_hubspot.metrics()["batch_associate"] == 1
+
+
+def test_iter_objects_pages_through_all_objects(fake_hubspot, api_client):
+    crm_batch_create(
+        api_client,
+        "contacts",
+        [{"email": f"c{i}@example.com", "firstname": f"C{i}"} for i in range(5)],
+    )
+    form = get_form(FormName.HUBSPOT_CONTACT)
+
+    contacts = list(iter_objects(api_client, "1", ObjectType.CONTACT, form, limit=2))
+
+    assert [contact.data["email"] for contact in contacts] == [
+        f"c{i}@example.com" for i in range(5)
+    ]
+    assert contacts[0].has_value("firstname") and contacts[0].has_value("hs_object_id")
+
+
+@pytest.fixture
+def five_owners():
+    with FakeHubspot(num_owners=5, latency_seconds=0.01) as fake:
+        yield fake, HubSpot(access_token="fake", host=fake.url)
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_iter_owners_pages_through_all_owners(five_owners, prefetch):
+    fake, api_client = five_owners
+
+    owners = list(iter_owners(api_client, limit=2, prefetch=prefetch))
+
+    assert [owner.email for owner in owners] == [o["email"] for o in fake.owners]
+    assert owners[4].first_name == "Owner4"
+    assert fake.metrics()["owners"] == 3
+
+
+def _owner_requests_after(fake, seconds):
+    deadline = time.monotonic() + seconds
+    while fake.metrics().get("owners", 0) < 2 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return fake.metrics()["owners"]
+
+
+def test_iter_owners_requests_the_next_page_while_the_current_one_is_read(
+    five_owners,
+):
+    fake, api_client = five_owners
+    owners = iter_owners(api_client, limit=2)
+
+    first = next(owners)
+
+    # Only one owner of the first page is read, the second page is on its way already.
+    assert _owner_requests_after(fake, 2) == 2
+    assert [first.email] + [owner.email for owner in owners] == [
+        o["email"] for o in fake.owners
+    ]
+
+
+def test_iter_owners_without_prefetch_waits_for_the_caller(five_owners):
+    fake, api_client = five_owners
+    owners = iter_owners(api_client, limit=2, prefetch=False)
+
+    next(owners)
+
+    assert _owner_requests_after(fake, 0.2) == 1
@@ -0,0 +1,56 @@
+import ssl
+
+from hubspot import HubSpot
+
+from examples.utils.hubspot_http_pool import (
+    configure_shared_pool,
+    get_shared_pool,
+    pooled_api_factory,
+    shared_pool_stats,
+)
+
+
+def _rest_client(api_client: HubSpot):
+    return api_client.crm.objects.basic_api.api_client.rest_client
+
+
+def test_pool_keeps_the_configurations_tls_settings():
+    configure_shared_pool()
+    default = HubSpot(access_token="a", api_factory=pooled_api_factory())
+    other_tenant = HubSpot(access_token="b", api_factory=pooled_api_factory())
+    custom_ca = HubSpot(
+        access_token="c", ssl_ca_cert="/etc/ca.pem", api_factory=pooled_api_factory()
+    )
+    unverified = HubSpot(
+        access_token="d", verify_ssl=False, api_factory=pooled_api_factory()
+    )
+
+    pool_manager = _rest_client(default).pool_manager
+    assert pool_manager is get_shared_pool()
+    assert _rest_client(other_tenant).pool_manager is pool_manager
+    assert pool_manager.connection_pool_kw["cert_reqs"] == ssl.CERT_REQUIRED
+
+    custom_ca_pool = _rest_client(custom_ca).pool_manager
+    assert custom_ca_pool is not pool_manager
+    assert custom_ca_pool.connection_pool_kw["ca_certs"] == "/etc/ca.pem"
+
+    unverified_pool = _rest_client(unverified).pool_manager
+    assert unverified_pool not in (pool_manager, custom_ca_pool)
+    assert unverified_pool.connection_pool_kw["cert_reqs"] == ssl.CERT_NONE
+
+
+def test_reconfigure_replaces_the_pools(fake_hubspot):
+    configure_shared_pool(maxsize=2)
+    api_client = HubSpot(
+        access_token="fake", host=fake_hubspot.url, api_factory=pooled_api_factory()
+    )
+    for _ in range(3):
+        api_client.crm.owners.owners_api.get_page()
+
+    assert shared_pool_stats() == {
+        "connections_opened": 1,
+        "requests": 3,
+        "reused_requests": 2,
+    }
+    assert configure_shared_pool().connection_pool_kw["maxsize"] == 16
+    assert shared_pool_stats()["requests"] == 0
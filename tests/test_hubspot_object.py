@@ -0,0 +1,90 @@
+import json
+
+import pytest
+from app.hubspot_models import ObjectType
+from common.form import FieldDefinition, FormDefinition, FormName
+
+from examples.utils.hubspot_object import HubspotObject
+
+FORM = FormDefinition(
+    FormName.HUBSPOT_CONTACT,
+    [FieldDefinition("email"), FieldDefinition("firstname")],
+)
+
+
+def test_data_is_read_only():
+    obj = HubspotObject(hub_id="1", object_type=ObjectType.CONTACT, form=FORM)
+    obj.set_field_value("email", "lucas@example.com")
+
+    with pytest.raises(TypeError):
+        obj.data["firstname"] = "Lucas"
+
+    obj.set_field_value("firstname", "Lucas")
+    assert obj.data == {"email": "lucas@example.com", "firstname": "Lucas"}
+
+
+def test_from_api_response_bytes_projects_only_the_top_level_properties():
+    raw = json.dumps(
+        {
+            "id": "7",
+            "properties": {
+                "email": "lucas@example.com",
+                "firstname": {"email": "nested", "other": [{"email": "x", "y": 1}]},
+                "lastname": "Meyer",
+            },
+            "associations": {"email": {"results": []}},
+        }
+    )
+
+    obj = HubspotObject.from_api_response_bytes("1", ObjectType.CONTACT, FORM, raw)
+
+    assert obj.data == {
+        "email": "lucas@example.com",
+        "firstname": {"email": "nested", "other": [{"email": "x", "y": 1}]},
+    }
+
+
+@pytest.mark.parametrize("raw", [b"[]", b'{"id": "7"}', b'{"properties": null}'])
+def test_from_api_response_bytes_without_properties(raw):
+    assert (
+        HubspotObject.from_api_response_bytes("1", ObjectType.CONTACT, FORM, raw)
+        is None
+    )
+
+
+def test_list_from_api_page_bytes_projects_every_result():
+    raw = json.dumps(
+        {
+            "results": [
+                {"id": "1", "properties": {"email": "a@example.com", "lastname": "A"}},
+                {"id": "2"},
+                {"id": "3", "properties": {"firstname": "C", "email": None}},
+            ],
+            "paging": {"next": {"after": "3", "link": "?after=3"}},
+        }
+    ).encode()
+
+    objects, paging = HubspotObject.list_from_api_page_bytes(
+        "1", ObjectType.CONTACT, FORM, raw
+    )
+
+    assert [obj.data for obj in objects] == [
+        {"email": "a@example.com"},
+        {},
+        {"firstname": "C", "email": None},
+    ]
+    assert paging == {"next": {"after": "3", "link": "?after=3"}}
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        b'{"properties": {"email": "a@example.com",}}',
+        b'{"properties": {"email": "a@example.com"}} trailing',
+        b'{"properties" {"email": "a@example.com"}}',
+        b'{"id": 7, }',
+    ],
+)
+def test_from_api_response_bytes_rejects_malformed_json(raw):
+    with pytest.raises(json.JSONDecodeError):
+        HubspotObject.from_api_response_bytes("1", ObjectType.CONTACT, FORM, raw)
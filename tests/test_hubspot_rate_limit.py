@@ -0,0 +1,160 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+import pytest
+from hubspot import HubSpot
+from hubspot.crm.contacts import ApiException, SimplePublicObjectInputForCreate
+
+from examples.utils import hubspot_rate_limit
+from examples.utils.fake_hubspot import (
+    FAKE_RATE_LIMIT_INTERVAL_MS,
+    FAKE_RATE_LIMIT_MAX,
+    FakeHubspot,
+)
+from examples.utils.hubspot_rate_limit import (
+    HubspotRateLimiter,
+    get_rate_limiter,
+    rate_limited_api_factory,
+)
+
+# Limiters are per hub_id and process-wide, every test gets fresh ones.
+_hub_ids = count(1)
+
+
+@pytest.fixture
+def hub_id():
+    return f"rate-limit-test-{next(_hub_ids)}"
+
+
+@pytest.fixture
+def jitter(monkeypatch):
+    """Records the (low, high) of every jitter draw and always draws a quarter of the range."""
+    draws = []
+
+    def uniform(low, high):
+        draws.append((low, high))
+        return low + (high - low) / 4
+
+    monkeypatch.setattr(hubspot_rate_limit.random, "uniform", uniform)
+    return draws
+
+
+def _client(fake: FakeHubspot, hub_id, max_retries: int = 5) -> HubSpot:
+    return HubSpot(
+        access_token="fake",
+        host=fake.url,
+        api_factory=rate_limited_api_factory(hub_id, max_retries=max_retries),
+    )
+
+
+def _create_contact(api_client: HubSpot, email: str):
+    return api_client.crm.contacts.basic_api.create(
+        SimplePublicObjectInputForCreate(properties={"email": email})
+    )
+
+
+def test_429s_are_retried_and_succeed(hub_id, jitter):
+    with FakeHubspot(rate_limit_rate=0.3, retry_after_seconds=0, seed=1) as fake:
+        api_client = _client(fake, hub_id)
+
+        created = [_create_contact(api_client, f"c{i}@example.com") for i in range(10)]
+
+        metrics = fake.metrics()
+    assert len({contact.id for contact in created}) == 10
+    assert metrics["injected_429"] > 0
+    assert metrics["create"] == 10 + metrics["injected_429"]
+    # Retry-After: 0 plus the jitter, never the exponential backoff.
+    assert jitter == [(0, 1)] * metrics["injected_429"]
+
+
+def test_retry_after_is_honored_until_the_retries_run_out(hub_id, jitter):
+    with FakeHubspot(rate_limit_rate=1.0, retry_after_seconds=0) as fake:
+        api_client = _client(fake, hub_id, max_retries=2)
+        started = time.monotonic()
+
+        with pytest.raises(ApiException) as raised:
+            _create_contact(api_client, "c@example.com")
+
+        elapsed = time.monotonic() - started
+        metrics = fake.metrics()
+    assert raised.value.status == 429
+    assert metrics["create"] == 3
+    # Two retries, each backing off Retry-After + 1/4 of the 1s jitter.
+    assert jitter == [(0, 1), (0, 1)]
+    assert elapsed >= 0.5
+
+
+def test_429_syncs_the_limiter_with_the_rate_limit_headers(hub_id, jitter):
+    limiter = get_rate_limiter(hub_id)
+    with FakeHubspot(rate_limit_rate=1.0, retry_after_seconds=0) as fake:
+        api_client = _client(fake, hub_id, max_retries=0)
+
+        with pytest.raises(ApiException):
+            _create_contact(api_client, "c@example.com")
+        budget = limiter.remaining()
+
+    assert budget.burst_max == FAKE_RATE_LIMIT_MAX
+    assert budget.interval_seconds == FAKE_RATE_LIMIT_INTERVAL_MS / 1000
+    # Refilling at 10 tokens per second from the 0 the 429 reported.
+    assert budget.burst_remaining <= 1
+
+
+def test_update_from_headers():
+    limiter = HubspotRateLimiter(max_requests=110, interval_seconds=10)
+
+    limiter.update_from_headers(
+        {
+            "X-HubSpot-RateLimit-Max": "190",
+            "X-HubSpot-RateLimit-Remaining": "7",
+            "X-HubSpot-RateLimit-Interval-Milliseconds": "10000",
+            "X-HubSpot-RateLimit-Daily": "250000",
+            "X-HubSpot-RateLimit-Daily-Remaining": "249000",
+        }
+    )
+
+    budget = limiter.remaining()
+    assert (budget.burst_max, budget.burst_remaining) == (190, 7)
+    assert (budget.daily_max, budget.daily_remaining) == (250000, 249000)
+    # Garbage and missing headers leave everything as it was.
+    limiter.update_from_headers({"X-HubSpot-RateLimit-Max": "many"})
+    limiter.update_from_headers(None)
+    assert limiter.remaining().burst_max == 190
+
+
+def test_bucket_throttles_concurrent_callers(monkeypatch, hub_id, fake_hubspot):
+    # 2 requests up front, then one every 0.1s.
+    monkeypatch.setitem(
+        hubspot_rate_limit._limiters,
+        hub_id,
+        HubspotRateLimiter(max_requests=2, interval_seconds=0.2),
+    )
+    api_client = _client(fake_hubspot, hub_id)
+    started = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        pages = list(
+            executor.map(
+                lambda _: api_client.crm.contacts.basic_api.get_page(), range(8)
+            )
+        )
+
+    assert len(pages) == 8
+    assert fake_hubspot.metrics()["requests"] == 8
+    assert time.monotonic() - started >= 0.5
+
+
+@pytest.mark.parametrize(
+    "headers, attempt, expected",
+    [
+        ({"retry-after": "3"}, 0, 3.25),
+        ({"retry-after": "3"}, 4, 3.25),
+        # Not seconds, so the exponential backoff: a quarter of 1s * 2**attempt, capped at 30s.
+        ({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}, 1, 0.5),
+        ({}, 0, 0.25),
+        ({}, 3, 2.0),
+        ({}, 10, 7.5),
+    ],
+)
+def test_retry_delay_seconds(jitter, headers, attempt, expected):
+    assert hubspot_rate_limit._retry_delay_seconds(headers, attempt) == expected
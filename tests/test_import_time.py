@@ -0,0 +1,21 @@
+from examples.benchmark_import_time import DEFAULT_BUDGET_MS, measure_import_time
+
+# Loaded where used, see the top of gpt_to_hubspot.
+LAZY_PACKAGES = ("hubspot", "openai", "gpt_form_filler", "database")
+
+
+def test_gpt_to_hubspot_does_not_import_eagerly():
+    _, imports = measure_import_time("examples.gpt_to_hubspot")
+
+    imported = {name for _, name in imports}
+    assert "examples.gpt_to_hubspot" in imported
+    assert [
+        name for name in sorted(imported) if name.split(".")[0] in LAZY_PACKAGES
+    ] == []
+
+
+def test_gpt_to_hubspot_imports_within_budget():
+    # Best of three like the CI step, a single cold start is too noisy on a shared box.
+    total_us = min(measure_import_time("examples.gpt_to_hubspot")[0] for _ in range(3))
+
+    assert total_us / 1000 <= DEFAULT_BUDGET_MS
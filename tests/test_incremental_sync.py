@@ -0,0 +1,140 @@
+import itertools
+
+import pytest
+from app.form_library import get_form
+from app.hubspot_models import ObjectType
+from common.form import FormName
+
+from examples.utils import incremental_sync as incremental_sync_module
+from examples.utils.hubspot_api import crm_batch_create
+from examples.utils.incremental_sync import WatermarkStore, incremental_sync
+
+_emails = itertools.count()
+
+
+def _timestamp(second: int) -> str:
+    return f"2024-05-01T10:00:{second:02d}.000Z"
+
+
+def _create_contacts(fake_hubspot, api_client, seconds):
+    """One contact per entry of seconds, last modified at that second. Returns their ids."""
+    results = crm_batch_create(
+        api_client,
+        "contacts",
+        [{"email": f"c{next(_emails)}@example.com"} for _ in seconds],
+    )
+    ids = [result.hs_object_id for result in results]
+    for object_id, second in zip(ids, seconds):
+        fake_hubspot.objects["contact"][object_id]["properties"]["lastmodifieddate"] = (
+            _timestamp(second)
+        )
+    return ids
+
+
+class _Sink:
+    def __init__(self, fail_on_call=None):
+        self.ids = []
+        self.calls = 0
+        self.fail_on_call = fail_on_call
+
+    def __call__(self, object_type, objects):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise ConnectionError("database went away")
+        self.ids.extend(obj.data["hs_object_id"] for obj in objects)
+
+
+def _sync(api_client, sink, watermarks, page_size=100, lookback_seconds=0):
+    return incremental_sync(
+        api_client,
+        "1",
+        ObjectType.CONTACT,
+        get_form(FormName.HUBSPOT_CONTACT),
+        sink=sink,
+        watermarks=watermarks,
+        page_size=page_size,
+        lookback_seconds=lookback_seconds,
+    )
+
+
+def test_records_at_the_watermark_are_delivered_again(fake_hubspot, api_client):
+    watermarks = WatermarkStore(":memory:")
+    first = _create_contacts(fake_hubspot, api_client, [1, 1, 2])
+    _sync(api_client, _Sink(), watermarks)
+    assert watermarks.get(
+        "1", ObjectType.CONTACT
+    ) == incremental_sync_module._to_millis(_timestamp(2))
+
+    # Modified in the same millisecond as the watermark, after the previous run read it.
+    same_millisecond, later = _create_contacts(fake_hubspot, api_client, [2, 3])
+    sink = _Sink()
+    synced = _sync(api_client, sink, watermarks)
+
+    assert sink.ids == [first[2], same_millisecond, later]
+    assert synced == 3
+    assert watermarks.get(
+        "1", ObjectType.CONTACT
+    ) == incremental_sync_module._to_millis(_timestamp(3))
+
+
+def test_search_limit_starts_a_new_query_from_the_watermark(
+    fake_hubspot, api_client, monkeypatch
+):
+    monkeypatch.setattr(incremental_sync_module, "HUBSPOT_SEARCH_MAX_RESULTS", 4)
+    ids = _create_contacts(fake_hubspot, api_client, [1, 2, 3, 4, 5, 6, 7])
+    sink = _Sink()
+
+    synced = _sync(api_client, sink, WatermarkStore(":memory:"), page_size=2)
+
+    # The 4th is the watermark where the second query starts, so it comes twice.
+    assert sink.ids == ids[:4] + ids[3:]
+    assert synced == 8
+    assert fake_hubspot.metrics()["search"] == 4
+
+
+def test_search_limit_within_one_millisecond_fails(
+    fake_hubspot, api_client, monkeypatch
+):
+    monkeypatch.setattr(incremental_sync_module, "HUBSPOT_SEARCH_MAX_RESULTS", 4)
+    _create_contacts(fake_hubspot, api_client, [1] * 5)
+
+    with pytest.raises(RuntimeError, match="cannot page past 4"):
+        _sync(api_client, _Sink(), WatermarkStore(":memory:"), page_size=2)
+
+
+def test_lookback_delivers_records_the_index_showed_late(fake_hubspot, api_client):
+    watermarks = WatermarkStore(":memory:")
+    _create_contacts(fake_hubspot, api_client, [30])
+    _sync(api_client, _Sink(), watermarks)
+
+    # Only visible now, but modified 20 seconds before the watermark.
+    (late,) = _create_contacts(fake_hubspot, api_client, [10])
+    sink = _Sink()
+    _sync(api_client, sink, watermarks, lookback_seconds=60)
+
+    assert late in sink.ids
+    # The lookback doesn't move the watermark back.
+    assert watermarks.get(
+        "1", ObjectType.CONTACT
+    ) == incremental_sync_module._to_millis(_timestamp(30))
+    sink = _Sink()
+    _sync(api_client, sink, watermarks, lookback_seconds=10)
+    assert late not in sink.ids
+
+
+def test_rerun_after_a_failed_sink_delivers_the_rest(fake_hubspot, api_client):
+    watermarks = WatermarkStore(":memory:")
+    ids = _create_contacts(fake_hubspot, api_client, [1, 2, 3, 4, 5])
+
+    with pytest.raises(ConnectionError):
+        _sync(api_client, _Sink(fail_on_call=2), watermarks, page_size=2)
+
+    # Only the first page got written, so only that one moved the watermark.
+    assert watermarks.get(
+        "1", ObjectType.CONTACT
+    ) == incremental_sync_module._to_millis(_timestamp(2))
+    sink = _Sink()
+    synced = _sync(api_client, sink, watermarks, page_size=2)
+
+    assert sink.ids == ids[1:]
+    assert synced == 4
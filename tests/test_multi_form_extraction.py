@@ -0,0 +1,73 @@
+from common.form import FieldDefinition, FormDefinition, FormName
+
+from examples.utils.multi_form_extraction import (
+    combine_forms,
+    fill_in_forms,
+    split_form_data,
+)
+from tests.fakes import FakeGptClient, default_answer
+
+CONTACT = FormDefinition(
+    FormName.HUBSPOT_CONTACT,
+    [FieldDefinition("email", required=True), FieldDefinition("firstname")],
+)
+CALL = FormDefinition(FormName.HUBSPOT_MEETING, [FieldDefinition("hs_call_body")])
+TASK = FormDefinition(
+    FormName.HUBSPOT_TASK,
+    [
+        FieldDefinition("hs_task_subject", required=True),
+        FieldDefinition("hs_task_body"),
+    ],
+)
+COMBINED_NAME = "hubspot_contact+hubspot_meeting+hubspot_task"
+
+
+def test_combined_form_is_named_after_all_forms():
+    combined = combine_forms([CONTACT, CALL, TASK])
+
+    assert combined.name == COMBINED_NAME
+    assert [field.name for field in combined.fields] == [
+        "hubspot_contact__email",
+        "hubspot_contact__firstname",
+        "hubspot_meeting__hs_call_body",
+        "hubspot_task__hs_task_subject",
+        "hubspot_task__hs_task_body",
+    ]
+
+
+def test_split_form_data_fails_empty_and_incomplete_forms():
+    contact, call, task = split_form_data(
+        [CONTACT, CALL, TASK],
+        {
+            "hubspot_contact__email": "lucas@example.com",
+            "hubspot_meeting__hs_call_body": None,
+            "hubspot_task__hs_task_body": "Send the VRBO details",
+        },
+    )
+
+    assert contact.to_dict() == {"email": "lucas@example.com"}
+    assert call is None
+    assert task is None
+
+
+def _combined_skips_the_task(form, text):
+    data = default_answer(form, text)
+    if form.name == COMBINED_NAME:
+        del data["hubspot_task__hs_task_subject"]
+    return data
+
+
+def test_incomplete_form_falls_back_to_its_own_call():
+    gpt_client = FakeGptClient(answer=_combined_skips_the_task)
+
+    (contact, _), (call, _), (task, err) = fill_in_forms(
+        gpt_client, [(CONTACT, False), (CALL, True), (TASK, True)], "some transcript"
+    )
+
+    assert err is None
+    assert task.to_dict() == default_answer(TASK, "some transcript")
+    assert contact is not None and call is not None
+    assert [name for name, _ in gpt_client.calls] == [
+        COMBINED_NAME,
+        FormName.HUBSPOT_TASK,
+    ]
@@ -0,0 +1,74 @@
+import importlib
+import sys
+
+import pytest
+from app import form_library
+from common.form import FormName
+from examples.utils.prebuilt_forms import (
+    clear_prebuilt_forms_cache,
+    get_form,
+    load_prebuilt_forms,
+)
+
+PACKAGE = "prebuilt_forms_for_tests"
+
+_MODULE_SOURCE = """
+from common.form import FieldDefinition, FormDefinition, FormName
+
+FORMS = {
+    FormName.HUBSPOT_CONTACT: FormDefinition(FormName.HUBSPOT_CONTACT, [FieldDefinition("email")]),
+}
+"""
+
+
+@pytest.fixture
+def package_dir(tmp_path, monkeypatch):
+    package_dir = tmp_path / PACKAGE
+    package_dir.mkdir()
+    (package_dir / "__init__.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    clear_prebuilt_forms_cache()
+    yield package_dir
+    clear_prebuilt_forms_cache()
+    for name in [name for name in sys.modules if name.startswith(PACKAGE)]:
+        del sys.modules[name]
+
+
+def _generate(package_dir, hub_id):
+    (package_dir / f"hubspot_forms_{hub_id}.py").write_text(_MODULE_SOURCE)
+    importlib.invalidate_caches()
+
+
+def test_get_form_prefers_the_prebuilt_form(package_dir):
+    _generate(package_dir, 1)
+
+    form = get_form(FormName.HUBSPOT_CONTACT, hub_id=1, package=PACKAGE)
+
+    assert [field.name for field in form.fields] == ["email"]
+    assert get_form(FormName.HUBSPOT_CONTACT, hub_id=1, package=PACKAGE) is form
+    # Not in the generated module, or no portal: the form library's.
+    assert get_form(FormName.HUBSPOT_TASK, hub_id=1, package=PACKAGE) is (
+        form_library.get_form(FormName.HUBSPOT_TASK)
+    )
+    assert get_form(FormName.HUBSPOT_CONTACT, package=PACKAGE) is (
+        form_library.get_form(FormName.HUBSPOT_CONTACT)
+    )
+
+
+def test_miss_is_cached_until_cleared(package_dir):
+    assert load_prebuilt_forms(2, PACKAGE) is None
+
+    _generate(package_dir, 2)
+
+    assert load_prebuilt_forms(2, PACKAGE) is None
+    clear_prebuilt_forms_cache()
+    assert FormName.HUBSPOT_CONTACT in load_prebuilt_forms(2, PACKAGE)
+
+
+def test_prebuilt_forms_are_read_only(package_dir):
+    _generate(package_dir, 3)
+    forms = load_prebuilt_forms(3, PACKAGE)
+
+    with pytest.raises(TypeError):
+        forms[FormName.HUBSPOT_TASK] = forms[FormName.HUBSPOT_CONTACT]
+    assert FormName.HUBSPOT_TASK not in load_prebuilt_forms(3, PACKAGE)
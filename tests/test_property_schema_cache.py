@@ -0,0 +1,120 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from hubspot import HubSpot
+
+from examples.utils.fake_hubspot import FakeHubspot
+from examples.utils.property_schema_cache import PropertySchemaCache
+
+
+@pytest.fixture
+def properties():
+    # Our own copy, the tests change it.
+    return {"contact": ["email", "firstname", "lastname"]}
+
+
+@pytest.fixture
+def fake_hubspot(properties):
+    with FakeHubspot(properties=properties, seed=0) as fake:
+        yield fake
+
+
+def _names(collection):
+    return [prop.name for prop in collection.results]
+
+
+def test_hit_within_ttl(fake_hubspot, api_client):
+    cache = PropertySchemaCache()
+
+    first = cache.get(api_client, 1, "contacts")
+    second = cache.get(api_client, "1", "contacts")
+
+    assert _names(first) == ["email", "firstname", "lastname"]
+    assert second is first
+    assert fake_hubspot.metrics()["properties"] == 1
+    assert cache.metrics() == {"misses": 1, "fetched": 1, "hits": 1}
+
+
+def test_expired_schema_is_revalidated_with_its_etag(fake_hubspot, api_client):
+    cache = PropertySchemaCache(ttl_seconds=0)
+    first = cache.get(api_client, 1, "contacts")
+
+    second = cache.get(api_client, 1, "contacts")
+
+    # 304: the deserialized schema is reused as-is.
+    assert second is first
+    assert fake_hubspot.metrics()["not_modified"] == 1
+    assert cache.metrics() == {"misses": 2, "fetched": 1, "revalidated": 1}
+
+
+def test_changed_schema_is_fetched_again(fake_hubspot, api_client, properties):
+    cache = PropertySchemaCache(ttl_seconds=0)
+    cache.get(api_client, 1, "contacts")
+    properties["contact"].append("favorite_color")
+
+    changed = cache.get(api_client, 1, "contacts")
+
+    assert _names(changed)[-1] == "favorite_color"
+    assert "not_modified" not in fake_hubspot.metrics()
+    assert cache.metrics()["fetched"] == 2
+
+
+def test_disk_layer_is_shared_with_a_fresh_cache(fake_hubspot, api_client, tmp_path):
+    PropertySchemaCache(cache_dir=str(tmp_path)).get(api_client, 1, "contacts")
+
+    fresh = PropertySchemaCache(cache_dir=str(tmp_path))
+    schema = fresh.get(api_client, 1, "contacts")
+
+    assert _names(schema) == ["email", "firstname", "lastname"]
+    assert fake_hubspot.metrics()["properties"] == 1
+    assert fresh.metrics() == {"disk_hits": 1, "hits": 1}
+
+
+def test_expired_disk_entry_is_revalidated(fake_hubspot, api_client, tmp_path):
+    PropertySchemaCache(cache_dir=str(tmp_path)).get(api_client, 1, "contacts")
+
+    expired = PropertySchemaCache(ttl_seconds=0, cache_dir=str(tmp_path))
+    schema = expired.get(api_client, 1, "contacts")
+
+    assert _names(schema) == ["email", "firstname", "lastname"]
+    assert fake_hubspot.metrics()["not_modified"] == 1
+    assert expired.metrics() == {"disk_hits": 1, "misses": 1, "revalidated": 1}
+
+
+def test_invalidate(fake_hubspot, api_client, tmp_path):
+    cache = PropertySchemaCache(cache_dir=str(tmp_path))
+    cache.get(api_client, 1, "contacts")
+    cache.get(api_client, 2, "contacts")
+
+    cache.invalidate(hub_id=1)
+
+    assert sorted(os.listdir(tmp_path)) == ["2-contacts.json"]
+    cache.get(api_client, 1, "contacts")
+    cache.get(api_client, 2, "contacts")
+    assert fake_hubspot.metrics()["properties"] == 3
+
+    cache.invalidate()
+
+    assert os.listdir(tmp_path) == []
+    cache.get(api_client, 2, "contacts")
+    assert fake_hubspot.metrics()["properties"] == 4
+
+
+def test_concurrent_misses_fetch_once(properties):
+    cache = PropertySchemaCache()
+    with FakeHubspot(latency_seconds=0.2, properties=properties) as fake:
+        api_client = HubSpot(access_token="fake", host=fake.url)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            schemas = list(
+                executor.map(
+                    lambda hub_id: cache.get(api_client, hub_id, "contacts"), [1] * 8
+                )
+            )
+
+        assert fake.metrics()["properties"] == 1
+    assert all(schema is schemas[0] for schema in schemas)
+    metrics = cache.metrics()
+    assert (metrics["misses"], metrics["fetched"]) == (1, 1)
+    assert metrics["collapsed_fetches"] + metrics.get("hits", 0) == 7
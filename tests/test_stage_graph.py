@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+from examples.utils.stage_graph import Stage, run_stage_graph
+
+
+def test_stages_get_their_dependencies_results():
+    order = []
+
+    def _stage(name, value):
+        def fn(**deps):
+            order.append(name)
+            return value + sum(deps.values())
+
+        return fn
+
+    results = run_stage_graph(
+        [
+            Stage("sum", _stage("sum", 0), deps=["a", "b"]),
+            Stage("a", _stage("a", 1)),
+            Stage("b", _stage("b", 2), deps=["a"]),
+        ]
+    )
+
+    assert results == {"a": 1, "b": 3, "sum": 4}
+    assert order == ["a", "b", "sum"]
+
+
+def test_independent_stages_overlap():
+    def _sleep():
+        time.sleep(0.2)
+
+    start = time.perf_counter()
+    run_stage_graph([Stage(name, _sleep) for name in ["a", "b", "c"]])
+
+    assert time.perf_counter() - start < 0.4
+
+
+def test_stage_starts_as_soon_as_its_own_dependencies_are_done():
+    started = {}
+
+    def _record(name, seconds=0.0):
+        def fn(**_):
+            started[name] = time.perf_counter()
+            time.sleep(seconds)
+
+        return fn
+
+    start = time.perf_counter()
+    run_stage_graph(
+        [
+            Stage("fast", _record("fast", 0.05)),
+            Stage("slow", _record("slow", 0.3)),
+            Stage("after_fast", _record("after_fast"), deps=["fast"]),
+        ]
+    )
+
+    assert started["after_fast"] - start < 0.2
+
+
+def test_failure_is_raised_and_dependents_do_not_run():
+    ran = []
+    finished = threading.Event()
+
+    def _fail():
+        raise RuntimeError("boom")
+
+    def _slow():
+        time.sleep(0.1)
+        finished.set()
+
+    with pytest.raises(RuntimeError, match="boom"):
+        run_stage_graph(
+            [
+                Stage("fail", _fail),
+                Stage("slow", _slow),
+                Stage("dependent", lambda fail: ran.append(fail), deps=["fail"]),
+            ]
+        )
+
+    assert ran == []
+    # Already running stages are waited for.
+    assert finished.is_set()
+
+
+@pytest.mark.parametrize(
+    "stages",
+    [
+        [Stage("a", lambda: 1), Stage("a", lambda: 2)],
+        [Stage("a", lambda missing: 1, deps=["missing"])],
+        [Stage("a", lambda b: 1, deps=["b"]), Stage("b", lambda a: 1, deps=["a"])],
+    ],
+    ids=["duplicate", "unknown_dependency", "cycle"],
+)
+def test_invalid_graph(stages):
+    with pytest.raises(ValueError):
+        run_stage_graph(stages)
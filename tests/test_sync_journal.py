@@ -0,0 +1,55 @@
+from http import HTTPStatus
+
+from examples.utils.batch_item_result import BatchItemResult
+from examples.utils.sync_journal import SyncJournal
+
+
+class _ClientResponse:
+    """Shaped like a HubspotClient single-object response, which has its own task response layout."""
+
+    def __init__(self, status, props):
+        self.status = status
+        self.props = props
+
+    @property
+    def hs_object_id(self):
+        return self.props["hs_object_id"]
+
+    def is_success(self):
+        return 200 <= self.status < 300
+
+    def get_props_if_ok(self):
+        return self.props if self.is_success() else None
+
+    def get_task_response(self):
+        return {"status": self.status, "data": {"properties": self.props}}
+
+
+def test_replayed_create_gives_the_original_task_response(tmp_path):
+    journal = SyncJournal(str(tmp_path / "journal.db"))
+    creates = []
+
+    def create():
+        creates.append(1)
+        return _ClientResponse(HTTPStatus.CREATED, {"hs_object_id": "11", "email": "a"})
+
+    first = journal.create_once("entry-1", "contact", create)
+    replayed = journal.create_once("entry-1", "contact", create)
+
+    assert len(creates) == 1
+    assert replayed.status == first.status
+    assert replayed.hs_object_id == "11"
+    assert replayed.get_props_if_ok() == first.get_props_if_ok()
+    assert replayed.get_task_response() == first.get_task_response()
+
+
+def test_replayed_upsert_keeps_created(tmp_path):
+    journal = SyncJournal(str(tmp_path / "journal.db"))
+    updated = BatchItemResult(
+        status=HTTPStatus.OK, props={"hs_object_id": "11"}, created=False
+    )
+
+    journal.create_once("entry-1", "contact", lambda: updated)
+    replayed = journal.create_once("entry-1", "contact", lambda: None)
+
+    assert replayed.created is False
@@ -0,0 +1,71 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from examples.utils.token_cache import AccessToken, AccessTokenCache
+
+
+class _FakeOauth:
+    """refresh_fn / load_fn pair, the refreshed tokens are what load_fn returns afterwards (like the database)."""
+
+    def __init__(self, refresh_seconds: float = 0.0):
+        self.refresh_seconds = refresh_seconds
+        self.refreshes = 0
+        self.persisted = AccessToken("persisted", time.time() + 1800)
+        self._lock = threading.Lock()
+
+    def refresh(self, oauth_data_id) -> AccessToken:
+        time.sleep(self.refresh_seconds)
+        with self._lock:
+            self.refreshes += 1
+            self.persisted = AccessToken(
+                f"refreshed-{self.refreshes}", time.time() + 1800
+            )
+            return self.persisted
+
+    def load(self, oauth_data_id) -> AccessToken:
+        return self.persisted
+
+
+def test_cold_start_loads_the_persisted_token():
+    oauth = _FakeOauth()
+    cache = AccessTokenCache(oauth.refresh, load_fn=oauth.load)
+
+    assert cache.get(1) == "persisted"
+    assert cache.get(1) == "persisted"
+    assert oauth.refreshes == 0
+    assert cache.metrics() == {"misses": 1, "loads": 1, "hits": 1}
+
+
+def test_get_after_invalidate_refreshes_instead_of_reloading():
+    oauth = _FakeOauth()
+    cache = AccessTokenCache(oauth.refresh, load_fn=oauth.load)
+    rejected = cache.get(1)
+
+    cache.invalidate(1)
+
+    assert cache.get(1) == "refreshed-1" != rejected
+    assert cache.get(1) == "refreshed-1"
+    assert oauth.refreshes == 1
+
+
+def test_concurrent_gets_after_invalidate_refresh_once():
+    oauth = _FakeOauth(refresh_seconds=0.1)
+    cache = AccessTokenCache(oauth.refresh, load_fn=oauth.load)
+    cache.get(1)
+    cache.invalidate(1)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        tokens = set(executor.map(cache.get, [1] * 8))
+
+    assert tokens == {"refreshed-1"}
+    assert oauth.refreshes == 1
+    assert cache.metrics()["collapsed_refreshes"] == 7
+
+
+def test_expiring_token_is_refreshed():
+    oauth = _FakeOauth()
+    cache = AccessTokenCache(oauth.refresh, refresh_margin_seconds=300)
+    cache.put(1, AccessToken("expiring", time.time() + 60))
+
+    assert cache.get(1) == "refreshed-1"
@@ -0,0 +1,189 @@
+from http import HTTPStatus
+
+import pytest
+from hubspot import HubSpot
+
+from examples.gpt_to_hubspot import (
+    bulk_extract_and_sync,
+    extract_and_sync_contact_with_follow_up,
+    test_data1,
+)
+from examples.utils import tracing
+from examples.utils.fake_hubspot import FakeHubspot
+from examples.utils.hubspot_api import crm_batch_create
+from examples.utils.stage_graph import Stage, run_stage_graph
+from examples.utils.tracing import (
+    InMemorySpanExporter,
+    LogSpanExporter,
+    SpanExporter,
+    configure_tracing,
+    disable_tracing,
+    span,
+    trace_hubspot_client,
+    traced,
+)
+from tests.fakes import FakeDbTask, FakeGptClient, SdkHubspotClient
+
+
+@pytest.fixture
+def memory():
+    exporter = InMemorySpanExporter()
+    configure_tracing(exporter)
+    yield exporter
+    disable_tracing()
+
+
+class _FailingExporter(SpanExporter):
+    def on_start(self, span):
+        raise RuntimeError("collector down")
+
+    def on_end(self, span):
+        raise RuntimeError("collector down")
+
+
+def test_spans_nest_across_the_stage_graph_threads(memory, api_client):
+    entry = extract_and_sync_contact_with_follow_up(
+        SdkHubspotClient(api_client), FakeGptClient(), FakeDbTask(), test_data1
+    )
+
+    (root,) = memory.spans("extract_and_sync_contact_with_follow_up")
+    assert root.parent_id is None
+    assert root.attributes == {"state": entry.state} == {"state": "success"}
+    stages = {s.name: s for s in memory.spans() if s.name.startswith("stage.")}
+    assert set(stages) == {
+        "stage.contact_gpt",
+        "stage.call_gpt",
+        "stage.task_gpt",
+        "stage.contact_sync",
+        "stage.call_sync",
+        "stage.task_sync",
+        "stage.contact_to_call",
+        "stage.contact_to_task",
+    }
+    for stage in stages.values():
+        assert (stage.trace_id, stage.parent_id) == (root.trace_id, root.span_id)
+    gpt_parents = {s.parent_id for s in memory.spans("gpt.fill_in_form")}
+    assert gpt_parents == {
+        stages[f"stage.{name}_gpt"].span_id for name in ("contact", "call", "task")
+    }
+
+
+def test_trace_hubspot_client_spans_every_call(memory, api_client):
+    extract_and_sync_contact_with_follow_up(
+        SdkHubspotClient(api_client), FakeGptClient(), FakeDbTask(), test_data1
+    )
+
+    (create,) = memory.spans("hubspot.crm_contact_create")
+    assert create.attributes["object_type"] == "contact"
+    assert create.attributes["status"] == HTTPStatus.CREATED
+    assert create.attributes["payload_bytes"] > 0
+    assert create.parent_id == memory.spans("stage.contact_sync")[0].span_id
+    associations = memory.spans("hubspot.crm_association_create")
+    assert len(associations) == 2
+    # Not a crm_<object type>_ method, and the association's result has no status.
+    assert {s.attributes["object_type"] for s in associations} == {"association"}
+    assert all(s.error is None for s in associations)
+
+
+def test_batch_spans_carry_status_and_payload_bytes(memory, api_client):
+    bulk_extract_and_sync(api_client, FakeGptClient(), [test_data1] * 3)
+    extract_and_sync_contact_with_follow_up(
+        SdkHubspotClient(api_client),
+        FakeGptClient(),
+        FakeDbTask(),
+        test_data1,
+        api_client=api_client,
+        upsert_contacts=True,
+    )
+
+    expected_status = {
+        "hubspot.batch_create": HTTPStatus.CREATED,
+        "hubspot.batch_upsert": HTTPStatus.OK,
+        "hubspot.batch_associate": HTTPStatus.CREATED,
+    }
+    for name, status in expected_status.items():
+        spans = memory.spans(name)
+        assert spans, name
+        for s in spans:
+            assert s.attributes["status"] == status
+            assert s.attributes["payload_bytes"] > 0
+            assert s.attributes["results"] == s.attributes["inputs"]
+
+
+def test_failed_batch_span_takes_the_status_of_the_api_exception(memory):
+    with FakeHubspot(error_rate=1.0) as fake:
+        api_client = HubSpot(access_token="fake", host=fake.url)
+
+        (result,) = crm_batch_create(api_client, "contacts", [{"email": "a@b.c"}])
+
+    assert result.status == HTTPStatus.INTERNAL_SERVER_ERROR
+    (failed,) = memory.spans("hubspot.batch_create")
+    assert failed.attributes["status"] == HTTPStatus.INTERNAL_SERVER_ERROR
+    assert failed.error.startswith("ServiceException: (500)")
+
+
+def test_traced_result_attributes(memory):
+    @traced("sum", result_attributes=lambda result: {"total": result})
+    def add(a, b):
+        return a + b
+
+    @traced(result_attributes=lambda result: {"never": "called"})
+    def nothing():
+        return None
+
+    assert add(1, 2) == 3
+    assert nothing() is None
+    assert memory.spans("sum")[0].attributes == {"total": 3}
+    assert memory.spans("nothing")[0].attributes == {}
+
+
+def test_log_span_exporter():
+    lines = []
+    configure_tracing(
+        LogSpanExporter(write=lines.append),
+        LogSpanExporter(min_duration_ms=60_000, write=lines.append),
+    )
+    try:
+        with span("hubspot.batch_create", object_type="contacts") as outer:
+            with pytest.raises(ValueError):
+                with span("gpt.fill_in_form", form="contact"):
+                    raise ValueError("bad answer")
+    finally:
+        disable_tracing()
+
+    inner_line, outer_line = lines
+    assert inner_line.startswith("TRACE gpt.fill_in_form ")
+    assert f"parent={outer.span_id}" in inner_line
+    assert inner_line.endswith('{"form": "contact"} error=ValueError: bad answer')
+    assert outer_line.startswith("TRACE hubspot.batch_create ")
+    assert outer_line.endswith('parent=None {"object_type": "contacts"}')
+
+
+def test_failing_exporter_does_not_break_the_call(memory):
+    configure_tracing(_FailingExporter(), memory)
+
+    with span("gpt.fill_in_form") as s:
+        s.set_attribute("status", 200)
+
+    (finished,) = memory.spans()
+    assert finished.attributes == {"status": 200}
+    assert finished.error is None
+
+
+def test_tracing_off_is_a_no_op(api_client):
+    memory = InMemorySpanExporter()
+    configure_tracing(memory)
+    disable_tracing()
+    client = SdkHubspotClient(api_client)
+
+    assert span("a", x=1) is span("b")
+    assert trace_hubspot_client(client) is client
+    assert tracing.payload_bytes({"inputs": []}) is None
+    assert run_stage_graph([Stage("one", lambda: 1)]) == {"one": 1}
+    entry = extract_and_sync_contact_with_follow_up(
+        client, FakeGptClient(), FakeDbTask(), test_data1
+    )
+
+    assert entry.state == "success"
+    assert tracing.current_span() is None
+    assert memory.spans() == []